@@ -0,0 +1,185 @@
+import numpy as np
+
+class BatchDraft:
+    ''' Many autodrafts (no search) of the same league at once, with leagues along the first axis of every array.
+
+    Every team takes the highest ranked player still available at one of its
+    open positions, as in Draft.draft_next_best, or with shuffle_picks a random
+    one of the best available at each open position.  Naive drafts give the
+    same rosters and totals as Draft.draft_all(naive_draft = True); shuffled
+    drafts follow the same rule with a different random stream.
+
+    Parameters
+    ----------
+    draft : Draft
+        League settings and player arrays; drafts start from draft.state (before the first pick)
+
+    number_leagues : int
+        Number of drafts
+
+    shuffle_picks : bool [optional]
+        Pick at random among the best available at each open position
+
+    rng : np.random.Generator [optional]
+        Random numbers for shuffle_picks (default np.random.default_rng())
+
+    Returns
+    -------
+    Instance of BatchDraft, which contains:
+        Objects:
+        - self.picked : (leagues, players + 1), the last column stays False
+        - self.roster_spots : (leagues, teams, slots)
+        - self.batting_totals : (leagues, teams, batting stats)
+        - self.pitching_totals : (leagues, teams, pitching stats)
+        - self.roster_ids : (leagues, teams, rounds), player ids in the order drafted
+        - self.roster_slots : (leagues, teams, rounds)
+
+        Functions:
+        - draft_all
+        - draft_pick
+        - standings
+        - drafted_team
+
+    '''
+
+    def __init__(self, draft, number_leagues, shuffle_picks = False, rng = None):
+        self.draft = draft
+        self.number_leagues = number_leagues
+        self.shuffle_picks = shuffle_picks
+        self.rng = np.random.default_rng() if rng is None else rng
+        number_players = len(draft.player_names)
+        state = draft.state
+
+        self.picked = np.zeros((number_leagues, number_players + 1), dtype=bool)
+        self.picked[:, :number_players] = state.picked
+        self.roster_spots = np.tile(state.roster_spots, (number_leagues, 1, 1))
+        self.batting_totals = np.tile(state.batting_totals, (number_leagues, 1, 1))
+        self.pitching_totals = np.tile(state.pitching_totals, (number_leagues, 1, 1))
+        self.roster_ids = np.tile(state.roster_ids, (number_leagues, 1, 1))
+        self.roster_slots = np.tile(state.roster_slots, (number_leagues, 1, 1))
+        self.roster_size = np.tile(state.roster_size, (number_leagues, 1))
+
+        # Eligible player ids of each position, in ranked order and padded with number_players (never picked), and a
+        # pointer per league and position below which every player has been drafted
+        self.positions = ['C','1B','2B','3B','SS','OF','SP','RP']
+        position_players = [draft.position_players[draft.position_index[position]] for position in self.positions]
+        self.position_players = np.full((len(self.positions), max(len(i) for i in position_players) + 1), number_players)
+        for iposition, idx_position in enumerate(position_players):
+            self.position_players[iposition, :len(idx_position)] = idx_position
+        self.position_pointers = np.zeros((number_leagues, len(self.positions)), dtype=int)
+        self.is_fielder = np.array([position not in draft.pitchers for position in self.positions])
+
+        # Slots each player tries, in order, when drafted (as in Draft.get_optimal_position; -1 pads)
+        slot_preferences = [[draft.slot_index[slot] for slot in slot_preference(positions) if slot in draft.slot_index] for positions in draft.player_positions]
+        self.slot_preferences = np.full((number_players + 1, max(len(i) for i in slot_preferences)), -1)
+        for player_id, slots in enumerate(slot_preferences):
+            self.slot_preferences[player_id, :len(slots)] = slots
+
+        self.is_pitcher = np.append(draft.player_is_pitcher.astype(bool), False)
+        self.batting_lines = np.vstack([draft.batting_lines, np.zeros(draft.batting_lines.shape[1])])
+        self.pitching_lines = np.vstack([draft.pitching_lines, np.zeros(draft.pitching_lines.shape[1])])
+
+    def draft_all(self):
+        ''' Draft every round, in snake order.'''
+        for iround in range(self.draft.number_rounds):
+            draft_order = np.arange(self.draft.number_teams)
+            if iround % 2 == 1:
+                draft_order = draft_order[::-1]
+            for iteam in draft_order:
+                self.draft_pick(iteam)
+
+    def draft_pick(self, team_key):
+        ''' Make the pick of team_key in every league.'''
+        leagues = np.arange(self.number_leagues)
+        spots = self.roster_spots[:, team_key, :]
+        slot_index = self.draft.slot_index
+
+        # Open positions; the bench only when it is the last open spot, and UTIL / P open up every fielding / pitching
+        # position (see Draft.draft_next_best and Draft.expand_unfilled_positions)
+        is_open = lambda slot: spots[:, slot_index[slot]] > 0 if slot in slot_index else np.zeros(self.number_leagues, dtype=bool)
+        open_bench = is_open('BN') & (spots.sum(axis=1) == 1)
+        open_util = is_open('UTIL')
+        open_p = is_open('P')
+        all_positions = open_bench | (open_util & open_p)
+        allowed = np.stack([is_open(position) for position in self.positions], axis=1)
+        allowed |= all_positions[:, None]
+        allowed[:, self.is_fielder] |= (open_util & ~all_positions)[:, None]
+        allowed[:, ~self.is_fielder] |= (open_p & ~open_util & ~all_positions)[:, None]
+
+        # Best available player at each position: move pointers past drafted players
+        current = self.position_players[np.arange(len(self.positions)), self.position_pointers]
+        stale = self.picked[leagues[:, None], current]
+        while stale.any():
+            self.position_pointers += stale
+            current = self.position_players[np.arange(len(self.positions)), self.position_pointers]
+            stale = self.picked[leagues[:, None], current]
+        number_players = self.picked.shape[1] - 1
+        candidates = np.where(allowed, current, number_players)
+
+        if self.shuffle_picks == False:
+            player_ids = candidates.min(axis=1)
+        else:
+            # Uniformly among the distinct best players of the open positions
+            duplicate = np.triu(candidates[:, :, None] == candidates[:, None, :], k = 1).any(axis=1)
+            keys = self.rng.random(candidates.shape)
+            keys[duplicate | (candidates == number_players)] = np.inf
+            player_ids = candidates[leagues, keys.argmin(axis=1)]
+
+        # First open slot among those the player tries
+        slot_preferences = self.slot_preferences[player_ids]
+        slot_open = (slot_preferences >= 0) & (spots[leagues[:, None], slot_preferences] > 0)
+        has_slot = slot_open.any(axis=1)
+        if not has_slot.all():
+            # argmax of a row with no open slot would be 0, and take a slot the team does not have (as Draft.draft_into_teams)
+            league = np.flatnonzero(~has_slot)[0]
+            if player_ids[league] == number_players:
+                raise RuntimeError('No player left for team '+str(team_key)+' in league '+str(league)+' at its open positions')
+            raise RuntimeError('Team '+str(team_key)+' in league '+str(league)+' has no open roster spot for '+str(self.draft.player_names[player_ids[league]]))
+        slots = slot_preferences[leagues, slot_open.argmax(axis=1)]
+
+        # Add the players, and their statlines, to the rosters of team_key
+        self.picked[leagues, player_ids] = True
+        self.roster_spots[leagues, team_key, slots] -= 1
+        self.roster_ids[leagues, team_key, self.roster_size[:, team_key]] = player_ids
+        self.roster_slots[leagues, team_key, self.roster_size[:, team_key]] = slots
+        self.roster_size[:, team_key] += 1
+        is_pitcher = self.is_pitcher[player_ids][:, None]
+        self.batting_totals[:, team_key] += np.where(is_pitcher, 0., self.batting_lines[player_ids])
+        self.pitching_totals[:, team_key] += np.where(is_pitcher, self.pitching_lines[player_ids], 0.)
+
+    def standings(self):
+        ''' Roto scores and placements of every team in every league, each (leagues, teams).'''
+        return self.draft.roto_scorer.standings(self.batting_totals, self.pitching_totals)
+
+    def drafted_team(self, league, team_key, scores = None, placements = None):
+        ''' Picks of team_key in league by round, as in Draft.drafted_team: (rank, name, slot, placement, score).'''
+        if scores is None:
+            scores, placements = self.standings()
+        drafted_team = {}
+        for iround in range(self.roster_size[league, team_key]):
+            player_id = self.roster_ids[league, team_key, iround]
+            drafted_team[iround] = (self.draft.ranked_players.index[player_id], self.draft.player_names[player_id], self.draft.state.slot_names[self.roster_slots[league, team_key, iround]],
+                                    placements[league, team_key], scores[league, team_key])
+        return drafted_team
+
+def slot_preference(positions):
+    # Roster slots a player eligible at positions (e.g., '2B/SS') fills, in the order Draft.get_optimal_position tries them
+    single_positions = positions.split('/')
+    if ('RP' in single_positions) or ('SP' in single_positions):
+        return [slot for slot in ['RP','SP'] if slot in single_positions] + ['P','BN']
+    slots = []
+    if ('C' in single_positions) & ('CF' not in single_positions):
+        slots.append('C')
+    for slot in ['1B','2B']:
+        if slot in single_positions:
+            slots.append(slot)
+    if ('OF' in single_positions) | ('LF' in single_positions) | ('CF' in single_positions) | ('RF' in single_positions):
+        slots.append('OF')
+    for slot in ['SS','3B']:
+        if slot in single_positions:
+            slots.append(slot)
+    if 'Util' in single_positions:
+        slots.append('UTIL')
+    if len(slots) > 0:
+        slots = slots + ['UTIL','BN']
+    return slots
@@ -1,9 +1,17 @@
 import pdb
 import os
 import copy
+import time
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 pd.options.mode.chained_assignment = None
+from GameDayFunctions.draft_state_2020 import DraftState
+from GameDayFunctions.fangraphs_projection_2020 import memory_bytes, name_keys
+from GameDayFunctions.roto_scoring_2020 import RotoScorer
+from GameDayFunctions.rollout_cache_2020 import RolloutCache
+from GameDayFunctions.live_draft_2020 import LiveDraft, read_pick_list
+from GameDayFunctions import spreadsheet_cache_2020
 
 class Draft:
 
@@ -14,7 +22,10 @@ class Draft:
                  batter_stats  = ['AB','R','1B','2B', '3B','HR','RBI','SB','BB','AVG','OPS'],
                  pitcher_stats = ['IP','W', 'L','CG','SHO','SV','BB','SO','ERA','WHIP','BSV'],
                  filter_injured_players = True,
-                 sigmoid_cut = 1e-8):
+                 sigmoid_cut = 1e-8,
+                 n_workers = 1,
+                 rollout_cache_megabytes = 64,
+                 compact = False):
 
         self.number_teams = number_teams
         self.number_rounds = sum(roster_spots.values())
@@ -25,53 +36,142 @@ class Draft:
         self.remaining_ranked_players = projections_object.all_rank
         self.roto_stats_batting = pd.DataFrame(columns =  batter_stats[1:])
         self.roto_stats_pitching = pd.DataFrame(columns =  pitcher_stats[1:])
+        self.batter_stats = batter_stats
+        self.pitcher_stats = pitcher_stats
         self.sigmoid_cut = sigmoid_cut
-        self.teams = {}
+        self.n_workers = n_workers # > 1 finishes the pseudo-drafts of find_best_pick in a pool of n_workers processes (see use_worker_pool)
+        self.pool = None
+        self.rng = None # np.random.Generator for shuffle_picks; None uses the global np.random
+        # Rollouts (the autodraft after a candidate pick) are deterministic given the draft state, so they are cached; 0 disables
+        self.rollout_cache = RolloutCache(rollout_cache_megabytes) if rollout_cache_megabytes > 0 else None
+        self.live_session = None # LiveDraft of draft_from_list_and_find_best_pick
+        self.compact = compact # float32 statlines and team totals, and int16 player ids in rosters and rollouts, to fit more workers in memory
+        self.roster_spots = roster_spots
+        self.slot_index = {k:i for i,k in enumerate(roster_spots)}
         # Eventually make this smarter, e.g.;
         # self.roster_spots{"fielders":{'C':1,'1B':1,'2B':1, '3B':1,'SS':1,'OF':3,'UTIL':1},
         #                   "pitchers":{'SP':2,'RP':2,'P':3}
         #                    "bench":{'BN':5}}
         self.fielders = ['C','1B','2B','3B','SS','OF','UTIL']
         self.pitchers = ['SP', 'RP', 'P']
-        for i in np.arange(number_teams):
-            roto_stats = {}
-            roto_stats['batting_stats'] = pd.DataFrame(columns =  batter_stats)
-            roto_stats['pitching_stats'] = pd.DataFrame(columns =  pitcher_stats)
-            roto_stats['roster_spots'] = roster_spots.copy()
-            roto_stats['roster'] = {}
-            self.teams[i] = roto_stats
+        # Bit of each position in player_eligibility; LF/CF/RF count as OF, and P (SP or RP) and UTIL (any hitter) combine bits
+        self.position_bits = {'C':1,'1B':2,'2B':4,'3B':8,'SS':16,'OF':32,'SP':64,'RP':128}
+        self.position_bits['P'] = self.position_bits['SP'] | self.position_bits['RP']
+        self.position_bits['UTIL'] = self.position_bits['C'] | self.position_bits['1B'] | self.position_bits['2B'] | self.position_bits['3B'] | self.position_bits['SS'] | self.position_bits['OF']
+        self.position_index = {k:i for i,k in enumerate(self.fielders + self.pitchers)}
+        # Roster spots, scarcest first, in the order replacement_totals fills them
+        self.replacement_slots = [slot for slot in ['C','SS','2B','3B','1B','OF','SP','RP','UTIL','P','BN'] if slot in roster_spots]
+        self.rate_stats = ['AVG','OPS','ERA','WHIP']
+        self.roto_scorer = RotoScorer(batter_stats, pitcher_stats, rate_stats = self.rate_stats)
 
         if filter_injured_players == True:
             self.filter_injured_list(path_list = "Injured_List_Spreadsheets/", injured_list_file = 'Injuries2020.xlsx')
 
-    # Find Resulting Standings
-    def tabulate_roto(self, teams):
-        # Determine which stats to include in roto scores
-        batting_stat_names = self.roto_stats_batting.columns.values.tolist()
-        pitching_stat_names = self.roto_stats_pitching.columns.values.tolist()
+        # Player ids are rows of the ranked players of projections_object; injured players start out as picked.
+        self.ranked_players = projections_object.all_rank
+        self.define_player_arrays()
 
-        # Estimate batting and pitching seperately and combine later
-        roto_stats_batting = self.roto_stats_batting.copy()
-        roto_stats_pitching = self.roto_stats_pitching.copy()
-
-        # Estimate Statlines for each team and append to roto_stats_batting/pitching
+        # The draft itself is a DraftState; self.teams is a readable view of it.
+        if compact == True:
+            self.state = DraftState(len(self.ranked_players), number_teams, roster_spots, len(batter_stats), len(pitcher_stats), number_positions = len(self.position_index),
+                                    totals_dtype = np.float32, ids_dtype = np.int16 if len(self.ranked_players) <= np.iinfo(np.int16).max else np.int32)
+        else:
+            self.state = DraftState(len(self.ranked_players), number_teams, roster_spots, len(batter_stats), len(pitcher_stats), number_positions = len(self.position_index))
+        self.state.picked = ~self.ranked_players.index.isin(self.remaining_ranked_players.index)
+        self.teams = self.teams_from_state(self.state)
+
+    def define_player_arrays(self):
+        ''' Eligibility and projected statline of every ranked player, indexed by player id, so that drafting a
+        player is an array lookup.  Statlines are stored with rate stats weighted by AB or IP.'''
+
+        self.player_names = self.ranked_players['PLAYER'].values
+        self.player_positions = self.ranked_players['Elig. Pos.'].values
+        self.player_is_pitcher = self.player_projections.player_is_pitcher
+        self.player_eligibility = np.array([eligibility_bits(positions, self.position_bits) for positions in self.player_positions], dtype=np.uint16)
+        self.player_is_outfielder = (self.player_eligibility & self.position_bits['OF']) > 0
+        self.position_masks = {}
+        self.player_ids_by_name = {}
+        for player_id, player_name in enumerate(self.player_names):
+            self.player_ids_by_name.setdefault(standardize_name(player_name), []).append(player_id)
+
+        # Player ids eligible at each position of position_index, in ranked order.  DraftState.position_pointers
+        # points into these past the players already drafted, so the next best at a position is a short walk.
+        self.position_players = [np.flatnonzero(self.position_mask(position)) for position in self.position_index]
+
+        # Draft position distribution of every player, for sampled rollouts.  Players without a FantasyPros average pick
+        # are expected to go at their rank, with the typical spread (STD/AVE) of those with one, or, for years without
+        # average picks, that of 2020 (0.16).
+        ave_pick = self.player_projections.player_ave_pick
+        std_pick = self.player_projections.player_std_pick
+        spread = np.nanmedian(std_pick / ave_pick) if np.isfinite(std_pick / ave_pick).any() else 0.16
+        self.player_ave_pick = np.where(np.isnan(ave_pick), np.arange(len(ave_pick)) + 1., ave_pick)
+        self.player_std_pick = np.where(np.isnan(std_pick), spread * self.player_ave_pick, std_pick)
+
+        self.batting_lines = weighted_statlines(self.player_projections.player_statlines(self.batter_stats), self.batter_stats, 'AB', self.rate_stats)
+        self.pitching_lines = weighted_statlines(self.player_projections.player_statlines(self.pitcher_stats, pitchers = True), self.pitcher_stats, 'IP', self.rate_stats)
+
+        # With a ProjectionEnsemble, the statlines of every model, (model, player, stat), followed by the blend that the rosters use
+        if hasattr(self.player_projections, 'model_statlines'):
+            self.model_names = self.player_projections.model_names
+            self.model_batting_lines = np.stack([weighted_statlines(statlines, self.batter_stats, 'AB', self.rate_stats) for statlines in self.player_projections.model_statlines(self.batter_stats)] + [self.batting_lines])
+            self.model_pitching_lines = np.stack([weighted_statlines(statlines, self.pitcher_stats, 'IP', self.rate_stats) for statlines in self.player_projections.model_statlines(self.pitcher_stats, pitchers = True)] + [self.pitching_lines])
+
+        if self.compact == True:
+            for name in ['player_ave_pick', 'player_std_pick', 'batting_lines', 'pitching_lines', 'model_batting_lines', 'model_pitching_lines']:
+                if hasattr(self, name):
+                    setattr(self, name, getattr(self, name).astype(np.float32))
+
+    def memory_bytes(self):
+        ''' Bytes of the per-player arrays of the Draft (player_names, statlines, ...), by attribute, and of its DraftState.'''
+        player_arrays = {name:memory_bytes(value) for name, value in self.__dict__.items()
+                         if isinstance(value, np.ndarray) and (len(value) == len(self.ranked_players) or name.startswith('model_'))}
+        player_arrays['player_ids_by_name'] = memory_bytes(self.player_ids_by_name)
+        player_arrays['position_players'] = memory_bytes(self.position_players)
+        player_arrays['state'] = self.state.nbytes
+        return player_arrays
+
+    def position_mask(self, position):
+        # Ranked players eligible at position (e.g., 'OF' matches LF/CF/RF/OF; 'C' excludes CF).  Computed once per position.
+        if position not in self.position_masks:
+            self.position_masks[position] = (self.player_eligibility & self.position_bits.get(position, 0)) > 0
+        return self.position_masks[position]
+
+    def teams_from_state(self, state):
+        # Readable version of a DraftState: a dict of teams, each with roster_spots, roster, batting_stats and pitching_stats.
+        teams = {}
         for iteam in np.arange(self.number_teams):
-            raw_team_batting = teams[iteam]['batting_stats']
-            raw_team_pitching = teams[iteam]['pitching_stats']
-            roto_team_batting = raw_team_batting.sum()
-            roto_team_pitching = raw_team_pitching.sum()
-
-            # Weight Rate Stats by the number of AB or IP
-            rate_stats = ['AVG','OPS','ERA','WHIP']
-            for istats in batting_stat_names:
-                if istats in rate_stats:
-                    roto_team_batting[istats] = (raw_team_batting[istats]*raw_team_batting['AB']).sum()/raw_team_batting['AB'].sum()
-            for istats in pitching_stat_names:
-                if istats in rate_stats:
-                    roto_team_pitching[istats] = (raw_team_pitching[istats]*raw_team_pitching['IP']).sum()/raw_team_pitching['IP'].sum()
-
-            roto_stats_batting = roto_stats_batting.append(roto_team_batting[batting_stat_names],ignore_index = True)
-            roto_stats_pitching = roto_stats_pitching.append(roto_team_pitching[pitching_stat_names],ignore_index = True)
+            roto_stats = {}
+            player_ids = state.roster_ids[iteam, :state.roster_size[iteam]]
+            slots = state.roster_slots[iteam, :state.roster_size[iteam]]
+            statline_rows = self.player_projections.player_stats_row
+            hitter_rows = [statline_rows[i] for i in player_ids if (self.player_is_pitcher[i] == False) and (statline_rows[i] >= 0)]
+            pitcher_rows = [statline_rows[i] for i in player_ids if (self.player_is_pitcher[i] == True) and (statline_rows[i] >= 0)]
+            roto_stats['batting_stats'] = self.player_projections.hitters_stats.iloc[hitter_rows][self.batter_stats]
+            roto_stats['pitching_stats'] = self.player_projections.pitchers_stats.iloc[pitcher_rows][self.pitcher_stats]
+            roto_stats['roster_spots'] = state.open_spots(iteam)
+            roto_stats['roster'] = {}
+            for player_id, slot in zip(player_ids, slots):
+                roto_stats['roster'].setdefault(state.slot_names[slot], []).append(self.player_names[player_id])
+            teams[iteam] = roto_stats
+        return teams
+
+    # Find Resulting Standings
+    def tabulate_roto(self, state):
+        # Determine which stats to include in roto scores
+        batting_stat_names = self.batter_stats[1:]
+        pitching_stat_names = self.pitcher_stats[1:]
+
+        # Team statlines from the running totals in state, with rate stats divided back out by AB or IP
+        roto_stats_batting = pd.DataFrame(state.batting_totals, columns = self.batter_stats)
+        roto_stats_pitching = pd.DataFrame(state.pitching_totals, columns = self.pitcher_stats)
+        for istats in batting_stat_names:
+            if istats in self.rate_stats:
+                roto_stats_batting[istats] = roto_stats_batting[istats]/roto_stats_batting['AB']
+        for istats in pitching_stat_names:
+            if istats in self.rate_stats:
+                roto_stats_pitching[istats] = roto_stats_pitching[istats]/roto_stats_pitching['IP']
+        roto_stats_batting = roto_stats_batting[batting_stat_names]
+        roto_stats_pitching = roto_stats_pitching[pitching_stat_names]
 
         # Combine pitching and hitting into single DataFrame.
         roto_team_stats = pd.concat([roto_stats_batting, roto_stats_pitching], axis=1, sort=False)
@@ -85,64 +185,46 @@ class Draft:
         for avg_stat in avg_stats:
             if avg_stat in roto_standings_desc:
                 roto_standings_ascn[avg_stat] = roto_standings_desc[avg_stat]
-        roto_standings = roto_standings_ascn.sum(axis=1).sort_values(ascending=False)
+        # Stable sort, so teams tied on score are listed by team (as in RotoScorer)
+        roto_standings = roto_standings_ascn.sum(axis=1).sort_values(ascending=False, kind='mergesort')
         roto_placement = roto_standings.index.get_loc(self.draft_position) + 1 # standings starting from 1 (not 0)
 
         return roto_team_stats, roto_stats_batting, roto_stats_pitching, roto_standings, roto_placement, roto_standings_ascn
 
-    def draft_into_teams(self, single_team, drafted_player, position = None, silent = False):
-        # Put the drafted_player with specified position into the roster of single_team.
+    def draft_into_teams(self, state, team_key, player_id, position = None, silent = False):
+        # Put the drafted player (player_id) with specified position into the roster of team_key.
 
-        name = drafted_player.iloc[0].PLAYER
-        first_name = name.split(' ')[0]
-        last_name = name.split(' ')[1]
+        roster_spots = state.open_spots(team_key)
         if position == None:
             #pdb.set_trace()
-            eligible_positions = drafted_player['Elig. Pos.'].values[0]
-            position = self.get_optimal_position(eligible_positions, single_team['roster_spots'])
-
-        # Different Stats Entries for Pitchers and Batters
-        #pdb.set_trace()
-        if drafted_player['Elig. Pos.'].str.contains('P').bool() == True:
-            idx_player = self.player_projections.pitchers_stats.Name.str.contains(first_name+' '+last_name)
-            statline = self.player_projections.pitchers_stats[idx_player][single_team['pitching_stats'].keys()]
-            single_team['pitching_stats'] = single_team['pitching_stats'].append(statline[0:1])
-
-        else:
-            idx_player = self.player_projections.hitters_stats.Name.str.contains(first_name+' '+last_name)
-            statline = self.player_projections.hitters_stats[idx_player][single_team['batting_stats'].keys()]
-            single_team['batting_stats'] = single_team['batting_stats'].append(statline[0:1])
+            eligible_positions = self.player_positions[player_id]
+            position = self.get_optimal_position(eligible_positions, roster_spots)
 
         # Subtract position spot from roster_spots
-        if single_team['roster_spots'][position] > 0:
-            single_team['roster_spots'][position] -= 1
+        if roster_spots.get(position, 0) > 0:
             recorded_position = position
-        elif (drafted_player['Elig. Pos.'].str.contains('F').bool() == True) and (single_team['roster_spots']['OF'] > 0):
-            single_team['roster_spots']['OF'] -= 1
+        elif (self.player_is_outfielder[player_id] == True) and (roster_spots['OF'] > 0):
             recorded_position = 'OF'
-        elif (drafted_player['Elig. Pos.'].str.contains('P').bool() == True) and (single_team['roster_spots']['P'] > 0):
-            single_team['roster_spots']['P'] -= 1
+        elif (self.player_is_pitcher[player_id] == True) and (roster_spots['P'] > 0):
             recorded_position = 'P'
-        elif (drafted_player['Elig. Pos.'].str.contains('P').bool() == False) and (single_team['roster_spots']['UTIL'] > 0):
-            single_team['roster_spots']['UTIL'] -= 1
+        elif (self.player_is_pitcher[player_id] == False) and (roster_spots['UTIL'] > 0):
             recorded_position = 'UTIL'
-        elif (single_team['roster_spots']['BN'] > 0):
-            single_team['roster_spots']['BN'] -= 1
+        elif (roster_spots['BN'] > 0):
             recorded_position = 'BN'
         else:
-            pdb.set_trace()
-        #print(str(single_team['roster_spots'][recorded_position])+' '+recorded_position+' left')
+            raise RuntimeError('Team '+str(team_key)+' has no open roster spot for '+self.player_names[player_id]+' ('+self.player_positions[player_id]+')')
+        #print(str(roster_spots[recorded_position]-1)+' '+recorded_position+' left')
 
         if silent == False:
-            print('Picked '+ drafted_player.iloc[0].PLAYER + '('+ drafted_player.iloc[0].EligiblePosition +')' +' for ' + recorded_position)
+            print('Picked '+ self.player_names[player_id] + '('+ self.player_positions[player_id] +')' +' for ' + recorded_position)
 
-        # Add Player to single_team Roster
-        if recorded_position in single_team['roster']:
-            single_team['roster'][recorded_position] = [single_team['roster'][recorded_position], drafted_player.PLAYER.values[0:1]]
+        # Add Player, and their statline, to the roster of team_key.  Different Stats Entries for Pitchers and Batters
+        if self.player_is_pitcher[player_id] == True:
+            state.add_player(team_key, player_id, self.slot_index[recorded_position], pitching_line = self.pitching_lines[player_id])
         else:
-            single_team['roster'][recorded_position] = drafted_player.PLAYER.values[0:1]
+            state.add_player(team_key, player_id, self.slot_index[recorded_position], batting_line = self.batting_lines[player_id])
 
-        return single_team
+        return state
 
     def get_optimal_position(self, positions_in, roster_spots):
         # In the event that player is eligible for more than one position, return the optimal position to fill
@@ -194,29 +276,28 @@ class Draft:
             elif (roster_spots['BN'] > 0):
                 return 'BN'
             else:
-                pdb.set_trace()
-                return 0
+                raise RuntimeError('No open roster spot for a '+positions_in+' player')
         else:
-            pdb.set_trace()
-            return 0
+            raise ValueError('Unknown eligible positions '+positions_in)
 
     # Do the entire draft one round at a time
-    def draft_all(self, naive_draft = False, search_depth = 1, shuffle_picks = False, silent = True):
+    def draft_all(self, naive_draft = False, search_depth = 1, shuffle_picks = False, autodraft_depth = 'end', silent = True):
         for iround in np.arange(self.number_rounds):
-            self.teams, self.remaining_ranked_players = self.draft_round(iround, self.teams, self.remaining_ranked_players, naive_draft = naive_draft, shuffle_picks = shuffle_picks, search_depth = search_depth,  silent = silent)
-        self.roto_team_stats,self.roto_stats_batting,self.roto_stats_pitching,self.roto_standings,self.roto_placement,self.roto_team_stats_rank = self.tabulate_roto(self.teams)
+            self.state = self.draft_round(iround, self.state, naive_draft = naive_draft, shuffle_picks = shuffle_picks, search_depth = search_depth, autodraft_depth = autodraft_depth, silent = silent)
+        self.teams = self.teams_from_state(self.state)
+        self.remaining_ranked_players = self.ranked_players[~self.state.picked]
+        self.roto_team_stats,self.roto_stats_batting,self.roto_stats_pitching,self.roto_standings,self.roto_placement,self.roto_team_stats_rank = self.tabulate_roto(self.state)
 
     # Draft each round one team at a time.  When reaching "draft_position", stop and to pseudo_drafts to figure out best choice.
-    def draft_round(self, round_key, teams, df, naive_draft = False, shuffle_picks = False, search_depth = 1, silent = True):
+    def draft_round(self, round_key, state, naive_draft = False, shuffle_picks = False, search_depth = 1, autodraft_depth = 'end', silent = True):
 
         # Reverse draft order every other round
         draft_order = np.arange(self.number_teams)
         if round_key % 2 == 1:
             draft_order = draft_order[::-1]
 
-        # Makde deep copies so that search for best position does not write to master
-        teams_copy = copy.deepcopy(teams)
-        df_copy = copy.deepcopy(df)
+        # Make a copy so that search for best position does not write to master
+        state_copy = state.copy()
 
         # Draft each round one team at a time
         for iteam in draft_order:
@@ -226,23 +307,33 @@ class Draft:
 
                 # When team is draft_position, search for best pick.
                 if iteam == self.draft_position:
-                    best_pick, best_position, best_placement, best_score = self.find_best_pick(iteam, teams_copy, df_copy, round_key, silent = silent, search_depth = search_depth)
-                    self.drafted_team[round_key] = df_copy.index[best_pick-1], df_copy.iloc[best_pick-1]['PLAYER'], best_position, best_placement, best_score
-                    teams_copy, df_copy = self.draft_next_best(iteam, teams_copy, df_copy, force_pick = best_pick, force_position = best_position, silent = silent)
+                    best_pick, best_position, best_placement, best_score = self.find_best_pick(iteam, state_copy, round_key, silent = silent, search_depth = search_depth, autodraft_depth = autodraft_depth)
+                    self.drafted_team[round_key] = self.ranked_players.index[best_pick-1], self.player_names[best_pick-1], best_position, best_placement, best_score
+                    state_copy = self.draft_next_best(iteam, state_copy, force_pick = best_pick, force_position = best_position, silent = silent)
                 else:
-                    teams_copy, df_copy = self.draft_next_best(iteam, teams_copy, df_copy, shuffle_picks = shuffle_picks, silent = silent)
+                    state_copy = self.draft_next_best(iteam, state_copy, shuffle_picks = shuffle_picks, silent = silent)
             else:
-                teams_copy, df_copy = self.draft_next_best(iteam, teams_copy, df_copy, shuffle_picks = shuffle_picks, silent = silent)
+                state_copy = self.draft_next_best(iteam, state_copy, shuffle_picks = shuffle_picks, silent = silent)
 
-        return teams_copy, df_copy
+        return state_copy
 
-    def draft_remaining(self, teams_copy, df_copy, draft_round,  autodraft_depth = 'end', shuffle_picks = False):
+    def draft_remaining(self, state, draft_round,  autodraft_depth = 'end', shuffle_picks = False):
         # Complete draft in Naive mode (i.e., next best picks at available positions)
 
+        # Finish the draft by picking the next best player in an open position
+        for iteam in self.remaining_draft_order(draft_round, autodraft_depth = autodraft_depth):
+            if state.roster_spots[iteam].sum() == 0:
+                raise RuntimeError('Team '+str(iteam)+' is on the clock with no open roster spots')
+            state = self.draft_next_best(iteam, state, shuffle_picks = shuffle_picks)
+
+        return state
+
+    def remaining_draft_order(self, draft_round, autodraft_depth = 'end'):
+        # Teams picking, in order, from the pick after draft_position in draft_round to the end of the draft (or autodraft_depth rounds)
+        remaining_draft_order = []
         if autodraft_depth == 'end':
             remaining_rounds = range(draft_round,self.number_rounds)
         else:
-            pdb.set_trace()
             remaining_rounds = range(draft_round,min(self.number_rounds, draft_round + autodraft_depth + 1))
         # Draft all remaining players
         for iround in remaining_rounds:
@@ -262,21 +353,16 @@ class Draft:
                     starting_position = self.draft_position + 1
                     #pdb.set_trace()
                 draft_order = draft_order[starting_position:]
+            remaining_draft_order.extend(draft_order)
 
-            # Finish the draft by picking the next best player in an open position
-            for iteam in draft_order:
-                if sum(teams_copy[iteam]['roster_spots'].values()) == 0:
-                    pdb.set_trace()
-                teams_copy, df_copy = self.draft_next_best(iteam, teams_copy, df_copy, shuffle_picks = shuffle_picks)
-
-        return teams_copy, df_copy
+        return remaining_draft_order
 
-    def find_best_pick(self, team_key, teams_copy, df_copy, round_key, search_depth = 1, autodraft_depth = 'end', silent = True):
-        # find_best_pick returns iloc, the index (of df) of the optimal pick, and the position being filled
+    def find_best_pick(self, team_key, state, round_key, search_depth = 1, autodraft_depth = 'end', silent = True):
+        # find_best_pick returns the player id (plus one) of the optimal pick, and the position being filled
 
         # Determine which roster_spots are still unfilled
-        unfilled_positions = [k for (k,v) in teams_copy[team_key]['roster_spots'].items() if v > 0]
-        idx_eligible, pos_eligible = self.idx_unfilled_positions(df_copy, unfilled_positions, search_depth = search_depth)
+        unfilled_positions = [k for (k,v) in state.open_spots(team_key).items() if v > 0]
+        idx_eligible, pos_eligible = self.idx_unfilled_positions(state, unfilled_positions, search_depth = search_depth)
 
         #################################
         # START OF LOOP TO FIND BEST PLAYER
@@ -286,65 +372,612 @@ class Draft:
         #pdb.set_trace()
         # Loop over eligible players, then finish the draft
         n_eligible_positions = len(idx_eligible)
-        for iposition, icounter in zip(idx_eligible, range(n_eligible_positions)):
+        pseudo_draft_args = [(state, team_key, iposition, pos_eligible[icounter], round_key, autodraft_depth) for iposition, icounter in zip(idx_eligible, range(n_eligible_positions))]
+        if self.use_worker_pool(len(pseudo_draft_args)):
+            pseudo_drafts = list(self.worker_pool().map(worker_pseudo_draft, pseudo_draft_args))
+        else:
+            pseudo_drafts = [self.pseudo_draft(*args) for args in pseudo_draft_args]
+
+        # Calculate the pseudo-standings of all pseudo-drafts at once
+        pseudo_scores, pseudo_placements = self.roto_scorer.standings(np.stack([totals[0] for totals in pseudo_drafts]), np.stack([totals[1] for totals in pseudo_drafts]))
 
-            # make a copy of teams to finish drafting
-            teams_loop = copy.deepcopy(teams_copy)
-            df_loop = copy.deepcopy(df_copy) #df_copy.copy()
+        for iposition, icounter in zip(idx_eligible, range(n_eligible_positions)):
 
-            # Get iplayer before dropping
-            iplayer = df_loop.iloc[iposition].PLAYER
+            # Get iplayer
+            iplayer = self.player_names[iposition]
 
             # Prevent picking someone you could easily get in later round
-            pick_ok, pick_number = self.sigmoid_probability_fn(iposition,teams_copy,team_key,df_copy,round_key)
+            pick_ok, pick_number = self.sigmoid_probability_fn(iposition,state,team_key,round_key)
             #pdb.set_trace()
 
-            # Draft looping through idx_eligible
-            df_loop,drafted_player=df_loop.drop(df_loop.iloc[iposition:iposition+1].index),df_loop.iloc[iposition:iposition+1]
-            position = pos_eligible[icounter]
-
-            teams_loop[team_key] = self.draft_into_teams(teams_loop[team_key], drafted_player, position, silent = True)
-
-            # LOOP OVER WHOLE REST OF THE DRAFT HERE...
-            teams_loop, df_loop = self.draft_remaining(teams_loop, df_loop, round_key, autodraft_depth = autodraft_depth)
-
-            # Calculate the best pseudo-standings
-            #pseudo_team_stats, pseudo_batting_stats, pseudo_pitching_stats, pseudo_standings, pseudo_placement = self.tabulate_roto(teams_loop)
-            roto_stats = self.tabulate_roto(teams_loop)
-            # [0] = roto_team_stats
-            # [1] = roto_stats_batting
-            # [2] = roto_stats_pitching
-            # [3] = roto_standings
-            # [4] = roto_placement
-            # [5] = roto_standings_ascn
+            pseudo_placement = pseudo_placements[icounter, self.draft_position]
+            pseudo_score = pseudo_scores[icounter, self.draft_position]
 
             # Store the result.
             if (pick_ok == True) or (n_eligible_positions < 2):
-                player_based_drafted_teams[iplayer] = teams_loop[self.draft_position]['roster']
-                player_based_drafted_outcomes[iplayer] = [roto_stats[4],roto_stats[3][self.draft_position]] #[roto_stats[4],roto_stats[3][roto_stats[4]-1]]
+                player_based_drafted_teams[iplayer] = pseudo_drafts[icounter]
+                player_based_drafted_outcomes[iplayer] = [pseudo_placement,pseudo_score]
                 if silent == False:
-                    print('Stored Result for Pick '+str(icounter)+' ['+str(pick_number)+'/'+str(drafted_player.index[0])+'] '+iplayer+' '+pos_eligible[icounter]+' whose placement/score is '+str(roto_stats[4])+'/'+str(roto_stats[3][self.draft_position]))
+                    print('Stored Result for Pick '+str(icounter)+' ['+str(pick_number)+'/'+str(self.ranked_players.index[iposition])+'] '+iplayer+' '+pos_eligible[icounter]+' whose placement/score is '+str(pseudo_placement)+'/'+str(pseudo_score))
                     #pdb.set_trace()
             else:
                 if silent == False:
-                    print('Not Storing Result for Pick '+str(icounter)+' ['+str(pick_number)+'/'+str(drafted_player.index[0])+'] '+iplayer+' '+pos_eligible[icounter])
+                    print('Not Storing Result for Pick '+str(icounter)+' ['+str(pick_number)+'/'+str(self.ranked_players.index[iposition])+'] '+iplayer+' '+pos_eligible[icounter])
 
             #pdb.set_trace()
 
         # Pick best of the bunch
         #pdb.set_trace()
-        best_pick_plus_one, best_position, best_player, best_placement, best_score = self.decide_best_choice(df_copy, player_based_drafted_teams, player_based_drafted_outcomes,unfilled_positions, idx_eligible, pos_eligible, silent=silent)
+        best_pick_plus_one, best_position, best_player, best_placement, best_score = self.decide_best_choice(player_based_drafted_teams, player_based_drafted_outcomes,unfilled_positions, idx_eligible, pos_eligible, silent=silent)
         return best_pick_plus_one, best_position, best_placement, best_score
         # END OF LOOP TO FIND BEST PLAYER
         #################################
 
-    def idx_unfilled_positions(self,df_copy, unfilled_positions0, search_depth = 1):
+    def find_best_picks(self, state, first_pick, number_picks = None, search_depth = 1, autodraft_depth = 'end', advance = 'best', silent = True):
+        # Best pick, as find_best_pick would choose it, of every team on the clock from first_pick (from 0, the number of picks made
+        # on state) for number_picks picks (default number_teams, i.e., one per draft position), without a Draft per team.  The
+        # board is advanced one pick at a time on one state, by each team's best pick (advance = 'best') or its greedy pick
+        # ('greedy'), and candidates' rollouts are shared between teams (shared_rollout).  Returns a DataFrame with a row per pick.
+        number_picks = self.number_teams if number_picks is None else number_picks
+        last_pick = min(first_pick + number_picks, self.number_rounds * self.number_teams)
+        state = state.copy()
+        shared_picks = set(range(first_pick + 1, last_pick + 1))
+        best_picks = []
+        for pick_number in range(first_pick, last_pick):
+            round_key, team_key = self.turn(pick_number)
+            end_pick = self.number_rounds * self.number_teams if autodraft_depth == 'end' else min(self.number_rounds, round_key + autodraft_depth + 1) * self.number_teams
+
+            # As in find_best_pick: candidates, their rollouts, and the best of those that pass sigmoid_probability_fn
+            unfilled_positions = [k for (k,v) in state.open_spots(team_key).items() if v > 0]
+            idx_eligible, pos_eligible = self.idx_unfilled_positions(state, unfilled_positions, search_depth = search_depth)
+            pseudo_drafts = [self.shared_rollout(state, team_key, player_id, position, pick_number, end_pick, shared_picks) for player_id, position in zip(idx_eligible, pos_eligible)]
+            pseudo_scores, pseudo_placements = self.roto_scorer.standings(np.stack([totals[0] for totals in pseudo_drafts]), np.stack([totals[1] for totals in pseudo_drafts]))
+            player_based_drafted_outcomes = {}
+            for icounter, player_id in enumerate(idx_eligible):
+                pick_ok, pick_number_sigmoid = self.sigmoid_probability_fn(player_id, state, team_key, round_key)
+                if (pick_ok == True) or (len(idx_eligible) < 2):
+                    player_based_drafted_outcomes[self.player_names[player_id]] = [pseudo_placements[icounter, team_key], pseudo_scores[icounter, team_key]]
+            best_pick_plus_one, best_position, best_player, best_placement, best_score = self.decide_best_choice(None, player_based_drafted_outcomes, unfilled_positions, idx_eligible, pos_eligible, silent=True)
+            best_picks.append([pick_number + 1, round_key + 1, team_key + 1, self.player_names[best_pick_plus_one - 1], best_position, best_placement, best_score, len(idx_eligible)])
+            if silent == False:
+                print('Pick '+str(pick_number + 1)+', Team '+str(team_key + 1)+': '+self.player_names[best_pick_plus_one - 1]+' '+best_position+' ('+str(best_placement)+'/'+str(best_score)+')')
+
+            if advance == 'best':
+                state = self.draft_next_best(team_key, state, force_pick = best_pick_plus_one, force_position = best_position)
+            else:
+                state = self.draft_next_best(team_key, state)
+
+        return pd.DataFrame(best_picks, columns = ['Pick', 'Round', 'Team', 'PLAYER', 'Position', 'Placement', 'Score', 'Candidates'])
+
+    def shared_rollout(self, state, team_key, player_id, position, pick_number, end_pick, shared_picks):
+        # pseudo_draft for the team making pick_number, with the rest of the draft (greedy, to end_pick) cached by the pick it starts
+        # from rather than by draft_position, so any team whose candidate leads to the same board shares it.  The rest of the draft
+        # from each of shared_picks the rollout passes is cached as well, as the tail of its picks.
+        marker = state.checkpoint()
+        state = self.draft_into_teams(state, team_key, player_id, position, silent = True)
+        rollout_key = RolloutCache.key(state, 'pick', pick_number + 1, end_pick)
+        rollout = self.rollout_cache.get(rollout_key) if self.rollout_cache is not None else None
+        if rollout is None:
+            rollout_marker = state.checkpoint()
+            tail_keys = []
+            for ipick in range(pick_number + 1, end_pick):
+                if (self.rollout_cache is not None) and (ipick > pick_number + 1) and (ipick in shared_picks):
+                    tail_keys.append((ipick - pick_number - 1, RolloutCache.key(state, 'pick', ipick, end_pick)))
+                state = self.draft_next_best(self.turn(ipick)[1], state)
+            pseudo_totals = state.batting_totals.copy(), state.pitching_totals.copy()
+            if self.rollout_cache is not None:
+                rollout = rollout_picks(state, rollout_marker)
+                self.rollout_cache.put(rollout_key, rollout)
+                for offset, tail_key in tail_keys:
+                    self.rollout_cache.put(tail_key, tuple(picks[offset:] for picks in rollout))
+        elif end_pick == self.number_rounds * self.number_teams:
+            pseudo_totals = self.totals_after_rollout(state, rollout)
+        else:
+            state = self.replay_rollout(state, rollout)
+        if end_pick < self.number_rounds * self.number_teams:
+            pseudo_totals = self.replacement_totals(state)
+        state.rollback(marker)
+        return pseudo_totals
+
+    def rollout_span(self, round_key, autodraft_depth = 'end'):
+        # First pick (from 0) and end of the picks draft_remaining makes after draft_position's pick in round_key
+        pick_number = round_key * self.number_teams + (self.draft_position if round_key % 2 == 0 else self.number_teams - 1 - self.draft_position)
+        end_pick = self.number_rounds * self.number_teams if autodraft_depth == 'end' else min(self.number_rounds, round_key + autodraft_depth + 1) * self.number_teams
+        # (as ints: the cache keys by repr, and round_key may be a numpy integer, e.g., from draft_all)
+        return int(pick_number) + 1, int(end_pick)
+
+    def turn(self, pick_number):
+        # Round and team (from 0) making pick_number (from 0), in snake order
+        round_key = pick_number // self.number_teams
+        team_key = pick_number % self.number_teams
+        if round_key % 2 == 1:
+            team_key = self.number_teams - 1 - team_key
+        return round_key, team_key
+
+    def find_best_pick_anytime(self, team_key, state, round_key, time_budget = 20., autodraft_depth = 'end', max_search_depth = 4, silent = True):
+        # Like find_best_pick, but searches for time_budget seconds and returns the best pick found so far, plus the number
+        # of rollouts behind it.  First the best player at each unfilled position is drafted and the draft finished (always,
+        # even past the budget), then the next best at each position (search_depth 2, 3, ... up to max_search_depth), then,
+        # with the time left, drafts are finished with shuffled picks, one candidate after the other.  Candidates are ranked
+        # by their average placement and score over their rollouts.
+        deadline = time.perf_counter() + time_budget
+        unfilled_positions = [k for (k,v) in state.open_spots(team_key).items() if v > 0]
+
+        candidate_ids = []
+        candidate_positions = []
+        candidate_placements = []
+        candidate_scores = []
+
+        def rollout(icandidate, shuffle_picks = False):
+            batting_totals, pitching_totals = self.pseudo_draft(state, team_key, candidate_ids[icandidate], candidate_positions[icandidate], round_key, autodraft_depth = autodraft_depth, shuffle_picks = shuffle_picks)
+            pseudo_scores, pseudo_placements = self.roto_scorer.standings(batting_totals, pitching_totals)
+            candidate_placements[icandidate].append(pseudo_placements[self.draft_position])
+            candidate_scores[icandidate].append(pseudo_scores[self.draft_position])
+
+        # Widen the search one search_depth at a time
+        for search_depth in range(1, max_search_depth + 1):
+            if (search_depth > 1) and (time.perf_counter() > deadline):
+                break
+            idx_eligible, pos_eligible = self.idx_unfilled_positions(state, unfilled_positions, search_depth = search_depth)
+            for player_id, position in zip(idx_eligible, pos_eligible):
+                if player_id in candidate_ids:
+                    continue
+                if (search_depth > 1) and (time.perf_counter() > deadline):
+                    break
+                candidate_ids.append(player_id)
+                candidate_positions.append(position)
+                candidate_placements.append([])
+                candidate_scores.append([])
+                rollout(len(candidate_ids) - 1)
+
+        # Then shuffled rollouts of every candidate, in turn, until time runs out
+        icandidate = 0
+        while time.perf_counter() < deadline:
+            rollout(icandidate, shuffle_picks = True)
+            icandidate = (icandidate + 1) % len(candidate_ids)
+
+        # Prevent picking someone you could easily get in later round
+        player_based_drafted_outcomes = {}
+        idx_eligible = []
+        pos_eligible = []
+        for icandidate in range(len(candidate_ids)):
+            pick_ok, pick_number = self.sigmoid_probability_fn(candidate_ids[icandidate], state, team_key, round_key)
+            if (pick_ok == True) or (len(candidate_ids) < 2):
+                player_based_drafted_outcomes[icandidate] = [np.mean(candidate_placements[icandidate]), np.mean(candidate_scores[icandidate])]
+                idx_eligible.append(candidate_ids[icandidate])
+                pos_eligible.append(candidate_positions[icandidate])
+            if silent == False:
+                print(('Stored' if pick_ok else 'Not Storing')+' Result for Pick '+str(icandidate)+' '+self.player_names[candidate_ids[icandidate]]+' '+candidate_positions[icandidate]+' whose average placement/score over '+str(len(candidate_scores[icandidate]))+' rollouts is '+str(np.mean(candidate_placements[icandidate]))+'/'+str(np.mean(candidate_scores[icandidate])))
+
+        best_pick_plus_one, best_position, best_player, best_placement, best_score = self.decide_best_choice(None, player_based_drafted_outcomes, unfilled_positions, idx_eligible, pos_eligible, silent=silent)
+        number_rollouts = len(candidate_scores[candidate_ids.index(best_pick_plus_one - 1)])
+        if silent == False:
+            print(str(sum(len(i) for i in candidate_scores))+' rollouts of '+str(len(candidate_ids))+' candidates in '+str(round(time_budget - (deadline - time.perf_counter()), 1))+'s')
+        return best_pick_plus_one, best_position, best_placement, best_score, number_rollouts
+
+    def pseudo_draft(self, state, team_key, player_id, position, round_key, autodraft_depth = 'end', shuffle_picks = False, pick_values = None, evaluate = None):
+        # Draft player_id into position for team_key, then finish the draft, and return the final team totals
+        # (batting_totals, pitching_totals).  Picks are made in place on state and rolled back afterwards, so
+        # pseudo-drafts share the state of the draft so far and only apply (and undo) their own picks.
+        # With pick_values, the other teams finish the draft with draft_remaining_sampled.  With autodraft_depth
+        # rounds (rather than 'end'), the draft stops there and its final totals are estimated (replacement_totals).
+        # With evaluate, returns evaluate(state) of the finished draft instead of the totals.
+        marker = state.checkpoint()
+        state = self.draft_into_teams(state, team_key, player_id, position, silent = True)
+
+        # LOOP OVER WHOLE REST OF THE DRAFT HERE... unless it was done before from this state (random rollouts are never cached).
+        # Rollouts are cached by the picks they span, as in shared_rollout, so the two share them.
+        use_cache = (self.rollout_cache is not None) and (shuffle_picks == False) and (pick_values is None)
+        start_pick, end_pick = self.rollout_span(round_key, autodraft_depth)
+        rollout_key = RolloutCache.key(state, 'pick', start_pick, end_pick)
+        rollout = self.rollout_cache.get(rollout_key) if use_cache else None
+        if rollout is None:
+            rollout_marker = state.checkpoint()
+            tail_keys = []
+            if pick_values is not None:
+                state = self.draft_remaining_sampled(state, round_key, pick_values, autodraft_depth = autodraft_depth)
+            elif use_cache:
+                # draft_remaining one pick at a time, to cache the rest of the draft from each pick after a later turn of
+                # draft_position too: later searches (its next turns, lookahead plies, draft_remaining_cached) start there
+                for ipick in range(start_pick, end_pick):
+                    if (ipick > start_pick) and (self.turn(ipick - 1)[1] == self.draft_position):
+                        tail_keys.append((ipick - start_pick, RolloutCache.key(state, 'pick', ipick, end_pick)))
+                    state = self.draft_next_best(self.turn(ipick)[1], state)
+            else:
+                state = self.draft_remaining(state, round_key, autodraft_depth = autodraft_depth, shuffle_picks = shuffle_picks)
+            pseudo_totals = state.batting_totals.copy(), state.pitching_totals.copy()
+            if use_cache:
+                rollout = rollout_picks(state, rollout_marker)
+                self.rollout_cache.put(rollout_key, rollout)
+                for offset, tail_key in tail_keys:
+                    self.rollout_cache.put(tail_key, tuple(picks[offset:] for picks in rollout))
+        elif (autodraft_depth == 'end') and (evaluate is None):
+            pseudo_totals = self.totals_after_rollout(state, rollout)
+        else:
+            state = self.replay_rollout(state, rollout)
+        if evaluate is not None:
+            pseudo_totals = evaluate(state)
+        elif autodraft_depth != 'end':
+            pseudo_totals = self.replacement_totals(state)
+        state.rollback(marker)
+        return pseudo_totals
+
+    def replacement_totals(self, state):
+        # Final team totals (batting_totals, pitching_totals) estimated for a draft that is not over: each team's totals plus, for
+        # each of its open roster spots, the average statline of the players expected to fill that kind of spot.  Players still
+        # available go, in rank order, to the open spots of the whole league, from the scarcest positions to the most flexible
+        # (replacement_slots), so that e.g. the catchers left are not also counted as UTIL.
+        batting_production, pitching_production = self.replacement_production(state, self.batting_lines, self.pitching_lines)
+        return state.batting_totals + batting_production, state.pitching_totals + pitching_production
+
+    def replacement_production(self, state, batting_lines, pitching_lines):
+        # Expected batting and pitching production of the open roster spots of every team (see replacement_totals), from
+        # batting_lines and pitching_lines (player, stat), or a stack of them (..., player, stat), e.g., one per model
+        batting_totals = np.zeros(batting_lines.shape[:-2] + (self.number_teams, batting_lines.shape[-1]))
+        pitching_totals = np.zeros(pitching_lines.shape[:-2] + (self.number_teams, pitching_lines.shape[-1]))
+        available = ~state.picked
+        for slot in self.replacement_slots:
+            open_spots = state.roster_spots[:, self.slot_index[slot]]
+            if open_spots.sum() == 0:
+                continue
+            idx_slot = np.arange(len(self.player_names)) if slot == 'BN' else self.position_players[self.position_index[slot]]
+            idx_slot = idx_slot[available[idx_slot]][:open_spots.sum()]
+            if len(idx_slot) == 0:
+                continue
+            available[idx_slot] = False
+            is_pitcher = self.player_is_pitcher[idx_slot].astype(bool)[:, None]
+            batting_totals += open_spots[:, None] * np.where(is_pitcher, 0., batting_lines[..., idx_slot, :]).mean(axis=-2)[..., None, :]
+            pitching_totals += open_spots[:, None] * np.where(is_pitcher, pitching_lines[..., idx_slot, :], 0.).mean(axis=-2)[..., None, :]
+        return batting_totals, pitching_totals
+
+    def model_totals(self, state, autodraft_depth = 'end'):
+        # Team totals of state under every model of a ProjectionEnsemble, and then the blend, each (model + 1, team, stat); with
+        # autodraft_depth rounds (a draft that is not over), plus the replacement production of the open roster spots
+        player_ids = state.roster_ids
+        drafted = np.arange(player_ids.shape[1])[None, :] < state.roster_size[:, None]
+        is_pitcher = self.player_is_pitcher[player_ids].astype(bool)
+        batting_totals = np.where((drafted & ~is_pitcher)[..., None], self.model_batting_lines[:, player_ids], 0.).sum(axis=-2)
+        pitching_totals = np.where((drafted & is_pitcher)[..., None], self.model_pitching_lines[:, player_ids], 0.).sum(axis=-2)
+        if autodraft_depth != 'end':
+            batting_production, pitching_production = self.replacement_production(state, self.model_batting_lines, self.model_pitching_lines)
+            batting_totals += batting_production
+            pitching_totals += pitching_production
+        return batting_totals, pitching_totals
+
+    def sample_pick_values(self, number_rollouts):
+        # Draft positions of every player in number_rollouts random drafts, (number_rollouts, number_players), drawn from
+        # a normal distribution with the FantasyPros average pick (AVE) and standard deviation (STD) of each player
+        rng = np.random if self.rng is None else self.rng
+        return self.player_ave_pick + self.player_std_pick * rng.standard_normal((number_rollouts, len(self.player_names)))
+
+    def draft_remaining_sampled(self, state, draft_round, pick_values, autodraft_depth = 'end'):
+        # draft_remaining, except that other teams take the player with the lowest pick_values (e.g., a sampled draft position,
+        # see sample_pick_values) at their open positions instead of the highest ranked.  draft_position drafts by rank, as in
+        # draft_remaining; with pick_values in rank order the two are the same.
+        position_players = self.position_players_by_value(pick_values)
+        position_pointers = np.zeros(len(position_players), dtype=int)
+
+        for iteam in self.remaining_draft_order(draft_round, autodraft_depth = autodraft_depth):
+            if iteam == self.draft_position:
+                state = self.draft_next_best(iteam, state)
+            else:
+                state = self.draft_next_sampled(iteam, state, pick_values, position_players, position_pointers)
+
+        return state
+
+    def position_players_by_value(self, pick_values):
+        # position_players of each position in pick_values order, for draft_next_sampled
+        return [idx_position[np.argsort(pick_values[idx_position], kind='stable')] for idx_position in self.position_players]
+
+    def draft_next_sampled(self, team_key, state, pick_values, position_players, position_pointers):
+        # Pick of team_key when teams take the player with the lowest pick_values at their open positions.  position_players
+        # are from position_players_by_value(pick_values), and position_pointers (one per position) only move forward, past drafted players.
+
+        # Open positions, without the bench until the final round, as in draft_next_best
+        teams_minus_bench = state.open_spots(team_key)
+        if 'BN' in teams_minus_bench:
+            if sum(teams_minus_bench.values()) > 1:
+                del teams_minus_bench['BN']
+        unfilled_positions = self.expand_unfilled_positions([k for (k,v) in teams_minus_bench.items() if v > 0])
+
+        # Next player at each open position, in pick_values order, and take the earliest of them
+        player_id = -1
+        for iunfilled in unfilled_positions:
+            iposition = self.position_index[iunfilled]
+            idx_position = position_players[iposition]
+            jdx = position_pointers[iposition]
+            while (jdx < len(idx_position)) and state.picked[idx_position[jdx]]:
+                jdx+=1
+            position_pointers[iposition] = jdx
+            if (jdx < len(idx_position)) and ((player_id < 0) or (pick_values[idx_position[jdx]] < pick_values[player_id])):
+                player_id = idx_position[jdx]
+        if player_id < 0:
+            raise RuntimeError('No player left for team '+str(team_key)+' at its open slots '+str({k:v for (k,v) in teams_minus_bench.items() if v > 0}))
+        return self.draft_into_teams(state, team_key, player_id, silent = True)
+
+    def predict_boards(self, state, pick_number, team_key, number_samples = 32, number_boards = 8):
+        # Most likely boards when team_key is next on the clock, at or after pick_number (the number of picks made on state): the
+        # picks of the teams before it are played out once by rank (as find_best_pick expects them) and number_samples times with
+        # sampled draft positions (sample_pick_values), and the boards that come up most often (ties in the order they first came
+        # up) are kept.  Returns up to number_boards [frequency, pick number of team_key's turn, state], most likely first.
+        number_picks_total = self.number_rounds * self.number_teams
+        next_pick = pick_number
+        while (next_pick < number_picks_total) and (self.turn(next_pick)[1] != team_key):
+            next_pick += 1
+        if next_pick >= number_picks_total:
+            return []
+
+        boards = {}
+        sampled_pick_values = self.sample_pick_values(number_samples) if number_samples > 0 else []
+        for isample in range(number_samples + 1):
+            board = state.copy()
+            if isample == 0:
+                for ipick in range(pick_number, next_pick):
+                    board = self.draft_next_best(self.turn(ipick)[1], board)
+            else:
+                pick_values = sampled_pick_values[isample - 1]
+                position_players = self.position_players_by_value(pick_values)
+                position_pointers = np.zeros(len(position_players), dtype=int)
+                for ipick in range(pick_number, next_pick):
+                    board = self.draft_next_sampled(self.turn(ipick)[1], board, pick_values, position_players, position_pointers)
+            board.undo_log = []
+            boards.setdefault(board.board_key(), [0, next_pick, board])[0] += 1
+
+        boards = sorted(boards.values(), key = lambda board: -board[0])[:number_boards]
+        for board in boards:
+            board[0] = board[0] / (number_samples + 1)
+        return boards
+
+    def evaluate_candidates_monte_carlo(self, team_key, state, round_key, idx_eligible, pos_eligible, number_rollouts = 64, batch_size = 8, z_drop = 2., autodraft_depth = 'end'):
+        # Placement and score of draft_position after drafting each candidate (idx_eligible at pos_eligible) for team_key, averaged over
+        # up to number_rollouts drafts finished with sampled picks (draft_remaining_sampled).  Rollouts are run batch_size at a time for
+        # every candidate still in the race, with the same sampled draft positions for all candidates (so that their differences are not
+        # noise in the samples).  After two batches, a candidate is dropped once its mean placement is worse than the best candidate's
+        # by more than z_drop standard errors of both.  Returns a DataFrame with a row per candidate.
+        number_candidates = len(idx_eligible)
+        placements = [[] for i in range(number_candidates)]
+        scores = [[] for i in range(number_candidates)]
+        in_race = np.ones(number_candidates, dtype=bool)
+
+        while True:
+            number_done = np.array([len(i) for i in placements])
+            to_run = np.flatnonzero(in_race & (number_done < number_rollouts))
+            if len(to_run) == 0:
+                break
+            sampled_pick_values = self.sample_pick_values(batch_size)
+            for icandidate in to_run:
+                pseudo_drafts = [self.pseudo_draft(state, team_key, idx_eligible[icandidate], pos_eligible[icandidate], round_key, autodraft_depth = autodraft_depth, pick_values = pick_values) for pick_values in sampled_pick_values[:number_rollouts - number_done[icandidate]]]
+                pseudo_scores, pseudo_placements = self.roto_scorer.standings(np.stack([totals[0] for totals in pseudo_drafts]), np.stack([totals[1] for totals in pseudo_drafts]))
+                placements[icandidate].extend(pseudo_placements[:, self.draft_position])
+                scores[icandidate].extend(pseudo_scores[:, self.draft_position])
+
+            # Drop candidates clearly worse than the best so far
+            if min(len(placements[i]) for i in to_run) >= 2 * batch_size:
+                mean_placement = np.array([np.mean(i) for i in placements])
+                se_placement = np.array([standard_error(i) for i in placements])
+                ibest = np.flatnonzero(in_race)[np.argmin(mean_placement[in_race])]
+                in_race &= ~(mean_placement - z_drop * se_placement > mean_placement[ibest] + z_drop * se_placement[ibest])
+
+        return pd.DataFrame({'PLAYER':self.player_names[idx_eligible], 'Position':pos_eligible, 'Rollouts':[len(i) for i in placements],
+                             'Placement':[np.mean(i) for i in placements], 'Placement SE':[standard_error(i) for i in placements],
+                             'Score':[np.mean(i) for i in scores], 'Score SE':[standard_error(i) for i in scores], 'In Race':in_race},
+                            index = idx_eligible)
+
+    def find_best_pick_monte_carlo(self, team_key, state, round_key, search_depth = 1, number_rollouts = 64, batch_size = 8, autodraft_depth = 'end', silent = True):
+        # find_best_pick with evaluate_candidates_monte_carlo instead of one rollout per candidate: the best pick is the one with the best
+        # mean placement (then score) among candidates still in the race.  Also returns the DataFrame of evaluate_candidates_monte_carlo.
+        unfilled_positions = [k for (k,v) in state.open_spots(team_key).items() if v > 0]
+        idx_eligible, pos_eligible = self.idx_unfilled_positions(state, unfilled_positions, search_depth = search_depth)
+        candidates = self.evaluate_candidates_monte_carlo(team_key, state, round_key, idx_eligible, pos_eligible, number_rollouts = number_rollouts, batch_size = batch_size, autodraft_depth = autodraft_depth)
+
+        # Prevent picking someone you could easily get in later round
+        candidates['Pick OK'] = [self.sigmoid_probability_fn(player_id, state, team_key, round_key)[0] or (len(idx_eligible) < 2) for player_id in idx_eligible]
+        if silent == False:
+            print(candidates)
+        finalists = candidates[candidates['In Race'] & candidates['Pick OK']]
+        if len(finalists) == 0:
+            finalists = candidates[candidates['In Race']]
+        player_based_drafted_outcomes = {i:[placement, score] for i, placement, score in zip(range(len(finalists)), finalists['Placement'], finalists['Score'])}
+        best_pick_plus_one, best_position, best_player, best_placement, best_score = self.decide_best_choice(None, player_based_drafted_outcomes, unfilled_positions, finalists.index.values, finalists['Position'].tolist(), silent=silent)
+        return best_pick_plus_one, best_position, best_placement, best_score, candidates
+
+    def find_best_pick_lookahead(self, team_key, state, round_key, plies = 2, search_depth = 1, number_samples = 0, autodraft_depth = 'end', silent = True):
+        # Expectimax over the next plies picks of team_key (draft_position), rather than assuming, as find_best_pick does, that its
+        # later picks are greedy.  At each of its picks (a max node) the candidates are those of idx_unfilled_positions, searched in
+        # order of average draft position (AVE).  The other teams' picks up to its next turn are a chance node: greedy picks
+        # (draft_next_best) with number_samples = 0, else picks by each of number_samples sampled draft positions (sample_pick_values,
+        # the same samples below every candidate).  After the last ply the draft is finished greedily with pseudo_draft (cached).
+        # An outcome is worth -placement + score / (highest possible score + 1), i.e., placement first and then score, as in
+        # decide_best_choice.  Values are bounded, so a chance node stops once even the best outcomes for its remaining samples
+        # could not beat the best sibling found so far (Star1 pruning); ordering by AVE makes good siblings come first.
+        # Returns the best pick (plus one), its position, its expected placement and score, and the number of rollouts.
+        max_score = len(self.roto_scorer.category_names) * self.number_teams
+        value = lambda outcome: -outcome[0] + outcome[1] / (max_score + 1.)
+        best_value = value((1., max_score))
+        sampled_values = [None] if number_samples == 0 else list(self.sample_pick_values(number_samples))
+        sampled_players = [None if pick_values is None else self.position_players_by_value(pick_values) for pick_values in sampled_values]
+        search = {'rollouts':0, 'pruned':0}
+
+        def candidates(state):
+            unfilled_positions = [k for (k,v) in state.open_spots(team_key).items() if v > 0]
+            idx_eligible, pos_eligible = self.idx_unfilled_positions(state, unfilled_positions, search_depth = search_depth)
+            return [(idx_eligible[i], pos_eligible[i]) for i in np.argsort(self.player_ave_pick[idx_eligible], kind='stable')]
+
+        def max_node(state, round_key, plies_left, candidate_picks):
+            # Best (expected placement and score, player id, position) of the picks of team_key in round_key
+            best = None
+            for player_id, position in candidate_picks:
+                if (plies_left == 1) or (round_key + 1 == self.number_rounds):
+                    batting_totals, pitching_totals = self.pseudo_draft(state, team_key, player_id, position, round_key, autodraft_depth = autodraft_depth)
+                    pseudo_scores, pseudo_placements = self.roto_scorer.standings(batting_totals, pitching_totals)
+                    outcome = np.array([pseudo_placements[team_key], pseudo_scores[team_key]], dtype=float)
+                    search['rollouts'] += 1
+                else:
+                    marker = state.checkpoint()
+                    state = self.draft_into_teams(state, team_key, player_id, position, silent = True)
+                    outcome = chance_node(state, round_key, plies_left - 1, -np.inf if best is None else value(best[0]))
+                    state.rollback(marker)
+                if (outcome is not None) and ((best is None) or (value(outcome) > value(best[0]))):
+                    best = (outcome, player_id, position)
+            return best
+
+        def chance_node(state, round_key, plies_left, alpha):
+            # Expected outcome of the other teams' picks up to the next turn of team_key, or None if it cannot beat alpha
+            other_teams = self.remaining_draft_order(round_key)
+            other_teams = other_teams[:other_teams.index(team_key)]
+            total = np.zeros(2)
+            for isample, (pick_values, position_players) in enumerate(zip(sampled_values, sampled_players)):
+                marker = state.checkpoint()
+                position_pointers = np.zeros(len(self.position_players), dtype=int)
+                for iteam in other_teams:
+                    if pick_values is None:
+                        state = self.draft_next_best(iteam, state)
+                    else:
+                        state = self.draft_next_sampled(iteam, state, pick_values, position_players, position_pointers)
+                total += max_node(state, round_key + 1, plies_left, candidates(state))[0]
+                state.rollback(marker)
+                if (isample < len(sampled_values) - 1) and ((value(total) + (len(sampled_values) - isample - 1) * best_value) / len(sampled_values) <= alpha):
+                    search['pruned'] += 1
+                    return None
+            return total / len(sampled_values)
+
+        # Prevent picking someone you could easily get in later round
+        root_picks = candidates(state)
+        pick_ok = [self.sigmoid_probability_fn(player_id, state, team_key, round_key)[0] for player_id, position in root_picks]
+        if sum(pick_ok) > 0:
+            root_picks = [root_pick for root_pick, ok in zip(root_picks, pick_ok) if ok]
+
+        outcome, best_pick, best_position = max_node(state, round_key, plies, root_picks)
+        if silent == False:
+            print('Best Pick over '+str(plies)+' picks is '+self.player_names[best_pick]+' '+best_position+', expected placement/score '+str(outcome[0])+'/'+str(outcome[1])+
+                  ' ('+str(search['rollouts'])+' rollouts, '+str(search['pruned'])+' branches pruned)')
+        return best_pick + 1, best_position, outcome[0], outcome[1], search['rollouts']
+
+    def find_best_pick_ensemble(self, team_key, state, round_key, search_depth = 1, autodraft_depth = 'end', silent = True):
+        # find_best_pick under every model of a ProjectionEnsemble at once.  Picks do not depend on projections, so each candidate's
+        # draft is finished once (pseudo_draft, cached as usual) and its rosters are scored under each model and the blend
+        # (model_totals).  The best pick is the best by the blend (consensus), as decide_best_choice ranks them.  Also returns a
+        # DataFrame with the placement and score of every candidate under each model and the consensus.
+        unfilled_positions = [k for (k,v) in state.open_spots(team_key).items() if v > 0]
+        idx_eligible, pos_eligible = self.idx_unfilled_positions(state, unfilled_positions, search_depth = search_depth)
+        pseudo_drafts = [self.pseudo_draft(state, team_key, player_id, position, round_key, autodraft_depth = autodraft_depth, evaluate = lambda state: self.model_totals(state, autodraft_depth = autodraft_depth))
+                         for player_id, position in zip(idx_eligible, pos_eligible)]
+
+        # Standings of every candidate under every model, (candidate, model + 1, team)
+        pseudo_scores, pseudo_placements = self.roto_scorer.standings(np.stack([totals[0] for totals in pseudo_drafts]), np.stack([totals[1] for totals in pseudo_drafts]))
+        candidates = pd.DataFrame({'PLAYER':self.player_names[idx_eligible], 'Position':pos_eligible}, index = idx_eligible)
+        for imodel, model in enumerate(self.model_names + ['Consensus']):
+            candidates['Placement '+model] = pseudo_placements[:, imodel, team_key]
+            candidates['Score '+model] = pseudo_scores[:, imodel, team_key]
+        candidates['Mean Placement'] = pseudo_placements[:, :-1, team_key].mean(axis=1)
+
+        # Prevent picking someone you could easily get in later round
+        candidates['Pick OK'] = [self.sigmoid_probability_fn(player_id, state, team_key, round_key)[0] or (len(idx_eligible) < 2) for player_id in idx_eligible]
+        if silent == False:
+            print(candidates)
+        finalists = candidates[candidates['Pick OK']] if candidates['Pick OK'].any() else candidates
+        player_based_drafted_outcomes = {i:[placement, score] for i, placement, score in zip(range(len(finalists)), finalists['Placement Consensus'], finalists['Score Consensus'])}
+        best_pick_plus_one, best_position, best_player, best_placement, best_score = self.decide_best_choice(None, player_based_drafted_outcomes, unfilled_positions, finalists.index.values, finalists['Position'].tolist(), silent=silent)
+        return best_pick_plus_one, best_position, best_placement, best_score, candidates
+
+    def draft_remaining_cached(self, state, round_key, autodraft_depth = 'end'):
+        # draft_remaining (without shuffle_picks), replaying the picks of a cached rollout from the same state if there is one
+        rollout_key = RolloutCache.key(state, 'pick', *self.rollout_span(round_key, autodraft_depth))
+        rollout = self.rollout_cache.get(rollout_key) if self.rollout_cache is not None else None
+        if rollout is None:
+            return self.draft_remaining(state, round_key, autodraft_depth = autodraft_depth)
+        return self.replay_rollout(state, rollout)
+
+    def replay_rollout(self, state, rollout):
+        # Add the picks of a cached rollout to state
+        for team_key, player_id, slot in zip(*rollout):
+            if self.player_is_pitcher[player_id] == True:
+                state.add_player(team_key, player_id, slot, pitching_line = self.pitching_lines[player_id])
+            else:
+                state.add_player(team_key, player_id, slot, batting_line = self.batting_lines[player_id])
+        return state
+
+    def totals_after_rollout(self, state, rollout):
+        # Team totals of state plus the statlines of the picks of rollout.  np.add.at adds row by row, in pick order,
+        # so the totals are identical to those of drafting the rollout.
+        team_keys, player_ids, slots = rollout
+        is_pitcher = self.player_is_pitcher[player_ids]
+        batting_totals = state.batting_totals.copy()
+        pitching_totals = state.pitching_totals.copy()
+        np.add.at(batting_totals, team_keys[~is_pitcher], self.batting_lines[player_ids[~is_pitcher]])
+        np.add.at(pitching_totals, team_keys[is_pitcher], self.pitching_lines[player_ids[is_pitcher]])
+        return batting_totals, pitching_totals
+
+    def use_worker_pool(self, number_tasks):
+        # The pool only pays off with a CPU for each worker and at least two pseudo-drafts per worker (the tasks carry a
+        # DraftState both ways); otherwise they run serially, with the same results
+        return (self.n_workers > 1) and (self.n_workers <= (os.cpu_count() or 1)) and (number_tasks >= 2 * self.n_workers)
+
+    def worker_pool(self):
+        # Process pool for pseudo-drafts, started on first use.  Each worker receives a copy of this Draft (with
+        # its projections) once, when it starts; tasks then only carry a DraftState.
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers = self.n_workers, initializer = init_worker, initargs = (self,))
+        return self.pool
+
+    def close_pool(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __getstate__(self):
+        # The pool cannot be pickled (e.g., when sending this Draft to the workers), and workers need no live session.
+        # Methods timed by a DraftProfiler (instance attributes over the class's) are left out, and workers start with an
+        # empty rollout cache of the same size rather than a copy of this one.
+        draft_dict = {name:value for name, value in self.__dict__.items() if not (callable(value) and hasattr(type(self), name))}
+        draft_dict['pool'] = None
+        draft_dict['live_session'] = None
+        if self.rollout_cache is not None:
+            draft_dict['rollout_cache'] = RolloutCache(self.rollout_cache.max_bytes / 1024**2)
+        if 'standings' in self.roto_scorer.__dict__:
+            draft_dict['roto_scorer'] = copy.copy(self.roto_scorer)
+            del draft_dict['roto_scorer'].__dict__['standings']
+        return draft_dict
+
+    def idx_unfilled_positions(self, state, unfilled_positions0, search_depth = 1):
         # Identify positions that still need filling, taking into account that UTIL
         # can be filled by any batting position and so should be saved for last,
-        # and that SP/RP should be filled before P.
+        # and that SP/RP should be filled before P.  Returns player ids.
         idx_eligible = []
         pos_eligible = []
+        unfilled_positions = self.expand_unfilled_positions(unfilled_positions0)
 
+        # Find index of best player at each remaining position
+        found_eligible = set()
+        for iunfilled in unfilled_positions:
+            iposition = self.position_index[iunfilled]
+            idx_position = self.position_players[iposition]
+
+            # Move the pointer of this position past players drafted since it was last used
+            jdx = state.position_pointers[iposition]
+            while (jdx < len(idx_position)) and state.picked[idx_position[jdx]]:
+                jdx+=1
+            state.position_pointers[iposition] = jdx
+
+            filled_position_counter = search_depth
+            while filled_position_counter > 0:
+                if jdx == len(idx_position):
+                    raise RuntimeError('No '+iunfilled+' left to search (search_depth '+str(search_depth)+')')
+                if state.picked[idx_position[jdx]] or (idx_position[jdx] in found_eligible):
+                    jdx+=1
+                else:
+                    idx_eligible.append(idx_position[jdx])
+                    pos_eligible.append(iunfilled)
+                    found_eligible.add(idx_position[jdx])
+                    filled_position_counter -= 1
+
+        # Get rid of doubles (1B and OF is particularly prone)
+        idx_eligible, idx_unique = np.unique(idx_eligible, return_index = True)
+        pos_eligible = [pos_eligible[i] for i in idx_unique]
+        #pdb.set_trace()
+        return idx_eligible, pos_eligible
+
+    def expand_unfilled_positions(self, unfilled_positions0):
         # First check unfilled_positions0 for 'BN' OR ('UTIL' AND 'P'); if true
         # unfilled_positions is all self.fielders + self.pitchers, minus 'UTIL' and 'P'
         if ('BN' in unfilled_positions0) or (('UTIL' in unfilled_positions0) and ('P' in unfilled_positions0)):
@@ -361,36 +994,9 @@ class Draft:
                 unfilled_positions.remove('P')
         else:
             unfilled_positions = unfilled_positions0
+        return unfilled_positions
 
-        # Find index of best player at each remaining position
-        filled_position_counter = np.ones(len(unfilled_positions)) * search_depth
-        for iunfilled, icounter in zip(unfilled_positions, range(len(filled_position_counter))):
-            if iunfilled == 'OF':
-                punfilled = 'F'
-            else:
-                punfilled = iunfilled
-            if iunfilled == 'C':
-                idx_position = [i for i, val in enumerate(df_copy['Elig. Pos.'].str.contains('C') & ~df_copy['Elig. Pos.'].str.contains('CF')) if val]
-            else:
-                idx_position = [i for i, val in enumerate(df_copy['Elig. Pos.'].str.contains(punfilled)) if val]
-            jdx = 0
-            while filled_position_counter[icounter] > 0:
-                if jdx == len(idx_position):
-                    pdb.set_trace()
-                if idx_position[jdx] in idx_eligible:
-                    jdx+=1
-                else:
-                    idx_eligible.append(idx_position[jdx])
-                    pos_eligible.append(iunfilled)
-                    filled_position_counter[icounter] -=  1
-
-        # Get rid of doubles (1B and OF is particularly prone)
-        idx_eligible, idx_unique = np.unique(idx_eligible, return_index = True)
-        pos_eligible = [pos_eligible[i] for i in idx_unique]
-        #pdb.set_trace()
-        return idx_eligible, pos_eligible
-
-    def decide_best_choice(self, df_copy, player_based_drafted_teams, player_based_drafted_outcomes, unfilled_positions, idx_eligible, pos_eligible, rank_type = 'placement', silent = True):
+    def decide_best_choice(self, player_based_drafted_teams, player_based_drafted_outcomes, unfilled_positions, idx_eligible, pos_eligible, rank_type = 'placement', silent = True):
         # End of Loop
         ranked_positions = ['C','1B','2B','OF','SS','3B','SP','RP','UTIL','P','BN']
 
@@ -403,7 +1009,7 @@ class Draft:
         n_max_ranking = sum(relative_ranking == np.min(relative_ranking))
 
         if n_max_ranking == 1:
-            best_player = df_copy.iloc[idx_eligible[relative_ranking_rank[0]]:idx_eligible[relative_ranking_rank[0]]+1]
+            best_player = self.ranked_players.iloc[idx_eligible[relative_ranking_rank[0]]:idx_eligible[relative_ranking_rank[0]]+1]
             best_pick_plus_one = idx_eligible[relative_ranking_rank[0]] + 1 # Avoid best_pick = 0
             best_position = pos_eligible[relative_ranking_rank[0]]
             best_placement = relative_ranking[relative_ranking_rank[0]]
@@ -411,7 +1017,7 @@ class Draft:
         else:
             # Of those tied for top rank, figure out had a highest score
             best_player_scores = [relative_scores[relative_ranking_rank[i]] for i in range(n_max_ranking)]
-            best_players = [df_copy.iloc[idx_eligible[relative_ranking_rank[i]]] for i in range(n_max_ranking)]
+            best_players = [self.ranked_players.iloc[idx_eligible[relative_ranking_rank[i]]] for i in range(n_max_ranking)]
             best_picks_plus_one = [idx_eligible[relative_ranking_rank[i]] + 1 for i in range(n_max_ranking)]
             best_player_positions = [pos_eligible[relative_ranking_rank[i]] for i in range(n_max_ranking)]
             best_player_placements = [relative_ranking[relative_ranking_rank[i]] for i in range(n_max_ranking)]
@@ -420,7 +1026,7 @@ class Draft:
             # If still tied, take the optimal position (i.e., SS over OF)
             n_max_scores = sum(best_player_scores == np.max(best_player_scores))
             if n_max_scores == 1:
-                best_player = df_copy.iloc[best_picks_plus_one[idx_best_player_scores[0]]-1:best_picks_plus_one[idx_best_player_scores[0]]-1+1]
+                best_player = self.ranked_players.iloc[best_picks_plus_one[idx_best_player_scores[0]]-1:best_picks_plus_one[idx_best_player_scores[0]]-1+1]
                 best_pick_plus_one = best_picks_plus_one[idx_best_player_scores[0]]
                 best_position = best_player_positions[idx_best_player_scores[0]]
                 best_placement = best_player_placements[idx_best_player_scores[0]]
@@ -430,7 +1036,7 @@ class Draft:
                 for irank in range(len(ranked_positions)):
                     if any(ranked_positions[irank] in s for s in best_player_positions):
                         idx_best = best_player_positions.index(ranked_positions[irank])
-                        best_player = df_copy.iloc[best_picks_plus_one[idx_best_player_scores[idx_best]]-1:best_picks_plus_one[idx_best_player_scores[idx_best]]-1+1]
+                        best_player = self.ranked_players.iloc[best_picks_plus_one[idx_best_player_scores[idx_best]]-1:best_picks_plus_one[idx_best_player_scores[idx_best]]-1+1]
                         best_pick_plus_one = best_picks_plus_one[idx_best_player_scores[idx_best]]
                         best_position = ranked_positions[irank]
                         best_placement = best_player_placements[idx_best_player_scores[idx_best]]
@@ -440,128 +1046,111 @@ class Draft:
         return best_pick_plus_one, best_position, best_player, best_placement, best_score
 
     # Strategy is to take the best possible player, even if that means putting them in UTIL or BN (maybe BN should reconsidered...)
-    def draft_next_best(self, team_key, teams, df, force_pick = False, force_position = False, shuffle_picks = False, search_depth = 1, silent = True):
+    def draft_next_best(self, team_key, state, force_pick = False, force_position = False, shuffle_picks = False, search_depth = 1, silent = True):
 
         if (force_pick == False):
 
             # Get rid of the bench until the final rounds.
-            teams_minus_bench = teams[team_key]['roster_spots'].copy()
+            teams_minus_bench = state.open_spots(team_key)
             if 'BN' in teams_minus_bench:
                 if sum(teams_minus_bench.values()) > 1:
                     del teams_minus_bench['BN']
 
             # Find unfilled positions and their indices
             unfilled_positions = [k for (k,v) in teams_minus_bench.items() if v > 0]
-            idx_eligible, pos_eligible = self.idx_unfilled_positions(df, unfilled_positions, search_depth = search_depth)
+            idx_eligible, pos_eligible = self.idx_unfilled_positions(state, unfilled_positions, search_depth = search_depth)
             #pdb.set_trace()
 
             idx_shuffle = np.arange(len(idx_eligible))
             if shuffle_picks == True:
-                np.random.shuffle(idx_shuffle)
+                (np.random if self.rng is None else self.rng).shuffle(idx_shuffle)
                 idx_eligible = idx_eligible[idx_shuffle]
                 pos_eligible = [pos_eligible[x] for x in idx_shuffle]
 
             # Draft next in list by making indices of unfilled_positions and taking first (or shuffle)
             try:
-                df,drafted_player=df.drop(df.iloc[idx_eligible[0]:idx_eligible[0]+1].index),df.iloc[idx_eligible[0]:idx_eligible[0]+1]
-            except:
-                pdb.set_trace()
+                player_id = idx_eligible[0]
+            except IndexError:
+                raise RuntimeError('No player left for team '+str(team_key)+' at its open positions '+str(unfilled_positions))
 
-            teams[team_key] = self.draft_into_teams(teams[team_key], drafted_player, silent = True)
+            state = self.draft_into_teams(state, team_key, player_id, silent = True)
             if silent == False:
-                print('Team '+ str(team_key+1) +' Drafting '+drafted_player.iloc[0].PLAYER)
+                print('Team '+ str(team_key+1) +' Drafting '+self.player_names[player_id])
 
         else:
 
-            pick = force_pick - 1
-            df,drafted_player=df.drop(df.iloc[pick:pick+1].index),df.iloc[pick:pick+1]
-            teams[team_key] = self.draft_into_teams(teams[team_key], drafted_player, position = force_position, silent = True)
+            player_id = force_pick - 1
+            state = self.draft_into_teams(state, team_key, player_id, position = force_position, silent = True)
             if silent == False:
-                print('Team '+ str(team_key+1) +' picking '+drafted_player.iloc[0].PLAYER+' for '+force_position)
+                print('Team '+ str(team_key+1) +' picking '+self.player_names[player_id]+' for '+force_position)
 
-        return teams, df
+        return state
 
-    def draft_from_list_and_find_best_pick(self, search_depth = 1, autodraft_depth = 'end', path_list = 'Draft_Pick_Spreadsheets/', draft_pick_file = 'TestPicks.xlsx', shuffle_picks = False, silent = False):
-        # Read in Excel Sheet and draft picks before moving on to finishing script
+    def draft_from_list_and_find_best_pick(self, search_depth = 1, autodraft_depth = 'end', path_list = 'Draft_Pick_Spreadsheets/', draft_pick_file = 'TestPicks.xlsx', shuffle_picks = False, time_budget = None, ensemble = False, silent = False):
+        # Read in Excel Sheet and draft picks before moving on to finishing script.  Picks are kept in a LiveDraft
+        # session between calls, so when draft_pick_file continues the picks of the last call only the new ones are drafted.
+        # With time_budget (seconds per pick), search_depth is ignored and the search is find_best_pick_anytime.  With ensemble (this
+        # Draft made with a ProjectionEnsemble), rollouts are scored under every model at once (find_best_pick_ensemble).
 
         # Read current draft results
-        xls = pd.ExcelFile(os.path.join(path_list,draft_pick_file))
-        complete_player_list = pd.read_excel(xls, skiprows =0, names = ['Pick','PLAYER','EligiblePosition'], index_col = 'Pick')
-        # Remove players from list who don't have numbers (i.e., NANs)
-        player_list = complete_player_list.loc[complete_player_list.index.dropna().values].sort_index()
-
-        # Replace non-latin characters so lists agree
-        for irename in range(len(player_list)):
-            player_list.iloc[irename]['PLAYER'] = standardize_name(player_list.iloc[irename]['PLAYER'])
-
-        teams_copy = copy.deepcopy(self.teams)
-        df_copy = copy.deepcopy(self.remaining_ranked_players)
-
-        for iround in np.arange(self.number_rounds):
-
-            # Reverse draft order every other round
-            draft_order = np.arange(self.number_teams)
-            iter_team = 1
-            if iround % 2 == 1:
-                draft_order = draft_order[::-1]
-                iter_team = -1
-
-            for iteam in draft_order:
-                #print('Drafting Team '+str(iteam+1))
-                # Find player matching df_copy by iloc
-                idx_match = [i for i, x in enumerate(df_copy['PLAYER'].str.match(player_list.PLAYER.iloc[0])) if x]
-                player_list,drafted_player=player_list.drop(player_list.iloc[0:1].index),player_list.iloc[0]
-                #pdb.set_trace()
-                best_position = self.get_optimal_position(drafted_player['EligiblePosition'], teams_copy[iteam]['roster_spots'])
-                teams_copy, df_copy = self.draft_next_best(iteam, teams_copy, df_copy, force_pick = idx_match[0] + 1, force_position = best_position)
-                if len(player_list) == 0:
-                    break
-            if len(player_list) == 0:
-                break
+        player_list = read_pick_list(os.path.join(path_list,draft_pick_file))
+        player_names = player_list.PLAYER.tolist()
 
-        #pdb.set_trace()
-        # Find best pick
-        if silent == False:
-            print('Finding Best Pick For Team '+str(iteam+1+iter_team))
+        # Start over unless the picks so far are the first picks of the list
+        if (self.live_session is None) or (self.live_session.pick_names != player_names[:self.live_session.number_picks]):
+            self.live_session = LiveDraft(self)
+        self.live_session.add_picks(player_names[self.live_session.number_picks:], player_list.EligiblePosition.tolist()[self.live_session.number_picks:])
 
-        best_pick, best_position, best_placement, best_score = self.find_best_pick(iteam+iter_team,copy.deepcopy(teams_copy),copy.deepcopy(df_copy),iround,silent=False,autodraft_depth = autodraft_depth, search_depth = search_depth)
-        best_player_this_round = df_copy.iloc[best_pick-1].PLAYER
-        teams_copy, df_copy = self.draft_next_best(iteam+iter_team, teams_copy, df_copy, force_pick = best_pick, force_position = best_position)
+        if shuffle_picks == False:
+            return self.live_session.recommend(search_depth = search_depth, autodraft_depth = autodraft_depth, time_budget = time_budget, ensemble = ensemble, silent = silent)
 
-        # Finish the draft and Rank
-        teams_copy, df_copy = self.draft_remaining(teams_copy, df_copy, iround, autodraft_depth = autodraft_depth, shuffle_picks = shuffle_picks)
+        # Find best pick, then finish the draft with shuffled picks and Rank
+        round_key, team_key = self.live_session.on_the_clock()
+        if time_budget is None:
+            best_pick, best_position, best_placement, best_score = self.find_best_pick(team_key,self.live_session.state.copy(),round_key,silent=silent,autodraft_depth = autodraft_depth, search_depth = search_depth)
+        else:
+            best_pick, best_position, best_placement, best_score, number_rollouts = self.find_best_pick_anytime(team_key,self.live_session.state.copy(),round_key,time_budget = time_budget,autodraft_depth = autodraft_depth,silent=silent)
+        best_player_this_round = self.player_names[best_pick-1]
+        state = self.draft_next_best(team_key, self.live_session.state.copy(), force_pick = best_pick, force_position = best_position)
+        state = self.draft_remaining(state, round_key, autodraft_depth = autodraft_depth, shuffle_picks = shuffle_picks)
 
         # Calculate the best pseudo-standings
-        roto_stats = self.tabulate_roto(teams_copy)
+        roto_stats = self.tabulate_roto(state)
         if silent == False:
             print('Best Pick is ' + best_player_this_round+ ' putting you in ' + str(roto_stats[4]) + ' place')
 
         # Return Player Name and Projected Roto Stats
         return best_player_this_round, roto_stats
 
+    def find_player(self, player_name, state):
+        # Player id of the highest ranked player still available in state named player_name (e.g., from a pick list)
+        player_name = standardize_name(player_name)
+        for player_id in self.player_ids_by_name.get(player_name, []):
+            if state.picked[player_id] == False:
+                return player_id
+        # Otherwise fall back on ranked names that start with player_name
+        idx_match = np.flatnonzero(pd.Series(self.player_names).map(standardize_name).str.match(player_name).values & ~state.picked)
+        return idx_match[0]
+
     def filter_injured_list(self, path_list = "Injured_List_Spreadsheets/", injured_list_file = 'Injuries2020.xlsx'):
         # Read in Excel Sheet of Players to Exclude.  Should this be moved to Projection?  Yes.
 
 
-        xls = pd.ExcelFile(os.path.join(path_list,injured_list_file))
+        #xls = pd.ExcelFile(os.path.join(path_list,injured_list_file))
         #pdb.set_trace()
         #injured_list = pd.read_excel(xls, skiprows =0, names = ['PLAYER','Elig. Pos.'])#, index_col = 'PLAYER')
-        injured_list = pd.read_excel(xls, skiprows =0)#, index_col = 'PLAYER')
-        #xls = pd.ExcelFile(os.path.join(path_list,draft_pick_file))
-        #complete_player_list = pd.read_excel(xls, skiprows =0, names = ['Pick','PLAYER','EligiblePosition'], index_col = 'Pick')
+        # Parsed once per process (see spreadsheet_cache_2020), rather than for every Draft of a Simulation
+        injured_list = spreadsheet_cache_2020.read_spreadsheet(os.path.join(path_list,injured_list_file), skiprows =0)#, index_col = 'PLAYER')
         player_list = injured_list.loc[injured_list.index.dropna().values]
 
-        for irename in range(len(player_list)):
-            # Standardize name
-            player_list.iloc[irename]['PLAYER'] = standardize_name(player_list.iloc[irename]['PLAYER'])
-
-            # Find matching player
-            idx_match = [i for i, x in enumerate(self.remaining_ranked_players['PLAYER'].str.match(player_list.PLAYER.iloc[irename])) if x]
-            # Remove from self.remaining_ranked_players
-            self.remaining_ranked_players = self.remaining_ranked_players.drop(index=self.remaining_ranked_players.index[idx_match])
+        # Standardize names on both sides (accents, case, ' Jr.', and the trailing spaces of e.g. the 2021 rankings), and
+        # remove every injured player from self.remaining_ranked_players at once
+        injured_names = set(name_keys(name)[0] for name in player_list['PLAYER'])
+        ranked_names = self.remaining_ranked_players['PLAYER'].map(lambda name: name_keys(name)[0])
+        self.remaining_ranked_players = self.remaining_ranked_players[~ranked_names.isin(injured_names).values]
 
 
-    def sigmoid_probability_fn(self,iposition,teams_in,team_key_in,df_in,round_number):
+    def sigmoid_probability_fn(self,player_id,state,team_key_in,round_number):
         pick_ok = True
 
         if round_number % 2 == 1:
@@ -573,7 +1162,7 @@ class Draft:
         # 5 and this is the 2nd pick, probability is low, but if is 15th pick, then
         # probability is near 1.
         # 1÷(1+EXP(−(pick_number−avg_pick_number)))
-        possible_pick = df_in.iloc[iposition:iposition+1]
+        possible_pick = self.ranked_players.iloc[player_id:player_id+1]
         if 'AVE' in possible_pick:
             sigmoid_probability = (1/(1+np.exp(-(pick_number-possible_pick['AVE'])/np.sqrt(pick_number))))
             sigmoid_probability = sigmoid_probability.values[0]
@@ -587,6 +1176,47 @@ class Draft:
 
         return pick_ok, pick_number
 
+# Each worker process of Draft.worker_pool keeps its own copy of the Draft
+worker_draft = None
+
+def init_worker(draft):
+    global worker_draft
+    worker_draft = draft
+
+def worker_pseudo_draft(args):
+    return worker_draft.pseudo_draft(*args)
+
+def rollout_picks(state, marker):
+    # Picks made on state since checkpoint returned marker, as arrays (teams, player ids, slots) in pick order
+    picks = state.undo_log[marker[0]:]
+    return (np.array([pick[0] for pick in picks], dtype=np.int16),
+            np.array([pick[1] for pick in picks], dtype=state.roster_ids.dtype),
+            np.array([pick[2] for pick in picks], dtype=np.int16))
+
+def standard_error(values):
+    # Standard error of the mean of values (NaN for fewer than two)
+    if len(values) < 2:
+        return np.nan
+    return np.std(values, ddof = 1) / np.sqrt(len(values))
+
 def standardize_name(name_in):
     name_out = ((((((name_in.replace('ñ','n')).replace('í','i')).replace('é','e')).replace('á','a')).replace('ú','u')).replace('ó','o')).split(' Jr.')
     return name_out[0]
+
+def eligibility_bits(positions, position_bits):
+    # Bitmask of the positions (e.g., '2B/SS/LF') a player is eligible for; LF/CF/RF are OF
+    bits = 0
+    for position in positions.split('/'):
+        if position in ['LF','CF','RF']:
+            position = 'OF'
+        if position in ['C','1B','2B','3B','SS','OF','SP','RP']:
+            bits |= position_bits[position]
+    return bits
+
+def weighted_statlines(statlines, stat_names, weight, rate_stats):
+    # Copy of statlines (player x stat_names) with rate stats multiplied by weight (AB or IP), so that team rate stats are sums / sum(weight).  NaN count as 0.
+    weighted = statlines.copy()
+    for istat, stat_name in enumerate(stat_names):
+        if stat_name in rate_stats:
+            weighted[:, istat] = statlines[:, istat] * statlines[:, stat_names.index(weight)]
+    return np.nan_to_num(weighted)
@@ -0,0 +1,360 @@
+import re
+import json
+import time
+import asyncio
+import argparse
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from GameDayFunctions.fangraphs_projection_2020 import Projection
+from GameDayFunctions.draft_2020 import Draft
+from GameDayFunctions.live_draft_2020 import LiveDraft
+
+class DraftServer:
+    ''' Long-running local recommendation server with an HTTP/JSON API.
+
+    Projections are loaded once, when the server starts, and live drafts are
+    kept in memory (a LiveDraft each), so neither is rebuilt between
+    recommendations.  Recording a pick is applied right away on the event
+    loop; searches (best pick, projected standings) run in a pool of
+    n_workers processes, which get the projections once when they start and
+    keep a warm Draft (with its rollout cache) per model and draft position,
+    so recording picks stays responsive while a search is running.
+
+    Endpoints (bodies and responses are JSON):
+        GET    /health                         models, drafts and running searches
+        POST   /drafts                         new draft: {"draft_id", "model", "draft_position", and other Draft settings, e.g., "number_teams"}
+        GET    /drafts/<draft_id>              picks so far and who is on the clock
+        DELETE /drafts/<draft_id>
+        POST   /drafts/<draft_id>/picks        record picks: {"player", "position"} or {"players":[...], "positions":[...]}; position is optional
+        POST   /drafts/<draft_id>/best_pick    best pick for the team on the clock: {"time_budget":seconds} (Draft.find_best_pick_anytime)
+                                               or {"search_depth":n} (Draft.find_best_pick), and "autodraft_depth"
+        GET    /drafts/<draft_id>/standings    projected roto standings (the rest of the draft autodrafted); ?finish=false for the rosters so far
+
+    Run with python -m GameDayFunctions.draft_server_2020 --models ZiPS,Steamer,TheBat --workers 2
+
+    Parameters
+    ----------
+    models : list [optional]
+        Projection models to load, e.g., ['ZiPS', 'Steamer', 'TheBat']; drafts choose one of them
+
+    year : int [optional]
+        Year of the projections
+
+    n_workers : int [optional]
+        Search processes; 0 searches in a thread of the server process instead
+
+    compact : bool [optional]
+        Load compact Projections (see Projection.compact), e.g., to fit more workers in memory
+
+    host : str [optional]
+        Address to listen on (default, local connections only)
+
+    port : int [optional]
+        Port to listen on
+
+    Returns
+    -------
+    Instance of DraftServer, which contains:
+        Objects:
+        - self.projections : Projection of each model
+        - self.sessions : LiveDraft of each draft_id
+        - self.running_searches
+
+        Functions:
+        - run
+        - serve
+        - handle_connection
+        - dispatch
+        - close
+
+    '''
+
+    def __init__(self, models = ['ZiPS'], year = 2020, n_workers = 1, compact = False, host = '127.0.0.1', port = 8020):
+        self.host = host
+        self.port = port
+        self.projections = {model:Projection(model = model, year = year, compact = compact) for model in models}
+        self.sessions = {}
+        self.session_settings = {} # Model and Draft settings of each draft_id, to build the same Draft in the workers
+        self.running_searches = 0
+        if n_workers > 0:
+            self.pool = ProcessPoolExecutor(max_workers = n_workers, initializer = init_server_worker, initargs = (self.projections,))
+        else:
+            self.pool = ThreadPoolExecutor(max_workers = 1, initializer = init_server_worker, initargs = (self.projections,))
+        self.routes = [('GET', r'/health', self.health),
+                       ('POST', r'/drafts', self.create_draft),
+                       ('GET', r'/drafts/([^/]+)', self.draft_summary),
+                       ('DELETE', r'/drafts/([^/]+)', self.delete_draft),
+                       ('POST', r'/drafts/([^/]+)/picks', self.record_picks),
+                       ('POST', r'/drafts/([^/]+)/best_pick', self.best_pick),
+                       ('GET', r'/drafts/([^/]+)/standings', self.standings)]
+
+    def run(self):
+        ''' Serve until interrupted (Ctrl-C).'''
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    async def serve(self, started = None):
+        ''' Serve forever on the event loop; started (an asyncio.Event or threading.Event) is set once listening.'''
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        print('GameDay draft server on http://'+self.host+':'+str(self.port)+' with '+', '.join(self.projections), flush = True)
+        if started is not None:
+            started.set()
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures = True)
+
+    async def handle_connection(self, reader, writer):
+        ''' Read one HTTP request, answer it with JSON and close the connection.'''
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, version = request_line.decode('latin-1').split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in [b'\r\n', b'\n', b'']:
+                    break
+                name, separator, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            status, response = await self.dispatch(method, target, body)
+        except (ValueError, asyncio.IncompleteReadError) as error:
+            status, response = 400, {'error':'Bad request: '+str(error)}
+
+        payload = json.dumps(response, default = json_default).encode()
+        writer.write(('HTTP/1.1 '+str(status)+' '+status_reasons.get(status, '')+'\r\nContent-Type: application/json\r\n'
+                      'Content-Length: '+str(len(payload))+'\r\nConnection: close\r\n\r\n').encode('latin-1') + payload)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body):
+        ''' Status and JSON response of a request, from the handler of the first route matching its method and path.'''
+        url = urlsplit(target)
+        query = {k:v[-1] for k,v in parse_qs(url.query).items()}
+        arguments = json.loads(body) if len(body) > 0 else {}
+        path_found = False
+        for route_method, route_path, handler in self.routes:
+            match = re.fullmatch(route_path, url.path.rstrip('/'))
+            if match is None:
+                continue
+            path_found = True
+            if route_method == method:
+                try:
+                    return await handler(*match.groups(), query = query, arguments = arguments)
+                except ServerError as error:
+                    return error.status, {'error':str(error)}
+                except Exception as error:
+                    return 500, {'error':type(error).__name__+': '+str(error)}
+        if path_found:
+            return 405, {'error':method+' not allowed on '+url.path}
+        return 404, {'error':'No endpoint '+url.path}
+
+    def session(self, draft_id):
+        if draft_id not in self.sessions:
+            raise ServerError(404, 'No draft '+draft_id)
+        return self.sessions[draft_id]
+
+    def summary(self, draft_id):
+        # Picks so far, and the round, team and pick number on the clock (from 1; None once the draft is over)
+        live = self.sessions[draft_id]
+        draft_over = live.number_picks >= live.draft.number_rounds * live.draft.number_teams
+        round_key, team_key = live.on_the_clock() if not draft_over else (None, None)
+        return {'draft_id':draft_id, 'model':self.session_settings[draft_id][0], 'draft_position':live.draft.draft_position + 1,
+                'number_picks':live.number_picks, 'picks':live.pick_names,
+                'on_the_clock':None if draft_over else {'pick':live.number_picks + 1, 'round':round_key + 1, 'team':team_key + 1}}
+
+    async def health(self, query, arguments):
+        return 200, {'models':list(self.projections), 'drafts':list(self.sessions), 'running_searches':self.running_searches}
+
+    async def create_draft(self, query, arguments):
+        draft_id = str(arguments.pop('draft_id', len(self.sessions) + 1))
+        model = arguments.pop('model', list(self.projections)[0])
+        if model not in self.projections:
+            raise ServerError(400, 'Model '+model+' is not loaded; choose from '+', '.join(self.projections))
+        if draft_id in self.sessions:
+            raise ServerError(409, 'Draft '+draft_id+' exists')
+        # Building a Draft takes a moment (e.g., reading the injured list), so it is done off the event loop too
+        draft = await asyncio.get_running_loop().run_in_executor(None, lambda: Draft(self.projections[model], **arguments))
+        self.sessions[draft_id] = LiveDraft(draft)
+        self.session_settings[draft_id] = (model, arguments)
+        return 201, self.summary(draft_id)
+
+    async def draft_summary(self, draft_id, query, arguments):
+        self.session(draft_id)
+        return 200, self.summary(draft_id)
+
+    async def delete_draft(self, draft_id, query, arguments):
+        self.session(draft_id)
+        del self.sessions[draft_id]
+        del self.session_settings[draft_id]
+        return 200, {'deleted':draft_id}
+
+    async def record_picks(self, draft_id, query, arguments):
+        live = self.session(draft_id)
+        player_names = arguments.get('players', [arguments['player']] if 'player' in arguments else [])
+        positions = arguments.get('positions', [arguments.get('position')] * len(player_names))
+        if (not isinstance(player_names, list)) or (not isinstance(positions, list)) or (len(positions) != len(player_names)):
+            raise ServerError(400, 'Give "player" (and "position"), or lists "players" (and "positions") of the same length')
+        if len(player_names) == 0:
+            raise ServerError(400, 'No player given')
+        if live.number_picks + len(player_names) > live.draft.number_rounds * live.draft.number_teams:
+            raise ServerError(409, 'The draft is over')
+
+        # All the picks or none: each is checked before it is applied, and the session is put back as it was if any fails
+        saved = (live.state.copy(), live.number_picks, list(live.pick_names), dict(live.pondered), live.predicted_boards)
+        try:
+            for player_name, position in zip(player_names, positions):
+                check_pick(live, player_name, position)
+                live.add_picks([player_name], [position])
+        except Exception as error:
+            live.state, live.number_picks, live.pick_names, live.pondered, live.predicted_boards = saved
+            if isinstance(error, ServerError):
+                raise
+            raise ServerError(400, 'Picks not recorded: '+type(error).__name__+': '+str(error))
+        return 200, self.summary(draft_id)
+
+    async def best_pick(self, draft_id, query, arguments):
+        live = self.session(draft_id)
+        if live.number_picks >= live.draft.number_rounds * live.draft.number_teams:
+            raise ServerError(409, 'The draft is over')
+        settings = dict(arguments)
+        settings.update(query)
+        time_budget = float(settings['time_budget']) if settings.get('time_budget') is not None else None
+        search_depth = int(settings.get('search_depth', 1))
+        autodraft_depth = settings.get('autodraft_depth', 'end')
+        autodraft_depth = int(autodraft_depth) if autodraft_depth != 'end' else 'end'
+
+        # The search runs on a copy of the state, so picks recorded meanwhile do not change it; its answer is for pick_number
+        model, draft_settings = self.session_settings[draft_id]
+        pick_number = live.number_picks
+        self.running_searches += 1
+        try:
+            recommendation = await asyncio.get_running_loop().run_in_executor(self.pool, worker_best_pick, model, draft_settings, live.state.copy(), pick_number,
+                                                                              time_budget, search_depth, autodraft_depth)
+        finally:
+            self.running_searches -= 1
+        recommendation['pick'] = pick_number + 1
+        recommendation['stale'] = live.number_picks != pick_number
+        return 200, recommendation
+
+    async def standings(self, draft_id, query, arguments):
+        live = self.session(draft_id)
+        model, draft_settings = self.session_settings[draft_id]
+        finish = str(query.get('finish', arguments.get('finish', True))).lower() not in ['false', '0', 'no']
+        draft_settings = dict(draft_settings, draft_position = live.draft.draft_position + 1)
+        standings = await asyncio.get_running_loop().run_in_executor(self.pool, worker_standings, model, draft_settings, live.state.copy(), live.number_picks, finish)
+        standings['pick'] = live.number_picks + 1
+        return 200, standings
+
+class ServerError(Exception):
+    ''' Error answered with status (e.g., 404) and its message.'''
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def check_pick(live, player_name, position):
+    # Raise a ServerError unless player_name is available (404) and, at position (default, the ranking's), fits an open
+    # roster spot of the team on the clock (400), so that LiveDraft.add_picks will not fail half way or stop in pdb
+    if not isinstance(player_name, str):
+        raise ServerError(400, 'Player names are strings, not '+json.dumps(player_name))
+    try:
+        player_id = live.draft.find_player(player_name, live.state)
+    except (IndexError, KeyError, re.error):
+        raise ServerError(404, player_name+' is not available')
+    if (position is None) or (position != position):
+        position = live.draft.player_positions[player_id]
+    if not isinstance(position, str):
+        raise ServerError(400, 'Positions are strings, e.g., "2B/SS", not '+json.dumps(position))
+
+    # The spots Draft.get_optimal_position may fill
+    round_key, team_key = live.on_the_clock()
+    open_spots = live.state.open_spots(team_key)
+    single_positions = set(position.split('/'))
+    if single_positions & {'SP', 'RP'}:
+        spots = [spot for spot in ['RP', 'SP'] if spot in single_positions] + ['P', 'BN']
+    elif single_positions & {'C', '1B', '2B', '3B', 'SS', 'OF', 'LF', 'CF', 'RF'}:
+        # As there, a C/CF player is not a catcher
+        spots = [spot for spot in ['C', '1B', '2B', 'SS', '3B'] if (spot in single_positions) and not ((spot == 'C') and ('CF' in single_positions))]
+        if single_positions & {'OF', 'LF', 'CF', 'RF'}:
+            spots.append('OF')
+        spots += ['UTIL', 'BN']
+    elif 'Util' in single_positions:
+        spots = ['UTIL']
+    else:
+        raise ServerError(400, 'Unknown position '+position+' of '+player_name)
+    if not any(open_spots.get(spot, 0) > 0 for spot in spots):
+        raise ServerError(400, 'Team '+str(team_key + 1)+' has no open roster spot for '+player_name+' ('+position+')')
+
+status_reasons = {200:'OK', 201:'Created', 400:'Bad Request', 404:'Not Found', 405:'Method Not Allowed', 409:'Conflict', 500:'Internal Server Error'}
+
+def json_default(value):
+    # numpy scalars and arrays (e.g., placements) as plain JSON
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+# Search processes: the projections, received once, and a Draft per (model, settings), kept warm between requests
+server_projections = None
+server_drafts = {}
+
+def init_server_worker(projections):
+    global server_projections
+    server_projections = projections
+    server_drafts.clear()
+
+def server_draft(model, draft_settings):
+    key = (model, json.dumps(draft_settings, sort_keys = True, default = str))
+    if key not in server_drafts:
+        server_drafts[key] = Draft(server_projections[model], **draft_settings)
+    return server_drafts[key]
+
+def worker_best_pick(model, draft_settings, state, pick_number, time_budget, search_depth, autodraft_depth):
+    # Best pick for the team on the clock at pick_number, by a Draft at its draft_position (which find_best_pick searches for)
+    start = time.perf_counter()
+    round_key, team_key = server_draft(model, draft_settings).turn(pick_number)
+    draft = server_draft(model, dict(draft_settings, draft_position = team_key + 1))
+    if time_budget is None:
+        best_pick, best_position, best_placement, best_score = draft.find_best_pick(team_key, state, round_key, search_depth = search_depth, autodraft_depth = autodraft_depth)
+        number_rollouts = None
+    else:
+        best_pick, best_position, best_placement, best_score, number_rollouts = draft.find_best_pick_anytime(team_key, state, round_key, time_budget = time_budget, autodraft_depth = autodraft_depth)
+    return {'player':draft.player_names[best_pick - 1], 'position':best_position, 'placement':best_placement, 'score':best_score,
+            'round':round_key + 1, 'team':team_key + 1, 'rollouts':number_rollouts, 'seconds':time.perf_counter() - start}
+
+def worker_standings(model, draft_settings, state, pick_number, finish):
+    # Roto standings of state, after the rest of the draft is autodrafted (finish), with each team's stats
+    draft = server_draft(model, draft_settings)
+    if finish == True:
+        for ipick in range(pick_number, draft.number_rounds * draft.number_teams):
+            state = draft.draft_next_best(draft.turn(ipick)[1], state)
+    roto_team_stats, roto_stats_batting, roto_stats_pitching, roto_standings, roto_placement, roto_points = draft.tabulate_roto(state)
+    # Batting and pitching apart, as both have BB; rate stats of teams without AB or IP (NaN) are null
+    teams = [{'team':int(team_key) + 1, 'points':float(points),
+              'batting':{k:(float(v) if np.isfinite(v) else None) for k,v in roto_stats_batting.loc[team_key].items()},
+              'pitching':{k:(float(v) if np.isfinite(v) else None) for k,v in roto_stats_pitching.loc[team_key].items()}}
+             for team_key, points in roto_standings.items()]
+    return {'finished':finish, 'placement':roto_placement, 'standings':teams}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'GameDay draft recommendation server')
+    parser.add_argument('--models', default = 'ZiPS', help = 'comma separated projection models, e.g., ZiPS,Steamer,TheBat')
+    parser.add_argument('--year', type = int, default = 2020)
+    parser.add_argument('--workers', type = int, default = 1, help = 'search processes (0 searches in a thread)')
+    parser.add_argument('--compact', action = 'store_true', help = 'compact projections (see Projection.compact)')
+    parser.add_argument('--host', default = '127.0.0.1')
+    parser.add_argument('--port', type = int, default = 8020)
+    args = parser.parse_args()
+    DraftServer(models = args.models.split(','), year = args.year, n_workers = args.workers, compact = args.compact, host = args.host, port = args.port).run()
@@ -0,0 +1,159 @@
+import sys
+import hashlib
+import numpy as np
+
+class DraftState:
+    ''' Compact, array-backed snapshot of a draft in progress.
+
+    Replaces the teams dict (with per-team batting/pitching DataFrames) and the
+    remaining ranked-players DataFrame, so that copying a draft for a pseudo-draft
+    is a handful of small array copies instead of a deepcopy of DataFrames.
+
+    Players are referred to by integer player ids, i.e., their row (iloc) in the
+    ranked player pool of the Draft, so lower ids are higher ranked.
+
+    The attributes are __slots__, so a state (and each of its copies) has no
+    instance dict; with compact dtypes (float32 totals, int16 player ids) a
+    copy is about half the bytes (see nbytes).
+
+    Parameters
+    ----------
+    number_players : int
+        Number of players in the ranked player pool
+
+    number_teams : int
+        Number of teams in the league
+
+    roster_spots : dict
+        Open spots per position, e.g., {'C':1,'1B':1,...}.  The key order fixes the slot columns.
+
+    number_batting_stats : int
+        Width of the per-team batting accumulator
+
+    number_pitching_stats : int
+        Width of the per-team pitching accumulator
+
+    number_positions : int [optional]
+        Number of per-position lists of player ids (see Draft.position_players) to keep a pointer into
+
+    totals_dtype : dtype [optional]
+        dtype of the team totals (e.g., np.float32 for a compact Draft)
+
+    ids_dtype : dtype [optional]
+        dtype of the player ids of rosters (np.int16 holds up to 32767 players)
+
+    Returns
+    -------
+    Instance of DraftState, which contains:
+        Objects:
+        - self.picked : bool per player, True once drafted (or otherwise unavailable, e.g., injured)
+        - self.roster_spots : open spots per team and slot
+        - self.batting_totals : running sums of batting stats per team (rate stats weighted by AB)
+        - self.pitching_totals : running sums of pitching stats per team (rate stats weighted by IP)
+        - self.roster_ids : player ids per team in the order they were drafted (-1 if empty)
+        - self.roster_slots : slot (column of roster_spots) each of those players fills
+        - self.roster_size : number of players drafted per team
+        - self.position_pointers : per position list, an index below which every player has been drafted
+        - self.undo_log : what each add_player since the last copy changed, so that it can be rolled back
+
+        Functions:
+        - copy
+        - add_player
+        - checkpoint
+        - rollback
+        - remaining
+        - open_spots
+        - board_key
+        - nbytes
+
+    '''
+
+    __slots__ = ('slot_names', 'picked', 'roster_spots', 'batting_totals', 'pitching_totals', 'roster_ids', 'roster_slots',
+                 'roster_size', 'position_pointers', 'undo_log')
+
+    def __init__(self, number_players, number_teams, roster_spots, number_batting_stats, number_pitching_stats, number_positions = 0,
+                 totals_dtype = np.float64, ids_dtype = np.int32):
+        number_rounds = sum(roster_spots.values())
+        self.slot_names = list(roster_spots.keys())
+        self.picked = np.zeros(number_players, dtype=bool)
+        self.roster_spots = np.tile(np.array(list(roster_spots.values()), dtype=np.int16), (number_teams, 1))
+        self.batting_totals = np.zeros((number_teams, number_batting_stats), dtype=totals_dtype)
+        self.pitching_totals = np.zeros((number_teams, number_pitching_stats), dtype=totals_dtype)
+        self.roster_ids = np.full((number_teams, number_rounds), -1, dtype=ids_dtype)
+        self.roster_slots = np.full((number_teams, number_rounds), -1, dtype=np.int16)
+        self.roster_size = np.zeros(number_teams, dtype=np.int16)
+        self.position_pointers = np.zeros(number_positions, dtype=np.int32)
+        self.undo_log = []
+
+    def copy(self):
+        ''' Copy of the state; only the arrays are copied, slot_names is shared.  The copy starts with an empty undo_log.'''
+        state = DraftState.__new__(DraftState)
+        state.slot_names = self.slot_names
+        state.picked = self.picked.copy()
+        state.roster_spots = self.roster_spots.copy()
+        state.batting_totals = self.batting_totals.copy()
+        state.pitching_totals = self.pitching_totals.copy()
+        state.roster_ids = self.roster_ids.copy()
+        state.roster_slots = self.roster_slots.copy()
+        state.roster_size = self.roster_size.copy()
+        state.position_pointers = self.position_pointers.copy()
+        state.undo_log = []
+        return state
+
+    def add_player(self, team_key, player_id, slot, batting_line = None, pitching_line = None):
+        ''' Put player_id into slot of team_key, and add their statline to the team totals.'''
+        # Keep the team totals being changed (a row of teams x stats), so rollback restores them exactly
+        if batting_line is not None:
+            self.undo_log.append((team_key, player_id, slot, self.batting_totals[team_key].copy(), None))
+        else:
+            self.undo_log.append((team_key, player_id, slot, None, self.pitching_totals[team_key].copy() if pitching_line is not None else None))
+        self.picked[player_id] = True
+        self.roster_spots[team_key, slot] -= 1
+        self.roster_ids[team_key, self.roster_size[team_key]] = player_id
+        self.roster_slots[team_key, self.roster_size[team_key]] = slot
+        self.roster_size[team_key] += 1
+        if batting_line is not None:
+            self.batting_totals[team_key] += batting_line
+        if pitching_line is not None:
+            self.pitching_totals[team_key] += pitching_line
+
+    def checkpoint(self):
+        ''' Marker of the current state, to later rollback to.'''
+        return len(self.undo_log), self.position_pointers.copy()
+
+    def rollback(self, marker):
+        ''' Undo, in place, every add_player made since checkpoint returned marker.'''
+        log_size, position_pointers = marker
+        self.position_pointers = position_pointers.copy()
+        while len(self.undo_log) > log_size:
+            team_key, player_id, slot, batting_row, pitching_row = self.undo_log.pop()
+            self.roster_size[team_key] -= 1
+            self.roster_ids[team_key, self.roster_size[team_key]] = -1
+            self.roster_slots[team_key, self.roster_size[team_key]] = -1
+            self.roster_spots[team_key, slot] += 1
+            self.picked[player_id] = False
+            if batting_row is not None:
+                self.batting_totals[team_key] = batting_row
+            if pitching_row is not None:
+                self.pitching_totals[team_key] = pitching_row
+
+    def remaining(self):
+        ''' Player ids not yet drafted, in ranked order.'''
+        return np.flatnonzero(~self.picked)
+
+    def open_spots(self, team_key):
+        ''' Open roster spots of team_key as a dict, e.g., {'C':1,'1B':0,...}.'''
+        return dict(zip(self.slot_names, self.roster_spots[team_key].tolist()))
+
+    def board_key(self):
+        ''' Digest of who drafted whom, in which order and slot.  States with the same board_key have the same rosters,
+        open spots and team totals, so any search from them gives the same answer.'''
+        digest = hashlib.blake2b(digest_size = 16)
+        digest.update(self.roster_ids.tobytes())
+        digest.update(self.roster_slots.tobytes())
+        return digest.digest()
+
+    @property
+    def nbytes(self):
+        ''' Bytes of the state: the object and its arrays (the undo_log and the shared slot_names are not counted).'''
+        return sys.getsizeof(self) + sum(sys.getsizeof(getattr(self, name)) for name in self.__slots__ if isinstance(getattr(self, name), np.ndarray))
@@ -1,7 +1,12 @@
 import pdb
 import os
+import sys
+import hashlib
+import pickle
+import unicodedata
 import pandas as pd
 import numpy as np
+from GameDayFunctions import spreadsheet_cache_2020
 pd.options.mode.chained_assignment = None
 
 class Projection:
@@ -18,6 +23,16 @@ class Projection:
     year: int [optional]
         year of projections
 
+    use_cache: bool [optional]
+        Keep the parsed Projection on disk (in path_cache) and reload it while the ranking and projection
+        files are unchanged; it is rebuilt automatically when any of them changes
+
+    path_cache : string [optional]
+        Where cached Projections are stored (default path_data + 'cache/')
+
+    compact : bool [optional]
+        Keep only what a Draft uses, in small dtypes (see compact); the cache is still written in full
+
     Returns
     -------
     Instance of Projection, which contains:
@@ -27,18 +42,32 @@ class Projection:
         - self.pitchers_rank
         - self.hitter_stats
         - self.pitchers_stats
+        - self.unmatched_hitters
+        - self.unmatched_pitchers
+        - self.player_is_pitcher
+        - self.player_stats_row
+        - self.player_ave_pick
+        - self.player_std_pick
 
         Functions:
-        - precompute_statlines
+        - index_players
+        - add_draft_distribution
+        - player_statlines
+        - read_cache
+        - write_cache
+        - compact
+        - memory_bytes
 
     '''
 
     def __init__(self, model = 'ZiPS', year = 2020, path_data = "projections/",
-                 ranking_method = 'FantasyPros', ranking_file = False):
+                 ranking_method = 'FantasyPros', ranking_file = False,
+                 use_cache = True, path_cache = False, compact = False):
         self.statline = {}
+        self.statline_dtype = float
         self.all_rank = {}
-        self.hitters_rank = {}
-        self.pitchers_rank= {}
+        self.hitters_rank = []
+        self.pitchers_rank= []
         self.hitters_stats = pd.DataFrame()
 
         # Read in Batters by Position for Year and Position
@@ -57,96 +86,184 @@ class Projection:
         #pdb.set_trace()
         #xls = pd.ExcelFile(os.path.join(path_data+str(year)+'/PositionalRankings/'+ranking_method+'/',ranking_file))
         xls = os.path.join(path_data+str(year)+'/PositionalRankings/'+ranking_method+'/',ranking_file)
+
+        # Projection files for model and year, e.g., ZiPS_2020_Hitters.csv and ZiPS_2020_Pitchers.csv
+        projection_files = [os.path.join(path_data + str(year) + '/', file) for file in sorted(os.listdir(path_data+str(year)+'/')) if file.startswith(model) & (file.endswith('Hitters.csv') | file.endswith('Pitchers.csv'))]
+
+        # FantasyPros average draft position and its spread, when available
+        adp_file = os.path.join(path_data+str(year)+'/PositionalRankings/FantasyPros/','FantasyPros_Avg_Std_'+str(year)+'.xlsx')
+        if not os.path.exists(adp_file):
+            adp_file = False
+
+        # Reload from the cache if the same files were parsed before
+        if use_cache == True:
+            if path_cache == False:
+                path_cache = path_data + 'cache/'
+            file_cache = cache_filename(path_cache, model, year, ranking_method, [xls] + projection_files + ([adp_file] if adp_file else []) + [__file__, spreadsheet_cache_2020.__file__])
+            if self.read_cache(file_cache) == True:
+                if compact == True:
+                    self.compact()
+                return
+
         if ranking_method == 'FantasyPros':
             #pdb.set_trace()
             #self.all_rank = pd.read_excel(xls, skiprows = 0, names = ['Rank','PLAYER','EligiblePosition','AVE','STD'], index_col = 'Rank')
-            self.all_rank = pd.read_excel(xls, skiprows = 0, index_col = 'Rank')
+            self.all_rank = spreadsheet_cache_2020.read_spreadsheet(xls, skiprows = 0, index_col = 'Rank')
         else:
-            self.all_rank = pd.read_excel(xls, skiprows = 0, names = ['Rank','PLAYER','EligiblePosition'], index_col = 'Rank')
-        for irename in range(len(self.all_rank)):
-            self.all_rank.iloc[irename]['PLAYER'] = remove_special_characters(self.all_rank.iloc[irename]['PLAYER'])
+            self.all_rank = spreadsheet_cache_2020.read_spreadsheet(xls, skiprows = 0, names = ['Rank','PLAYER','EligiblePosition'], index_col = 'Rank')
+        self.all_rank['PLAYER'] = spreadsheet_cache_2020.remove_special_characters(self.all_rank['PLAYER'])
 
         #pdb.set_trace()
-        # Loop through all files in path.
-        for file in os.listdir(path_data+str(year)+'/'):
-            # Skip files that don't end in a position.
-            # print(file)
-            #pdb.set_trace()
-
-            if file.startswith(model) & file.endswith('Hitters.csv'):
-                print(os.path.join(path_data + str(year) + '/', file))
-                #pdb.set_trace()
-                df = pd.read_csv(os.path.join(path_data + str(year) + '/', file), index_col='playerid')
-                self.hitters_stats = df
-
-
-            if file.startswith(model) & file.endswith('Pitchers.csv'):
-                print(os.path.join(path_data + str(year) + '/', file))
-                #pdb.set_trace()
-                df = pd.read_csv(os.path.join(path_data + str(year) + '/', file), index_col='playerid')
-                self.pitchers_stats = df
+        # Loop through all projection files.
+        for file in projection_files:
+            print(file)
+            if file.endswith('Hitters.csv'):
+                self.hitters_stats = pd.read_csv(file, index_col='playerid')
+            if file.endswith('Pitchers.csv'):
+                self.pitchers_stats = pd.read_csv(file, index_col='playerid')
 
         self.add_position_column()
+        self.index_players()
+        self.add_draft_distribution(adp_file)
+
+        if use_cache == True:
+            self.write_cache(file_cache)
+        if compact == True:
+            self.compact()
+
+    def read_cache(self, file_cache):
+        ''' Load a Projection pickled by write_cache.  Returns False if there is none or it cannot be read.'''
+        if not os.path.exists(file_cache):
+            return False
+        try:
+            with open(file_cache, 'rb') as infile:
+                self.__dict__.update(pickle.load(infile))
+        except Exception:
+            return False
+        print('Read '+file_cache)
+        return True
+
+    def write_cache(self, file_cache):
+        ''' Pickle the Projection to file_cache, and remove stale caches of the same model/year/ranking_method.'''
+        path_cache = os.path.dirname(file_cache)
+        os.makedirs(path_cache, exist_ok = True)
+        prefix = os.path.basename(file_cache).rsplit('_', 1)[0] + '_'
+        for file in os.listdir(path_cache):
+            if file.startswith(prefix) and file.endswith('.pkl'):
+                os.remove(os.path.join(path_cache, file))
+        # Write to a temporary file first, so an interrupted write never leaves a broken cache
+        with open(file_cache + '.tmp', 'wb') as outfile:
+            pickle.dump(self.__dict__, outfile, protocol = pickle.HIGHEST_PROTOCOL)
+        os.replace(file_cache + '.tmp', file_cache)
+
+    def compact(self, batter_stats = ['AB','R','1B','2B','3B','HR','RBI','SB','BB','AVG','OPS'],
+                pitcher_stats = ['IP','W','L','CG','SHO','SV','BB','SO','ERA','WHIP','BSV']):
+        ''' Shrink the Projection to what a Draft with batter_stats and pitcher_stats (the Draft defaults) uses, e.g., for
+        many Simulation workers: projections of unranked players and other columns (Team, G, WAR, ...) are dropped, stats
+        become float32 (so are player_statlines), positions categorical, rows int32, and names are interned, so that every
+        Projection and Draft of this process shares one copy of each name.  Player ids (rows of all_rank) are unchanged.'''
+        for stats_name, rank_name, stat_names in [('hitters_stats', 'hitters_rank', batter_stats), ('pitchers_stats', 'pitchers_rank', pitcher_stats)]:
+            stats = getattr(self, stats_name)
+            pitchers = stats_name == 'pitchers_stats'
+            matched = (self.player_stats_row >= 0) & (self.player_is_pitcher == pitchers)
+            keep = np.unique(self.player_stats_row[matched])
+            stats = stats.iloc[keep][['Name', 'EligiblePosition'] + [stat for stat in stat_names if stat in stats.columns]]
+            stats = stats.astype({stat:np.float32 for stat in stats.columns[2:]})
+            stats['Name'] = pd.Series([sys.intern(str(name)) for name in stats.Name], index = stats.index, dtype = object)
+            stats['EligiblePosition'] = stats['EligiblePosition'].astype('category')
+            self.player_stats_row[matched] = np.searchsorted(keep, self.player_stats_row[matched])
+            setattr(self, rank_name, np.asarray(getattr(self, rank_name))[keep].astype(np.int32))
+            setattr(self, stats_name, stats)
+
+        self.all_rank['PLAYER'] = pd.Series([sys.intern(str(name)) for name in self.all_rank.PLAYER], index = self.all_rank.index, dtype = object)
+        self.all_rank['Elig. Pos.'] = self.all_rank['Elig. Pos.'].astype('category')
+        self.player_stats_row = self.player_stats_row.astype(np.int32)
+        self.player_ave_pick = self.player_ave_pick.astype(np.float32)
+        self.player_std_pick = self.player_std_pick.astype(np.float32)
+        self.statline_dtype = np.float32
+        self.statline = {}
+        return self
+
+    def memory_bytes(self):
+        ''' Bytes held by the Projection: its DataFrames (with their strings) and arrays, by attribute.'''
+        return {name:memory_bytes(value) for name, value in self.__dict__.items()}
+
+    def index_players(self):
+        ''' Map every ranked player to their projection, once.  A player's id is their row in all_rank; pitchers
+        (eligible at any P position) use pitchers_stats, everyone else hitters_stats.  Sets self.player_stats_row,
+        the projection row (-1 if none), and reports ranked players without a projection.'''
+
+        self.player_is_pitcher = self.all_rank['Elig. Pos.'].str.contains('P').values
+        self.player_stats_row = np.full(len(self.all_rank), -1)
+
+        # Invert the projection -> ranking matches of add_position_column.  If several projections matched the same
+        # ranked player (only ever by full name, see match_to_ranking), use the one with most playing time (then the first).
+        for stats, rank_rows, playing_time, pitchers in [(self.hitters_stats, self.hitters_rank, 'AB', False), (self.pitchers_stats, self.pitchers_rank, 'IP', True)]:
+            for row in np.lexsort((-np.arange(len(stats)), stats[playing_time].fillna(0).values)):
+                if (rank_rows[row] >= 0) and (self.player_is_pitcher[rank_rows[row]] == pitchers):
+                    self.player_stats_row[rank_rows[row]] = row
+
+        unmatched = self.all_rank.PLAYER.values[self.player_stats_row < 0]
+        if len(unmatched) > 0:
+            print('No projection found for '+str(len(unmatched))+' ranked players: '+', '.join(unmatched))
+
+    def add_draft_distribution(self, adp_file):
+        ''' Average draft position (AVE) and its standard deviation (STD) of every ranked player, from adp_file
+        (e.g., FantasyPros_Avg_Std_2020.xlsx), as arrays indexed by player id.  NaN if not listed (or no adp_file).'''
+
+        self.player_ave_pick = np.full(len(self.all_rank), np.nan)
+        self.player_std_pick = np.full(len(self.all_rank), np.nan)
+        if adp_file == False:
+            return
+
+        adp = spreadsheet_cache_2020.read_spreadsheet(adp_file, skiprows = 0, names = ['Rank','PLAYER','EligiblePosition','AVE','STD'], index_col = 'Rank')
+        rank_rows = {}
+        for rank_row, name in enumerate(self.all_rank.PLAYER):
+            rank_rows.setdefault(name_keys(name)[0], []).append(rank_row)
+        for name, ave_pick, std_pick in zip(adp.PLAYER, adp.AVE, adp.STD):
+            for rank_row in rank_rows.get(name_keys(name)[0], []):
+                if np.isnan(self.player_ave_pick[rank_row]):
+                    self.player_ave_pick[rank_row] = ave_pick
+                    self.player_std_pick[rank_row] = std_pick
+                    break
+
+    def player_statlines(self, stat_names, pitchers = False):
+        ''' Projected stat_names of every ranked player, as an array indexed by player id.  Rows of players
+        without a projection, or of pitchers when pitchers == False (and vice versa), are NaN.'''
+
+        if (tuple(stat_names), pitchers) not in self.statline:
+            stats = self.pitchers_stats if pitchers == True else self.hitters_stats
+            statlines = np.full((len(self.all_rank), len(stat_names)), np.nan, dtype=self.statline_dtype)
+            matched = (self.player_stats_row >= 0) & (self.player_is_pitcher == pitchers)
+            statlines[matched] = stats[stat_names].to_numpy(dtype=self.statline_dtype)[self.player_stats_row[matched]]
+            self.statline[(tuple(stat_names), pitchers)] = statlines
+
+        return self.statline[(tuple(stat_names), pitchers)]
 
     def add_position_column(self):
         ''' Merge Positions from all_rank into hitters_stats and pitchers_stats dataframes'''
 
-        hitter_positions = []
-        for i,row in self.hitters_stats.iterrows():
-            name = row.Name.split(' Jr.')[0]
-            idx = self.all_rank.PLAYER.str.contains(name)
-            if np.sum(idx) == 0:
-                first_name = name.split(' ')[0]
-                last_name = name.split(' ')[1]
-                idx = self.all_rank.PLAYER.str.contains(last_name)
-                if np.sum(idx) > 1:
-                    idx = self.all_rank.PLAYER.str.contains(first_name[0] + '&' + last_name)
-                    if np.sum(idx) > 1:
-                        idx = self.all_rank.PLAYER.str.contains(first_name[:3] + '&' + last_name)
-
-            if np.sum(idx) > 1:
-                # If there are multiple players with same name (e.g., Will Smith), find position that is not a pitcher
-                # print(np.sum(idx))
-                pin = self.all_rank[idx][~self.all_rank[idx]['Elig. Pos.'].str.contains('P')]['Elig. Pos.']
-            else:
-                pin = self.all_rank[idx]['Elig. Pos.']
-
-            if pin.empty:
-                #print(row.Name)
-                #pdb.set_trace()
-                hitter_positions.extend(['NA'])
-            else:
-                hitter_positions.extend(pin)
-
-        self.hitters_stats['EligiblePosition'] = hitter_positions
-
-        pitcher_positions = []
-        for i,row in self.pitchers_stats.iterrows():
-            name = row.Name.split(' Jr.')[0]
-            idx = self.all_rank.PLAYER.str.contains(name)
-            if np.sum(idx) == 0:
-                first_name = name.split(' ')[0]
-                last_name = name.split(' ')[1]
-                idx = self.all_rank.PLAYER.str.contains(last_name)
-                if np.sum(idx) > 1:
-                    idx = self.all_rank.PLAYER.str.contains(first_name[0] + '&' + last_name)
-                    if np.sum(idx) > 1:
-                        idx = self.all_rank.PLAYER.str.contains(first_name[:3] + '&' + last_name)
-
-            if np.sum(idx) > 1:
-                # If there are multiple players with same name (e.g., Will Smith), find position that is not a pitcher
-                # print(np.sum(idx))
-                pin = self.all_rank[idx][self.all_rank[idx]['Elig. Pos.'].str.contains('P')]['Elig. Pos.']
-            else:
-                pin = self.all_rank[idx]['Elig. Pos.']
-
-            if pin.empty:
-                #print(row.Name)
-                pitcher_positions.extend(['NA'])
-            else:
-                pitcher_positions.extend(pin)
-
-        self.pitchers_stats['EligiblePosition'] = pitcher_positions
+        # Normalize ranked names once, and look them up by full name or by (last name, first initial)
+        rank_by_name = {}
+        rank_by_initial = {}
+        for rank_row, name in enumerate(self.all_rank.PLAYER):
+            full_name, name_key = name_keys(name)
+            rank_by_name.setdefault(full_name, []).append(rank_row)
+            rank_by_initial.setdefault(name_key, []).append(rank_row)
+        rank_is_pitcher = self.all_rank['Elig. Pos.'].str.contains('P').values
+
+        # Row of all_rank matching each projection (-1 if none)
+        self.hitters_rank = match_to_ranking(self.hitters_stats.Name, rank_by_name, rank_by_initial, ~rank_is_pitcher)
+        self.pitchers_rank = match_to_ranking(self.pitchers_stats.Name, rank_by_name, rank_by_initial, rank_is_pitcher)
+
+        eligible_positions = np.append(self.all_rank['Elig. Pos.'].values, 'NA')
+        self.hitters_stats['EligiblePosition'] = eligible_positions[self.hitters_rank]
+        self.pitchers_stats['EligiblePosition'] = eligible_positions[self.pitchers_rank]
+
+        # Projections of players not in the rankings (mostly minor leaguers) get 'NA'
+        self.unmatched_hitters = self.hitters_stats.Name.values[self.hitters_rank < 0]
+        self.unmatched_pitchers = self.pitchers_stats.Name.values[self.pitchers_rank < 0]
+        print(str(len(self.unmatched_hitters))+' of '+str(len(self.hitters_stats))+' hitters and '+str(len(self.unmatched_pitchers))+' of '+str(len(self.pitchers_stats))+' pitchers are not ranked')
 
         # Drop NA from dataframes
         #pdb.set_trace()
@@ -166,25 +283,158 @@ class Projection:
         # Starters complete games and shutouts
         ind_sp = self.pitchers_stats['EligiblePosition'].str.contains('SP')
         #pdb.set_trace()
-        self.pitchers_stats['CG'] = 0
-        self.pitchers_stats['CG'][ind_sp] = np.floor(
-            self.pitchers_stats['IP'][ind_sp] * 0.01 * (1. / self.pitchers_stats['WHIP'][ind_sp]))
+        self.pitchers_stats['CG'] = np.where(ind_sp, np.floor(
+            self.pitchers_stats['IP'] * 0.01 * (1. / self.pitchers_stats['WHIP'])), 0)
 
-        self.pitchers_stats['SHO'] = 0
-        self.pitchers_stats['SHO'][ind_sp] = np.ceil(self.pitchers_stats['CG'][ind_sp] * 0.55)
+        self.pitchers_stats['SHO'] = np.where(ind_sp, np.ceil(self.pitchers_stats['CG'] * 0.55), 0)
 
         # Relievers saves and blown saves
         ind_rp = self.pitchers_stats['EligiblePosition'].str.contains('RP')
-        self.pitchers_stats['SV'] = 0
-        self.pitchers_stats['SV'][ind_rp] = np.floor(
-            self.pitchers_stats['IP'][ind_rp] * 0.5 * (1. / self.pitchers_stats['WHIP'][ind_rp]))
+        self.pitchers_stats['SV'] = np.where(ind_rp, np.floor(
+            self.pitchers_stats['IP'] * 0.5 * (1. / self.pitchers_stats['WHIP'])), 0)
+
+        self.pitchers_stats['BSV'] = np.where(ind_rp, np.floor(
+            self.pitchers_stats['IP'] * 0.05 * (1. / self.pitchers_stats['WHIP'])), 0)
 
-        self.pitchers_stats['BSV'] = 0
-        self.pitchers_stats['BSV'][ind_rp] = np.floor(
-            self.pitchers_stats['IP'][ind_rp] * 0.05 * (1. / self.pitchers_stats['WHIP'][ind_rp]))
+
+class ProjectionEnsemble:
+    ''' Several projection models (e.g., ZiPS, Steamer and TheBat) of the same ranked players, stacked.
+
+    Players and their ids (rows of all_rank) are those of the ranking, which
+    is the same for every model, so a Draft made with a ProjectionEnsemble
+    drafts exactly as one made with any of its models.  model_statlines
+    gives every model's projections as one (model x player x stat) array;
+    player_statlines, which Draft uses for its rosters, blends them by weight
+    (players a model does not project are left out of its blend).  Use
+    Draft.find_best_pick_ensemble to score each rollout under every model.
+
+    Parameters
+    ----------
+    models : list [optional]
+        Projection models, e.g., ['ZiPS', 'Steamer', 'TheBat']; the first is the primary model (e.g., for Draft.teams)
+
+    weights : list [optional]
+        Weight of each model in the blend (default equal)
+
+    Other parameters (e.g., compact) are those of Projection, the same for every model.
+
+    Returns
+    -------
+    Instance of ProjectionEnsemble, which contains:
+        Objects:
+        - self.model_names
+        - self.weights
+        - self.projections : Projection of each model
+        - self.all_rank, self.hitters_stats, self.pitchers_stats, ... : those of the primary model
+
+        Functions:
+        - model_statlines
+        - player_statlines
+
+    '''
+
+    def __init__(self, models = ['ZiPS', 'Steamer', 'TheBat'], weights = None, year = 2020, path_data = "projections/",
+                 ranking_method = 'FantasyPros', use_cache = True, compact = False):
+        self.model_names = list(models)
+        weights = np.ones(len(self.model_names)) if weights is None else np.array(weights, dtype=float)
+        self.weights = weights / weights.sum()
+        self.projections = {model:Projection(model = model, year = year, path_data = path_data, ranking_method = ranking_method, use_cache = use_cache, compact = compact) for model in self.model_names}
+        self.statline = {}
+
+        primary = self.projections[self.model_names[0]]
+        for model in self.model_names[1:]:
+            if not np.array_equal(self.projections[model].all_rank.PLAYER.values, primary.all_rank.PLAYER.values):
+                raise ValueError('Rankings of '+model+' and '+self.model_names[0]+' differ')
+
+        # Players, positions and draft positions (all from the ranking), and readable stats, of the primary model
+        self.all_rank = primary.all_rank
+        self.player_is_pitcher = primary.player_is_pitcher
+        self.player_ave_pick = primary.player_ave_pick
+        self.player_std_pick = primary.player_std_pick
+        self.player_stats_row = primary.player_stats_row
+        self.hitters_stats = primary.hitters_stats
+        self.pitchers_stats = primary.pitchers_stats
+
+    def model_statlines(self, stat_names, pitchers = False):
+        ''' Projected stat_names of every ranked player under every model, (model, player, stat), as in Projection.player_statlines.'''
+        return np.stack([self.projections[model].player_statlines(stat_names, pitchers = pitchers) for model in self.model_names])
+
+    def player_statlines(self, stat_names, pitchers = False):
+        ''' Weighted blend of model_statlines over the models projecting each player (NaN if none does).'''
+        if (tuple(stat_names), pitchers) not in self.statline:
+            statlines = self.model_statlines(stat_names, pitchers = pitchers)
+            weights = np.where(np.isnan(statlines), 0., self.weights[:, None, None])
+            with np.errstate(invalid='ignore'):
+                self.statline[(tuple(stat_names), pitchers)] = (np.nansum(statlines * weights, axis=0) / weights.sum(axis=0)).astype(statlines.dtype)
+        return self.statline[(tuple(stat_names), pitchers)]
 
 
 def remove_special_characters(name_in):
     name_out = ((((((name_in.replace('ñ','n')).replace('í','i')).replace('é','e')).replace('á','a')).replace('ú','u')).replace('ó','o')).split(' Jr.')
     return name_out[0]
 
+
+def cache_filename(path_cache, model, year, ranking_method, files):
+    # Cache file named by model, year, ranking_method and a fingerprint of files (path, size, modification time; this module and
+    # spreadsheet_cache_2020, which reads the spreadsheets and cleans their names, are included so that code changes rebuild
+    # the cache) and the pandas version
+    fingerprint = hashlib.sha1(pd.__version__.encode())
+    for file in files:
+        file_stat = os.stat(file)
+        fingerprint.update((file + ':' + str(file_stat.st_size) + ':' + str(file_stat.st_mtime_ns) + ';').encode())
+    return os.path.join(path_cache, model + '_' + str(year) + '_' + ranking_method + '_' + fingerprint.hexdigest()[:16] + '.pkl')
+
+def name_keys(name_in):
+    # Normalized full name, and (last name, first initial), e.g. 'Ronald Acuña Jr.' -> ('ronald acuna', ('acuna', 'r'))
+    name = unicodedata.normalize('NFKD', remove_special_characters(str(name_in))).encode('ascii', 'ignore').decode()
+    words = name.lower().replace('.', '').replace('-', ' ').split()
+    while len(words) > 1 and words[-1] in ['jr', 'sr', 'ii', 'iii', 'iv']:
+        words = words[:-1]
+    if len(words) == 0:
+        return '', ('', '')
+    return ' '.join(words), (words[-1], words[0][0])
+
+def match_to_ranking(names, rank_by_name, rank_by_initial, rank_is_eligible):
+    # Row of the ranking matching each of names.  A full name match always wins; ties go to ranked players of the right
+    # kind (rank_is_eligible, i.e., pitcher or hitter), then to the highest ranked.  Names without one fall back to
+    # (last name, first initial), but only if that key is a single ranked player, of the right kind, with no full name
+    # match of their own, and no other name falls back to them (e.g., an unranked Melky Cabrera must not take Miguel
+    # Cabrera's place).
+    rank_rows = np.full(len(names), -1)
+    fallback_rows = {}
+    for row, name in enumerate(names):
+        full_name, name_key = name_keys(name)
+        candidates = rank_by_name.get(full_name, [])
+        if len(candidates) > 1:
+            eligible = [i for i in candidates if rank_is_eligible[i]]
+            if len(eligible) > 0:
+                candidates = eligible
+        if len(candidates) > 0:
+            rank_rows[row] = candidates[0]
+        elif (len(rank_by_initial.get(name_key, [])) == 1) and rank_is_eligible[rank_by_initial[name_key][0]]:
+            fallback_rows.setdefault(rank_by_initial[name_key][0], []).append(row)
+
+    matched_by_name = set(rank_rows[rank_rows >= 0])
+    for rank_row, rows in fallback_rows.items():
+        if (len(rows) == 1) and (rank_row not in matched_by_name):
+            rank_rows[rows[0]] = rank_row
+    return rank_rows
+
+def memory_bytes(value):
+    # Bytes held by value: DataFrames and Series with their strings (pandas' deep memory_usage), arrays, and the
+    # contents of dicts, lists and tuples.  Objects shared between several values are counted in each.
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep = True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep = True))
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return value.nbytes + sum(sys.getsizeof(i) for i in value.ravel())
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(memory_bytes(k) + memory_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(memory_bytes(i) for i in value)
+    if hasattr(value, 'nbytes') and not isinstance(value, type):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
@@ -7,9 +7,15 @@ import pandas as pd
 pd.options.mode.chained_assignment = None
 import numpy as np
 import copy
+import time
+import json
+import hashlib
 import pickle
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from GameDayFunctions.fangraphs_projection_2020 import Projection
 from GameDayFunctions.draft_2020 import Draft
+from GameDayFunctions.batch_draft_2020 import BatchDraft
+from GameDayFunctions.simulation_store_2020 import SimulationStore, POSITIONS
 
 class Simulation:
 
@@ -31,7 +37,10 @@ class Simulation:
                  shuffle_picks = True,
                  search_depth = 2,
                  autodraft_depth = 'end',
-                 sigmoid_cut = 1e-6):
+                 sigmoid_cut = None,
+                 n_workers = 1,
+                 seed = 0,
+                 compact = False):
 
         self.projection_type = projection_type
         self.ranking_method = ranking_method
@@ -43,99 +52,185 @@ class Simulation:
         self.roster_spots = roster_spots
         self.batter_stats = batter_stats
         self.pitcher_stats = pitcher_stats
-
-        simulation_output = self.simulate_multiple_drafts(naive_draft = naive_draft, shuffle_picks = shuffle_picks, search_depth = search_depth, autodraft_depth = autodraft_depth, silent=silent)
+        self.filter_injured_players = filter_injured_players
+        self.sigmoid_cut = sigmoid_cut # Passed to every Draft when given; None keeps Draft's own default
+        self.n_workers = n_workers # Drafts run in a pool of n_workers processes when > 1
+        self.seed = seed # Draft (isim, draft_position) shuffles with its own random stream, derived from seed
+        self.compact = compact # Compact Projection and Drafts (float32 stats), so more workers fit in memory
+
+        # Picks are streamed to a SimulationStore in path_sims as drafts finish, rather than kept in memory
+        self.simulation_output = self.simulate_multiple_drafts(naive_draft = naive_draft, shuffle_picks = shuffle_picks, search_depth = search_depth, autodraft_depth = autodraft_depth, silent=silent)
         #pdb.set_trace()
-        compiled_player_rankings = self.compile_simulation_results(simulation_output, self.number_sims, self.number_teams)
-        average_rankings = self.rank_simulation_result_averages(compiled_player_rankings)
-        self.write_simulation_results(simulation_output,average_rankings)
-
-        return simulation_output,average_rankings
+        compiled_player_rankings = self.compile_simulation_results(self.simulation_output, self.number_sims, self.number_teams)
+        self.average_rankings = self.rank_simulation_result_averages(compiled_player_rankings)
+        self.placement_distribution = self.simulation_output.placement_distribution()
+        self.write_simulation_results(self.simulation_output,self.average_rankings)
 
     def simulate_multiple_drafts(self, naive_draft = False, shuffle_picks = True, search_depth = 2, autodraft_depth = 'end', silent = True):
+        # Run a Draft for every sim and draft position.  Each finished draft is saved in shard_directory right away,
+        # and drafts already saved there (e.g., by an interrupted run with the same settings) are not run again.
 
         player_projections = Projection(path_data=self.path_projections,year=self.year,model=self.projection_type,ranking_method = self.ranking_method)
 
-        # Define Simulation Dictionary
-        simulation_results = {}
-
+        draft_settings = {'number_teams':self.number_teams, 'roster_spots':self.roster_spots, 'batter_stats':self.batter_stats,
+                          'pitcher_stats':self.pitcher_stats, 'filter_injured_players':self.filter_injured_players}
+        if self.sigmoid_cut is not None:
+            draft_settings['sigmoid_cut'] = self.sigmoid_cut
+        draft_all_settings = {'naive_draft':naive_draft, 'search_depth':search_depth, 'shuffle_picks':shuffle_picks, 'autodraft_depth':autodraft_depth, 'silent':silent}
+        if self.compact == True:
+            # Only set when used, so drafts saved by earlier full-size runs keep their shard_directory
+            player_projections.compact(batter_stats = self.batter_stats, pitcher_stats = self.pitcher_stats)
+            draft_settings['compact'] = True
+
+        simulation_store = SimulationStore(self.store_directory(), player_projections.all_rank.PLAYER.values, self.number_teams)
+
+        # Without search, every draft of every sim runs at once in a BatchDraft
+        if naive_draft == True:
+            return self.simulate_naive_drafts(player_projections, draft_settings, simulation_store, shuffle_picks = shuffle_picks)
+        path_shards = self.shard_directory(draft_settings, draft_all_settings)
+        player_ids_by_rank = {rank:player_id for player_id, rank in enumerate(player_projections.all_rank.index)}
+
+        # Start the store with drafts finished earlier (shards without the final standings, from older runs, are run again)
+        jobs = []
         for isim in range(self.number_sims):
-            print('Sim '+str(isim))
-
-            draft_position_results = {}
             for idraft_position in (np.arange(self.number_teams) + 1):
-
-                # Get an instance of the Draft Class with your league-specific details and projection preference.
-                simulated_draft_position_i = Draft(player_projections,
-                                     draft_position = idraft_position,
-                                     number_teams = self.number_teams,
-                                     roster_spots = self.roster_spots,
-                                     batter_stats = self.batter_stats,
-                                     pitcher_stats = self.pitcher_stats)
-                simulated_draft_position_i.draft_all(naive_draft = naive_draft, search_depth = search_depth, shuffle_picks = shuffle_picks, silent = silent)
-                draft_position_results[idraft_position] = simulated_draft_position_i.drafted_team
-
-            simulation_results[isim] = draft_position_results
-
-        return simulation_results #simulated_compiled_player_rankings, simulated_average_rankings
-
-    def compile_simulation_results(self, simulation_results, number_sims, number_teams):
-
-        # Give each position a number to add as first entry in simulated_player_rankings
-        position_dict = {'C':1,'1B':2,'2B':3,'SS':4,'3B':5,'OF':6,'SP':7,'RP':8,'P':9,'UTIL':10,'BN':11}
-        simulated_player_rankings = {}
-
-        for isim in range(number_sims):
-
-            for idraft_position in (np.arange(number_teams) + 1):
-
-                # Define
-                draft_position = np.arange(number_teams)[::-1]
-                for iround in range(len(simulation_results[isim][idraft_position])):
-
-                    # Reverse draft order every round
-                    draft_position = draft_position[::-1]
-
-                    # Translate round/draft_position to overall draft position
-                    #overall_draft_position = number_teams * iround + draft_position[idraft_position-1]
-                    overall_draft_position =  iround + 1
-
-                    # Get player name as key to simulated_player_rankings
-                    player_name = simulation_results[isim][idraft_position][iround][1]
-                    player_position = simulation_results[isim][idraft_position][iround][2]
-
-                    # Compile overall_position's for each player
-                    if player_name in simulated_player_rankings:
-                        simulated_player_rankings[player_name].append(overall_draft_position)
-                    else:
-                        simulated_player_rankings[player_name] = [position_dict[player_position],overall_draft_position]
-
-        return simulated_player_rankings
+                file_shard = os.path.join(path_shards, 'sim_'+str(isim)+'_position_'+str(idraft_position)+'.pkl')
+                simulated = None
+                if os.path.exists(file_shard):
+                    with open(file_shard, 'rb') as infile:
+                        simulated = pickle.load(infile)
+                if isinstance(simulated, dict) and ('drafted_team' in simulated):
+                    simulation_store.append_draft(isim, idraft_position, simulated['drafted_team'], player_ids_by_rank, simulated['placement'], simulated['score'])
+                else:
+                    jobs.append((isim, idraft_position))
+        number_drafts = self.number_sims * self.number_teams
+        print(str(number_drafts - len(jobs))+' of '+str(number_drafts)+' drafts already done in '+path_shards)
+
+        def save_draft(isim, idraft_position, simulated):
+            simulation_store.append_draft(isim, idraft_position, simulated['drafted_team'], player_ids_by_rank, simulated['placement'], simulated['score'])
+            file_shard = os.path.join(path_shards, 'sim_'+str(isim)+'_position_'+str(idraft_position)+'.pkl')
+            with open(file_shard + '.tmp', 'wb') as outfile:
+                pickle.dump(simulated, outfile)
+            os.replace(file_shard + '.tmp', file_shard)
+
+        progress = DraftProgress(len(jobs))
+        # More workers than CPUs only add overhead; with one CPU the drafts run serially
+        n_workers = min(self.n_workers, os.cpu_count() or 1, len(jobs))
+        if n_workers > 1:
+            with ProcessPoolExecutor(max_workers = n_workers, initializer = init_worker, initargs = (player_projections, draft_settings, draft_all_settings, self.seed)) as pool:
+                futures = {pool.submit(worker_simulate_draft, isim, idraft_position):(isim, idraft_position) for isim, idraft_position in jobs}
+                for future in as_completed(futures):
+                    save_draft(*futures[future], future.result())
+                    progress.update()
+        else:
+            for isim, idraft_position in jobs:
+                save_draft(isim, idraft_position, simulate_draft(player_projections, isim, idraft_position, draft_settings, draft_all_settings, self.seed))
+                progress.update()
+        progress.finish()
+        simulation_store.flush()
+
+        return simulation_store #simulated_compiled_player_rankings, simulated_average_rankings
+
+    def simulate_naive_drafts(self, player_projections, draft_settings, simulation_store, shuffle_picks = True):
+        # Autodrafts (naive_draft) of every sim and draft position as leagues of one BatchDraft, league isim * number_teams + draft_position - 1.
+        # Each draft_position's picks are added to simulation_store, with the final placement and score of the team.
+        draft = Draft(player_projections, draft_position = 1, **draft_settings)
+        batch = BatchDraft(draft, self.number_sims * self.number_teams, shuffle_picks = shuffle_picks, rng = np.random.default_rng(self.seed))
+        start = time.perf_counter()
+        batch.draft_all()
+        scores, placements = batch.standings()
+        print('%d drafts, %.0f drafts/s' % (batch.number_leagues, batch.number_leagues / (time.perf_counter() - start)))
+
+        # Team draft_position - 1 of every league, (leagues, rounds)
+        leagues = np.arange(batch.number_leagues)
+        teams = leagues % self.number_teams
+        number_rounds = batch.roster_size[leagues, teams][:, None]
+        rounds = np.broadcast_to(np.arange(batch.roster_ids.shape[2]), (len(leagues), batch.roster_ids.shape[2]))
+        slot_positions = np.array([POSITIONS.index(slot) for slot in draft.state.slot_names])
+        is_drafted = rounds < number_rounds
+        as_rows = lambda values: np.broadcast_to(values[:, None], rounds.shape)[is_drafted]
+        simulation_store.append_rows(sim = as_rows(leagues // self.number_teams), draft_position = as_rows(teams + 1), round = rounds[is_drafted] + 1,
+                                     player_id = batch.roster_ids[leagues, teams][is_drafted], position = slot_positions[batch.roster_slots[leagues, teams][is_drafted]],
+                                     placement = as_rows(placements[leagues, teams]), score = as_rows(scores[leagues, teams]))
+        simulation_store.flush()
+        return simulation_store
+
+    def store_directory(self):
+        # Directory in path_sims of the SimulationStore of this simulation
+        return self.path_sims + self.projection_type + '_' + self.ranking_method + '_' + str(self.number_teams) + '_teams_' + str(self.number_sims) + '_sims_store'
+
+    def shard_directory(self, draft_settings, draft_all_settings):
+        # Directory in path_sims for the drafts of this simulation, named by a hash of everything that changes their outcome
+        settings = {'projection_type':self.projection_type, 'ranking_method':self.ranking_method, 'year':self.year, 'seed':self.seed,
+                    'draft_settings':draft_settings, 'draft_all_settings':{k:v for k,v in draft_all_settings.items() if k != 'silent'}}
+        settings_hash = hashlib.sha1(json.dumps(settings, sort_keys = True, default = str).encode()).hexdigest()[:12]
+        path_shards = os.path.join(self.path_sims, self.projection_type + '_' + self.ranking_method + '_' + str(self.number_teams) + '_teams_' + settings_hash)
+        os.makedirs(path_shards, exist_ok = True)
+        return path_shards
+
+    def compile_simulation_results(self, simulation_store, number_sims, number_teams):
+
+        # Average round of each drafted player, and his slot the first time he was drafted, grouped over the store chunk by chunk
+        return simulation_store.average_draft_positions()
 
     def rank_simulation_result_averages(self, simulated_player_rankings):
 
-        # Give each position a number, in reverse, to back out position from first entry in simulated_player_rankings
-        rev_position_dict = {1:'C',2:'1B',3:'2B',4:'SS',5:'3B',6:'OF',7:'SP',8:'RP',9:'P',10:'UTIL',11:'BN'}
-
-        average_simulated_player_rankings = {}
-        simulated_player_positions = {}
-        for i in simulated_player_rankings:
-            average_simulated_player_rankings[i] = np.mean(simulated_player_rankings[i][1:])
-            simulated_player_positions[i] = rev_position_dict[simulated_player_rankings[i][0]]
-
-        ranked_players = sorted(average_simulated_player_rankings, key=average_simulated_player_rankings.get)
-        ranked_values = [average_simulated_player_rankings[i] for i in ranked_players]
-        ranked_positions = [simulated_player_positions[i] for i in ranked_players]
-        df_out = pd.DataFrame({'Players':ranked_players,'Positions':ranked_positions,'Ave. Pick Number':ranked_values})
+        # Players from the earliest average pick (round) to the latest
+        df_out = simulated_player_rankings[['Players','Positions','Ave. Pick Number']].reset_index(drop = True)
 
         return df_out
 
-    def write_simulation_results(self,simulation_results,simulated_average_rankings):
-        # Pickle Filename
-        file_pickle = self.path_sims + self.projection_type + '_' + self.ranking_method + '_' + str(self.number_teams) + '_teams_' + str(self.number_sims) + '_sims'
-        outfile = open(file_pickle,'wb')
-        pickle.dump(simulation_results,outfile)
-        outfile.close()
+    def write_simulation_results(self,simulation_store,simulated_average_rankings):
+        # Picks are already in the store; write what is still buffered, then the rankings
+        simulation_store.flush()
 
         file_rank = 'Player_Ranking_' + self.projection_type + '_' + self.ranking_method + '_' + str(self.number_teams) + '_teams_' + str(self.number_sims) + '_sims.csv'
         simulated_average_rankings.to_csv(self.path_sims+file_rank)
+
+class DraftProgress:
+    ''' Print how many drafts are done, and drafts per second, at most every interval seconds.'''
+
+    def __init__(self, number_drafts, interval = 10.):
+        self.number_drafts = number_drafts
+        self.interval = interval
+        self.number_done = 0
+        self.start = time.perf_counter()
+        self.last_print = self.start
+
+    def update(self):
+        self.number_done += 1
+        if time.perf_counter() - self.last_print > self.interval:
+            self.last_print = time.perf_counter()
+            self.print_progress()
+
+    def finish(self):
+        if self.number_drafts > 0:
+            self.print_progress()
+
+    def print_progress(self):
+        elapsed = time.perf_counter() - self.start
+        rate = self.number_done / elapsed if elapsed > 0 else 0.
+        remaining = (self.number_drafts - self.number_done) / rate if rate > 0 else float('nan')
+        print('%d/%d drafts, %.2f drafts/s, %.0fs elapsed, ~%.0fs left' % (self.number_done, self.number_drafts, rate, elapsed, remaining))
+
+def simulate_draft(player_projections, isim, idraft_position, draft_settings, draft_all_settings, seed):
+    # Get an instance of the Draft Class with your league-specific details and projection preference, and draft.
+    # Random picks come from a stream of its own, so results do not depend on which process runs which draft.
+    # Returns the picks (drafted_team) and the team's final placement and score, scored as BatchDraft.standings scores them.
+    simulated_draft = Draft(player_projections, draft_position = idraft_position, **draft_settings)
+    simulated_draft.rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key = (int(isim), int(idraft_position))))
+    simulated_draft.draft_all(**draft_all_settings)
+    scores, placements = simulated_draft.roto_scorer.standings(simulated_draft.state.batting_totals, simulated_draft.state.pitching_totals)
+    team_key = simulated_draft.draft_position
+    return {'drafted_team':simulated_draft.drafted_team, 'placement':int(placements[team_key]), 'score':float(scores[team_key])}
+
+# Each worker process of Simulation keeps its own copy of the projections and settings
+worker_settings = None
+
+def init_worker(player_projections, draft_settings, draft_all_settings, seed):
+    global worker_settings
+    worker_settings = (player_projections, draft_settings, draft_all_settings, seed)
+
+def worker_simulate_draft(isim, idraft_position):
+    player_projections, draft_settings, draft_all_settings, seed = worker_settings
+    return simulate_draft(player_projections, isim, idraft_position, draft_settings, draft_all_settings, seed)
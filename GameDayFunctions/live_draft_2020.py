@@ -0,0 +1,214 @@
+import os
+import io
+import csv
+import time
+import numpy as np
+from GameDayFunctions import spreadsheet_cache_2020
+
+class LiveDraft:
+    ''' A live draft kept between calls, so that each pick is applied once and asking
+    for the next recommendation does not replay the draft from the first pick.
+
+    Picks are added in draft order (snake order, starting with team 1), either
+    directly with add_picks or from a pick spreadsheet with update_from_file.
+    A .csv pick list is tailed, i.e., only rows appended since the last read
+    are parsed; an .xlsx pick list is read again, but only new rows are applied.
+    Both have columns Pick, PLAYER and EligiblePosition, like the files in
+    Draft_Pick_Spreadsheets/.
+
+    While other teams are on the clock, ponder searches the boards most likely
+    to come up at draft_position's next turn, so that recommend can answer at
+    once when one of them does; boards ruled out by the picks are dropped as
+    the picks come in.
+
+    Parameters
+    ----------
+    draft : Draft
+        League settings, projections and search of the draft
+
+    Returns
+    -------
+    Instance of LiveDraft, which contains:
+        Objects:
+        - self.state : DraftState with every pick so far
+        - self.pick_names : names of the picks so far, as given
+        - self.number_picks
+        - self.pondered : best pick (as find_best_pick returns it) of each board searched ahead, by board_key and settings
+
+        Functions:
+        - on_the_clock
+        - add_picks
+        - update_from_file
+        - ponder
+        - recommend
+        - recommend_all
+        - watch
+
+    '''
+
+    def __init__(self, draft):
+        self.draft = draft
+        self.state = draft.state.copy()
+        self.pick_names = []
+        self.number_picks = 0
+        self.file_offsets = {} # Bytes of each .csv already read
+        self.pondered = {}
+        self.predicted_boards = None # Settings and boards of the last Draft.predict_boards, redone after each pick
+
+    def on_the_clock(self, pick_number = None):
+        ''' Round and team (from 0) making pick_number (from 0; default, the next pick).'''
+        if pick_number is None:
+            pick_number = self.number_picks
+        return self.draft.turn(pick_number)
+
+    def add_picks(self, player_names, eligible_positions = None):
+        ''' Draft player_names, in order, starting at the next pick.  Positions default to the ranking's.'''
+        if eligible_positions is None:
+            eligible_positions = [None] * len(player_names)
+        for player_name, eligible_position in zip(player_names, eligible_positions):
+            round_key, team_key = self.on_the_clock()
+            player_id = self.draft.find_player(player_name, self.state)
+            if (eligible_position is None) or (eligible_position != eligible_position):
+                eligible_position = self.draft.player_positions[player_id]
+            best_position = self.draft.get_optimal_position(eligible_position, self.state.open_spots(team_key))
+            self.state = self.draft.draft_next_best(team_key, self.state, force_pick = player_id + 1, force_position = best_position)
+            self.pick_names.append(player_name)
+            self.number_picks += 1
+        self.prune_pondered()
+
+    def prune_pondered(self):
+        # Drop the pondered boards that the picks so far rule out, i.e., where a team's roster does not start with its picks so far
+        drafted = np.arange(self.state.roster_ids.shape[1]) < self.state.roster_size[:, None]
+        for key in list(self.pondered):
+            if not np.array_equal(self.pondered[key][0][drafted], self.state.roster_ids[drafted]):
+                del self.pondered[key]
+
+    def ponder(self, time_budget = 1., search_depth = 1, autodraft_depth = 'end', number_samples = 32, number_boards = 8, silent = True):
+        ''' Search the most likely boards at draft_position's next turn (Draft.predict_boards, with number_samples sampled drafts),
+        most likely first, for up to time_budget seconds, e.g., while other teams are on the clock.  Each board is searched once,
+        with find_best_pick at search_depth and autodraft_depth, and recommend (with the same settings, and no time_budget) answers
+        at once if it comes up.  A search is not interrupted, so the last may end past time_budget.  Returns the number of boards searched.'''
+        deadline = time.perf_counter() + time_budget
+        settings = (self.number_picks, number_samples, number_boards)
+        if (self.predicted_boards is None) or (self.predicted_boards[0] != settings):
+            self.predicted_boards = (settings, self.draft.predict_boards(self.state, self.number_picks, self.draft.draft_position, number_samples = number_samples, number_boards = number_boards))
+
+        number_searched = 0
+        for frequency, pick_number, board in self.predicted_boards[1]:
+            if time.perf_counter() > deadline:
+                break
+            key = (board.board_key(), search_depth, autodraft_depth)
+            if key in self.pondered:
+                continue
+            best_pick = self.draft.find_best_pick(self.draft.draft_position, board.copy(), self.draft.turn(pick_number)[0], silent = True, autodraft_depth = autodraft_depth, search_depth = search_depth)
+            self.pondered[key] = (board.roster_ids.copy(), best_pick)
+            number_searched += 1
+            if silent == False:
+                print('Pondered pick '+str(pick_number + 1)+' (board frequency '+str(round(frequency, 2))+'): '+self.draft.player_names[best_pick[0] - 1])
+        return number_searched
+
+    def update_from_file(self, path_file):
+        ''' Add picks from path_file made since it was last read.  Returns the number of new picks.'''
+        if os.path.splitext(path_file)[1] == '.csv':
+            player_names, eligible_positions = self.read_new_csv_rows(path_file)
+        else:
+            player_list = read_pick_list(path_file)
+            player_names = player_list.PLAYER.tolist()[self.number_picks:]
+            eligible_positions = player_list.EligiblePosition.tolist()[self.number_picks:]
+        self.add_picks(player_names, eligible_positions)
+        return len(player_names)
+
+    def read_new_csv_rows(self, path_file):
+        # Parse only complete lines appended since the last read; a partly written last line is left for the next read
+        offset = self.file_offsets.get(path_file, 0)
+        with open(path_file, 'rb') as infile:
+            infile.seek(offset)
+            new_bytes = infile.read()
+        new_bytes = new_bytes[:new_bytes.rfind(b'\n') + 1]
+        self.file_offsets[path_file] = offset + len(new_bytes)
+
+        rows = list(csv.reader(io.StringIO(new_bytes.decode('utf-8-sig'))))
+        if (offset == 0) and (len(rows) > 0):
+            rows = rows[1:] # header
+        rows = [row for row in rows if (len(row) >= 3) and (row[0].strip() != '')]
+        return [row[1] for row in rows], [row[2] for row in rows]
+
+    def recommend(self, search_depth = 1, autodraft_depth = 'end', time_budget = None, number_rollouts = None, plies = None, ensemble = False, silent = False):
+        ''' Best pick for the team on the clock, and the projected roto standings (as in Draft.tabulate_roto) after it.
+        With time_budget (seconds), search with Draft.find_best_pick_anytime instead of to a fixed search_depth; with
+        number_rollouts, rank candidates over that many sampled drafts (Draft.find_best_pick_monte_carlo); with plies,
+        search that many of the team's picks ahead (Draft.find_best_pick_lookahead); with ensemble (a Draft of a ProjectionEnsemble),
+        score every rollout under each model and pick by their consensus (Draft.find_best_pick_ensemble).'''
+        round_key, team_key = self.on_the_clock()
+        if silent == False:
+            print('Finding Best Pick For Team '+str(team_key+1))
+
+        if ensemble == True:
+            best_pick, best_position, best_placement, best_score, candidates = self.draft.find_best_pick_ensemble(team_key, self.state.copy(), round_key, search_depth = search_depth, autodraft_depth = autodraft_depth, silent = silent)
+        elif plies is not None:
+            best_pick, best_position, best_placement, best_score, number_rollouts = self.draft.find_best_pick_lookahead(team_key, self.state.copy(), round_key, plies = plies, search_depth = search_depth, autodraft_depth = autodraft_depth, silent = silent)
+        elif number_rollouts is not None:
+            best_pick, best_position, best_placement, best_score, candidates = self.draft.find_best_pick_monte_carlo(team_key, self.state.copy(), round_key, search_depth = search_depth, number_rollouts = number_rollouts, autodraft_depth = autodraft_depth, silent = silent)
+        elif time_budget is None:
+            pondered = self.pondered.get((self.state.board_key(), search_depth, autodraft_depth))
+            if pondered is not None:
+                best_pick, best_position, best_placement, best_score = pondered[1]
+                if silent == False:
+                    print('Searched while pondering')
+            else:
+                best_pick, best_position, best_placement, best_score = self.draft.find_best_pick(team_key, self.state.copy(), round_key, silent = silent, autodraft_depth = autodraft_depth, search_depth = search_depth)
+        else:
+            best_pick, best_position, best_placement, best_score, number_rollouts = self.draft.find_best_pick_anytime(team_key, self.state.copy(), round_key, time_budget = time_budget, autodraft_depth = autodraft_depth, silent = silent)
+            if silent == False:
+                print(self.draft.player_names[best_pick-1]+' is best over '+str(number_rollouts)+' rollouts')
+        best_player = self.draft.player_names[best_pick-1]
+
+        # Finish the draft after the best pick, without touching the live state
+        state = self.draft.draft_next_best(team_key, self.state.copy(), force_pick = best_pick, force_position = best_position)
+        state = self.draft.draft_remaining_cached(state, round_key, autodraft_depth = autodraft_depth)
+        if (silent == False) and (self.draft.rollout_cache is not None):
+            print('Rollout cache: '+str(self.draft.rollout_cache.stats()))
+
+        roto_stats = self.draft.tabulate_roto(state)
+        if silent == False:
+            print('Best Pick is ' + best_player + ' putting you in ' + str(roto_stats[4]) + ' place')
+        return best_player, roto_stats
+
+    def recommend_all(self, number_picks = None, search_depth = 1, autodraft_depth = 'end', advance = 'best', silent = False):
+        ''' Best pick of every team on the clock in the next number_picks picks (default one round, i.e., every draft position),
+        searched together on this board (Draft.find_best_picks): a DataFrame with the Pick, Round, Team, PLAYER, Position,
+        Placement and Score of each.  Later picks assume the earlier teams took their best pick (advance = 'best') or their
+        greedy pick ('greedy').  The live state is not changed.'''
+        return self.draft.find_best_picks(self.state, self.number_picks, number_picks = number_picks, search_depth = search_depth,
+                                          autodraft_depth = autodraft_depth, advance = advance, silent = silent)
+
+    def watch(self, path_file, search_depth = 1, autodraft_depth = 'end', time_budget = None, interval = 2., max_polls = None, ponder = False):
+        ''' Poll path_file every interval seconds and recommend a pick whenever new picks show up.  Stops when the
+        draft is over, after max_polls polls, or on KeyboardInterrupt.  With ponder, the time between polls is spent
+        pondering (see ponder) rather than idle.'''
+        number_picks_total = self.draft.number_rounds * self.draft.number_teams
+        last_modified = None
+        number_polls = 0
+        try:
+            while (self.number_picks < number_picks_total) and ((max_polls is None) or (number_polls < max_polls)):
+                number_polls += 1
+                if os.path.exists(path_file):
+                    file_stat = os.stat(path_file)
+                    if (file_stat.st_mtime, file_stat.st_size) != last_modified:
+                        last_modified = (file_stat.st_mtime, file_stat.st_size)
+                        if (self.update_from_file(path_file) > 0) and (self.number_picks < number_picks_total):
+                            self.recommend(search_depth = search_depth, autodraft_depth = autodraft_depth, time_budget = time_budget)
+                start = time.perf_counter()
+                if (ponder == True) and (self.number_picks < number_picks_total):
+                    self.ponder(time_budget = interval, search_depth = search_depth, autodraft_depth = autodraft_depth)
+                time.sleep(max(0., interval - (time.perf_counter() - start)))
+        except KeyboardInterrupt:
+            pass
+
+def read_pick_list(path_file):
+    # Picks of a pick spreadsheet (.xlsx or .csv) in order, with columns PLAYER and EligiblePosition; rows without a Pick number are dropped
+    if os.path.splitext(path_file)[1] == '.csv':
+        complete_player_list = spreadsheet_cache_2020.read_spreadsheet(path_file, skiprows = 1, names = ['Pick','PLAYER','EligiblePosition'], index_col = 'Pick')
+    else:
+        complete_player_list = spreadsheet_cache_2020.read_spreadsheet(path_file, skiprows = 0, names = ['Pick','PLAYER','EligiblePosition'], index_col = 'Pick')
+    return complete_player_list.loc[complete_player_list.index.dropna().values].sort_index()
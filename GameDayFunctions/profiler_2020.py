@@ -0,0 +1,174 @@
+import time
+import json
+import cProfile
+import functools
+import numpy as np
+import pandas as pd
+from GameDayFunctions.draft_state_2020 import DraftState
+
+class DraftProfiler:
+    ''' Opt-in timers and counters for the hot paths of a Draft's search.
+
+    While enabled, the profiled methods of draft (and DraftState.copy, the
+    copy of a draft state) are replaced by timed wrappers; disable puts the
+    originals back, so a Draft that is not being profiled runs exactly the
+    same code as before.  Use as a context manager:
+
+        with DraftProfiler(draft) as profiler:
+            draft.find_best_pick(team_key, state, round_key, search_depth = 2)
+        profiler.print_summary()
+
+    Times are inclusive (a rollout's time includes its draft_next_best
+    calls) and recursive calls of a method are only timed at the outermost
+    call.  Every pseudo_draft (or shared_rollout) is one rollout, i.e., one candidate pick
+    drafted and the draft finished; its latencies are kept to report the
+    time per candidate.  Pseudo-drafts run by worker processes (n_workers >
+    1) are not seen.
+
+    Parameters
+    ----------
+    draft : Draft
+        Draft to profile
+
+    methods : list [optional]
+        Draft methods to time (default profiled_methods)
+
+    cprofile : bool [optional]
+        Also run cProfile while enabled, for dump_stats
+
+    Returns
+    -------
+    Instance of DraftProfiler, which contains:
+        Objects:
+        - self.calls : number of calls of each timed method
+        - self.seconds : total seconds in each timed method
+        - self.rollout_seconds : seconds of each rollout
+
+        Functions:
+        - enable
+        - disable
+        - summary
+        - print_summary
+        - to_json
+        - dump_stats
+
+    '''
+
+    profiled_methods = ['find_best_pick', 'find_best_pick_anytime', 'find_best_pick_monte_carlo', 'find_best_pick_lookahead',
+                        'find_best_picks', 'idx_unfilled_positions', 'pseudo_draft', 'shared_rollout', 'draft_into_teams', 'draft_next_best', 'draft_next_sampled',
+                        'draft_remaining', 'draft_remaining_sampled', 'draft_remaining_cached', 'tabulate_roto', 'decide_best_choice',
+                        'sigmoid_probability_fn']
+
+    def __init__(self, draft, methods = None, cprofile = False):
+        self.draft = draft
+        self.methods = [method for method in (self.profiled_methods if methods is None else methods) if hasattr(draft, method)]
+        self.cprofile = cProfile.Profile() if cprofile == True else None
+        self.calls = {}
+        self.seconds = {}
+        self.rollout_seconds = []
+        self.wall_seconds = 0.
+        self.depth = {}
+        self.enabled = False
+        self.originals = {}
+
+    def timed(self, name, method):
+        # method, counting its calls and timing its outermost ones (and every pseudo_draft as a rollout)
+        @functools.wraps(method)
+        def timed_method(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if self.depth.get(name, 0) > 0:
+                return method(*args, **kwargs)
+            self.depth[name] = 1
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.depth[name] = 0
+                self.seconds[name] = self.seconds.get(name, 0.) + elapsed
+                if name in ['pseudo_draft', 'shared_rollout']:
+                    self.rollout_seconds.append(elapsed)
+        return timed_method
+
+    def enable(self):
+        ''' Start timing, e.g., again after disable; counts add up.'''
+        if self.enabled:
+            return self
+        for method in self.methods:
+            setattr(self.draft, method, self.timed(method, getattr(self.draft, method)))
+        self.originals['roto_scorer.standings'] = self.draft.roto_scorer.standings
+        self.draft.roto_scorer.standings = self.timed('roto_scorer.standings', self.draft.roto_scorer.standings)
+        self.originals['DraftState.copy'] = DraftState.copy
+        DraftState.copy = self.timed('DraftState.copy', DraftState.copy)
+        self.cache_stats = self.draft.rollout_cache.stats() if self.draft.rollout_cache is not None else None
+        if self.cprofile is not None:
+            self.cprofile.enable()
+        self.enabled = True
+        self.start = time.perf_counter()
+        return self
+
+    def disable(self):
+        ''' Stop timing and put the original methods back.'''
+        if not self.enabled:
+            return self
+        self.wall_seconds += time.perf_counter() - self.start
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        for method in self.methods:
+            del self.draft.__dict__[method]
+        self.draft.roto_scorer.standings = self.originals['roto_scorer.standings']
+        del self.draft.roto_scorer.__dict__['standings']
+        DraftState.copy = self.originals['DraftState.copy']
+        if self.cache_stats is not None:
+            stats = self.draft.rollout_cache.stats()
+            self.calls['rollout cache hits'] = self.calls.get('rollout cache hits', 0) + stats['hits'] - self.cache_stats['hits']
+            self.calls['rollout cache misses'] = self.calls.get('rollout cache misses', 0) + stats['misses'] - self.cache_stats['misses']
+        self.enabled = False
+        return self
+
+    def __enter__(self):
+        return self.enable()
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def summary(self):
+        ''' Calls, total seconds, milliseconds per call and share of the profiled time of everything timed, slowest first.'''
+        names = sorted(self.calls, key = lambda name: -self.seconds.get(name, 0.))
+        seconds = np.array([self.seconds.get(name, np.nan) for name in names])
+        calls = np.array([self.calls[name] for name in names])
+        return pd.DataFrame({'Calls':calls, 'Seconds':seconds, 'ms/Call':1000 * seconds / np.maximum(calls, 1),
+                             '% of Time':100 * seconds / self.wall_seconds if self.wall_seconds > 0 else np.nan}, index = pd.Index(names, name = 'Method'))
+
+    def rollout_stats(self):
+        ''' Rollouts, rollouts per second of profiled time, and the mean, median and slowest seconds per candidate rollout.'''
+        rollout_seconds = np.array(self.rollout_seconds)
+        return {'rollouts':len(rollout_seconds), 'rollouts_per_second':len(rollout_seconds) / self.wall_seconds if self.wall_seconds > 0 else 0.,
+                'mean_seconds':float(rollout_seconds.mean()) if len(rollout_seconds) > 0 else np.nan,
+                'median_seconds':float(np.median(rollout_seconds)) if len(rollout_seconds) > 0 else np.nan,
+                'max_seconds':float(rollout_seconds.max()) if len(rollout_seconds) > 0 else np.nan,
+                'profiled_seconds':self.wall_seconds}
+
+    def print_summary(self):
+        print(self.summary().to_string(float_format = lambda x: '%.3f' % x))
+        rollout_stats = self.rollout_stats()
+        print('%d rollouts in %.2fs, %.1f rollouts/s, %.1f ms per candidate (median %.1f, max %.1f)' %
+              (rollout_stats['rollouts'], rollout_stats['profiled_seconds'], rollout_stats['rollouts_per_second'],
+               1000 * rollout_stats['mean_seconds'], 1000 * rollout_stats['median_seconds'], 1000 * rollout_stats['max_seconds']))
+
+    def to_json(self, path_file = None):
+        ''' Summary and rollout stats as JSON, written to path_file if given.'''
+        summary = self.summary()
+        profile = {'methods':{name:{'calls':int(row['Calls']), 'seconds':None if np.isnan(row['Seconds']) else float(row['Seconds'])} for name, row in summary.iterrows()},
+                   'rollouts':self.rollout_stats()}
+        profile_json = json.dumps(profile, indent = 1)
+        if path_file is not None:
+            with open(path_file, 'w') as outfile:
+                outfile.write(profile_json)
+        return profile_json
+
+    def dump_stats(self, path_file):
+        ''' Write the cProfile stats (cprofile = True) to path_file, for pstats or snakeviz.'''
+        if self.cprofile is None:
+            raise ValueError('DraftProfiler was made without cprofile = True')
+        self.cprofile.dump_stats(path_file)
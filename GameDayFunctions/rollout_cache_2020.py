@@ -0,0 +1,92 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+class RolloutCache:
+    ''' Least-recently-used cache of finished autodraft rollouts, with a memory cap.
+
+    Without shuffle_picks the rest of a draft only depends on who has been
+    picked, which roster spots each team still has open and whose turn it is,
+    so a rollout that starts from a state seen before (e.g., the same candidate
+    pick when a live pick is searched again with a larger search_depth, or when
+    the draft is finished after the search) need not be drafted again.  Entries
+    are the picks of the rollout, (teams, player ids, slots), in pick order.
+
+    Parameters
+    ----------
+    max_megabytes : float [optional]
+        Memory cap of the stored rollouts; least recently used ones are evicted past it
+
+    Returns
+    -------
+    Instance of RolloutCache, which contains:
+        Objects:
+        - self.hits
+        - self.misses
+        - self.evictions
+
+        Functions:
+        - key
+        - get
+        - put
+        - clear
+        - stats
+
+    '''
+
+    def __init__(self, max_megabytes = 64):
+        self.max_bytes = int(max_megabytes * 1024**2)
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(state, *turn):
+        ''' Digest of the picked players and open roster spots of state, plus whatever identifies the turn (e.g., round).'''
+        digest = hashlib.blake2b(digest_size = 16)
+        digest.update(np.packbits(state.picked).tobytes())
+        digest.update(state.roster_spots.tobytes())
+        digest.update(repr(turn).encode())
+        return digest.digest()
+
+    def get(self, key):
+        ''' Stored rollout of key (and mark it as recently used), or None.'''
+        rollout = self.entries.get(key)
+        if rollout is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return rollout
+
+    def put(self, key, rollout):
+        ''' Store rollout, a tuple of arrays, under key, evicting the least recently used past max_bytes.'''
+        entry_bytes = entry_size(key, rollout)
+        if (entry_bytes > self.max_bytes) or (key in self.entries):
+            return
+        self.entries[key] = rollout
+        self.nbytes += entry_bytes
+        while self.nbytes > self.max_bytes:
+            old_key, old_rollout = self.entries.popitem(last = False)
+            self.nbytes -= entry_size(old_key, old_rollout)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.
+
+    def stats(self):
+        ''' Hits, misses, hit rate, evictions, number of entries and megabytes in use.'''
+        return {'hits':self.hits, 'misses':self.misses, 'hit_rate':self.hit_rate, 'evictions':self.evictions,
+                'entries':len(self.entries), 'megabytes':self.nbytes / 1024**2}
+
+def entry_size(key, rollout):
+    # Approximate bytes of an entry: arrays plus a fixed overhead for the key, tuple and dict slot
+    return len(key) + sum(array.nbytes for array in rollout) + 200
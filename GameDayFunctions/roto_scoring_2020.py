@@ -0,0 +1,73 @@
+import numpy as np
+
+class RotoScorer:
+    ''' Vectorized roto standings from team stat totals.
+
+    Works on the running totals kept by DraftState, i.e., arrays of shape
+    (number_teams, number_stats) with rate stats weighted by AB or IP, or on a
+    batch of leagues stacked as (number_leagues, number_teams, number_stats).
+
+    Parameters
+    ----------
+    batter_stats : list
+        Batting stats of the league; the first (AB) is the weight of batting rate stats and is not scored
+
+    pitcher_stats : list
+        Pitching stats of the league; the first (IP) is the weight of pitching rate stats and is not scored
+
+    rate_stats : list [optional]
+        Stats that are averages rather than sums
+
+    lower_better_stats : list [optional]
+        Stats where less is better.  Pitching BB is called BBP.
+
+    Returns
+    -------
+    Instance of RotoScorer, which contains:
+        Objects:
+        - self.category_names
+
+        Functions:
+        - category_totals
+        - category_points
+        - standings
+
+    '''
+
+    def __init__(self, batter_stats, pitcher_stats, rate_stats = ['AVG','OPS','ERA','WHIP'], lower_better_stats = ['L','CS','BBP','ERA','WHIP','BSV']):
+        self.number_batting_stats = len(batter_stats)
+        pitching_names = [s if s != 'BB' else 'BBP' for s in pitcher_stats]
+        self.category_names = batter_stats[1:] + pitching_names[1:]
+
+        # Columns of [batting_totals, pitching_totals] that are scored, and the column dividing each (-1 for counting stats)
+        self.category_columns = np.array(list(range(1, len(batter_stats))) + list(range(self.number_batting_stats + 1, self.number_batting_stats + len(pitcher_stats))))
+        weights = [0 if s in rate_stats else -1 for s in batter_stats[1:]] + [self.number_batting_stats if s in rate_stats else -1 for s in pitcher_stats[1:]]
+        self.weight_columns = np.array(weights)
+        self.is_rate = self.weight_columns >= 0
+        self.is_lower_better = np.array([s in lower_better_stats for s in self.category_names])
+
+    def category_totals(self, batting_totals, pitching_totals):
+        ''' Team values of each roto category, shape (..., number_teams, number_categories).'''
+        totals = np.concatenate([batting_totals, pitching_totals], axis=-1)
+        category_totals = totals[..., self.category_columns]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            category_totals[..., self.is_rate] = category_totals[..., self.is_rate] / totals[..., self.weight_columns[self.is_rate]]
+        return category_totals
+
+    def category_points(self, category_totals):
+        ''' Roto points per team and category: rank among teams (1 = worst), ties share the average rank, NaN scores NaN.'''
+        values = np.where(self.is_lower_better, -category_totals, category_totals)
+        # Compare every team with every other, (..., team, other team, category)
+        n_worse = (values[..., None, :, :] < values[..., :, None, :]).sum(axis=-2)
+        n_tied = (values[..., None, :, :] == values[..., :, None, :]).sum(axis=-2)
+        points = n_worse + (n_tied + 1) / 2.
+        points[np.isnan(values)] = np.nan
+        return points
+
+    def standings(self, batting_totals, pitching_totals):
+        ''' Total roto score and placement (1 = first, ties to the lower team index) of every team, each (..., number_teams).'''
+        scores = np.nansum(self.category_points(self.category_totals(batting_totals, pitching_totals)), axis=-1)
+        number_teams = scores.shape[-1]
+        ahead = (scores[..., None, :] > scores[..., :, None]) | ((scores[..., None, :] == scores[..., :, None]) & (np.arange(number_teams)[:, None] > np.arange(number_teams)[None, :]))
+        placements = ahead.sum(axis=-1) + 1
+        return scores, placements
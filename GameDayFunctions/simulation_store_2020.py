@@ -0,0 +1,206 @@
+import os
+import json
+import glob
+import numpy as np
+import pandas as pd
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Roster slots of drafted players, stored by their index in this list
+POSITIONS = ['C','1B','2B','SS','3B','OF','SP','RP','P','UTIL','BN']
+
+COLUMNS = {'sim':np.int32, 'draft_position':np.int16, 'round':np.int16, 'player_id':np.int32,
+           'position':np.int8, 'placement':np.int16, 'score':np.float64,
+           'predicted_placement':np.float32, 'predicted_score':np.float64}
+
+# Columns that stores written before them lack; read as NaN
+OPTIONAL_COLUMNS = ['predicted_placement', 'predicted_score']
+
+class SimulationStore:
+    ''' Append-only columnar store of simulated picks, one row per pick of the
+    simulated team: (sim, draft_position, round, player_id, position, placement,
+    score, predicted_placement, predicted_score).  placement and score are the
+    team's final standings in its draft, the same on each of its rows; the
+    predicted ones are what the search expected when it made the pick (NaN for
+    drafts without search).
+
+    Rows are buffered and written out in chunks of rows_per_chunk as drafts
+    finish, one file per chunk in path_store: Parquet if pyarrow is installed,
+    otherwise .npz.  Nothing but the unwritten buffer is kept in memory, and the
+    aggregations (average_draft_positions, placement_distribution) read one
+    chunk at a time, so stores larger than memory can be summarized.
+
+    Parameters
+    ----------
+    path_store : str
+        Directory of the chunks; existing chunks are removed unless append is True
+
+    player_names : list
+        Names by player_id (row of Projection.all_rank)
+
+    number_teams : int
+        Teams per draft, i.e., the largest placement
+
+    rows_per_chunk : int [optional]
+        Rows buffered before they are written
+
+    append : bool [optional]
+        Keep the chunks already in path_store (they must have the same players and number_teams)
+
+    Returns
+    -------
+    Instance of SimulationStore, which contains:
+        Objects:
+        - self.player_names
+        - self.number_rows
+
+        Functions:
+        - append_draft
+        - append_rows
+        - flush
+        - chunks
+        - read
+        - average_draft_positions
+        - placement_distribution
+
+    '''
+
+    def __init__(self, path_store, player_names, number_teams, rows_per_chunk = 100000, append = False):
+        self.path_store = path_store
+        self.player_names = list(player_names)
+        self.number_teams = number_teams
+        self.rows_per_chunk = rows_per_chunk
+        self.format = 'parquet' if pyarrow is not None else 'npz'
+        self.buffer = []
+        self.number_buffered = 0
+
+        os.makedirs(path_store, exist_ok = True)
+        if append == False:
+            for file_chunk in self.chunk_files():
+                os.remove(file_chunk)
+        with open(os.path.join(path_store, 'store.json'), 'w') as outfile:
+            json.dump({'player_names':self.player_names, 'number_teams':number_teams, 'positions':POSITIONS, 'columns':list(COLUMNS)}, outfile)
+        self.number_chunks = len(self.chunk_files())
+        self.number_rows = sum(len(chunk['sim']) for chunk in self.chunks(['sim']))
+
+    @classmethod
+    def open(cls, path_store):
+        ''' Store written earlier in path_store, to read or append to.'''
+        with open(os.path.join(path_store, 'store.json')) as infile:
+            metadata = json.load(infile)
+        return cls(path_store, metadata['player_names'], metadata['number_teams'], append = True)
+
+    def append_draft(self, isim, draft_position, drafted_team, player_ids_by_rank, placement, score):
+        ''' Add the picks of a Draft.drafted_team, {round:(rank, name, slot, predicted placement, predicted score)}, of
+        draft_position in sim isim, whose team finished the draft in placement with score.'''
+        rounds = sorted(drafted_team)
+        self.append_rows(sim = np.full(len(rounds), isim), draft_position = np.full(len(rounds), draft_position), round = np.array(rounds) + 1,
+                         player_id = [player_ids_by_rank[drafted_team[iround][0]] for iround in rounds],
+                         position = [POSITIONS.index(drafted_team[iround][2]) for iround in rounds],
+                         placement = np.full(len(rounds), placement), score = np.full(len(rounds), score),
+                         predicted_placement = [drafted_team[iround][3] for iround in rounds], predicted_score = [drafted_team[iround][4] for iround in rounds])
+
+    def append_rows(self, **columns):
+        ''' Add rows given as equal length arrays of every column (position as the index in POSITIONS); OPTIONAL_COLUMNS may be left out.'''
+        number_rows = len(np.asarray(columns['sim']).ravel())
+        rows = {column:np.asarray(columns[column] if column in columns else np.full(number_rows, np.nan)).astype(dtype).ravel() for column, dtype in COLUMNS.items()}
+        self.buffer.append(rows)
+        self.number_buffered += len(rows['sim'])
+        if self.number_buffered >= self.rows_per_chunk:
+            self.flush()
+
+    def flush(self):
+        ''' Write the buffered rows as a new chunk.'''
+        if self.number_buffered == 0:
+            return
+        rows = {column:np.concatenate([i[column] for i in self.buffer]) for column in COLUMNS}
+        file_chunk = os.path.join(self.path_store, 'part-%05d.%s' % (self.number_chunks, self.format))
+        if self.format == 'parquet':
+            pyarrow.parquet.write_table(pyarrow.table(rows), file_chunk + '.tmp')
+        else:
+            with open(file_chunk + '.tmp', 'wb') as outfile:
+                np.savez(outfile, **rows)
+        os.replace(file_chunk + '.tmp', file_chunk)
+        self.number_chunks += 1
+        self.number_rows += self.number_buffered
+        self.buffer = []
+        self.number_buffered = 0
+
+    def chunk_files(self):
+        return sorted(glob.glob(os.path.join(self.path_store, 'part-*.parquet')) + glob.glob(os.path.join(self.path_store, 'part-*.npz')))
+
+    def chunks(self, columns = None):
+        ''' Written chunks one at a time, each a dict of column arrays.'''
+        columns = list(COLUMNS) if columns is None else columns
+        for file_chunk in self.chunk_files():
+            # OPTIONAL_COLUMNS missing from chunks of older stores are NaN
+            if file_chunk.endswith('.parquet'):
+                metadata = pyarrow.parquet.read_metadata(file_chunk)
+                table = pyarrow.parquet.read_table(file_chunk, columns = [column for column in columns if (column in metadata.schema.names) or (column not in OPTIONAL_COLUMNS)])
+                chunk = {column:table.column(column).to_numpy() for column in table.column_names}
+                number_rows = metadata.num_rows
+            else:
+                with np.load(file_chunk) as npz:
+                    chunk = {column:npz[column] for column in columns if (column in npz.files) or (column not in OPTIONAL_COLUMNS)}
+                    number_rows = len(npz['sim'])
+            yield {column:chunk[column] if column in chunk else np.full(number_rows, np.nan, dtype=COLUMNS[column]) for column in columns}
+
+    def read(self):
+        ''' Every row as a DataFrame, with PLAYER and Position names (for stores that fit in memory).'''
+        self.flush()
+        chunks = list(self.chunks())
+        df = pd.DataFrame({column:np.concatenate([chunk[column] for chunk in chunks]) if chunks else np.array([], dtype=dtype) for column, dtype in COLUMNS.items()})
+        df['PLAYER'] = np.array(self.player_names, dtype=object)[df.player_id.values]
+        df['Position'] = np.array(POSITIONS, dtype=object)[df.position.values]
+        return df
+
+    def average_draft_positions(self):
+        ''' Round each drafted player goes in, on average over the drafts that picked him, with the number of
+        those drafts and his slot in the first of them (by sim, draft_position, round), sorted by average round.'''
+        self.flush()
+        number_players = len(self.player_names)
+        round_sums = np.zeros(number_players)
+        counts = np.zeros(number_players, dtype=np.int64)
+        first_keys = np.full(number_players, np.iinfo(np.int64).max)
+        first_positions = np.zeros(number_players, dtype=np.int8)
+        for chunk in self.chunks(['sim','draft_position','round','player_id','position']):
+            player_id = chunk['player_id']
+            round_sums += np.bincount(player_id, weights = chunk['round'], minlength = number_players)
+            counts += np.bincount(player_id, minlength = number_players)
+
+            # Earliest pick of each player in this chunk, kept where it is earlier than those of previous chunks
+            keys = (chunk['sim'].astype(np.int64) * (self.number_teams + 1) + chunk['draft_position']) * (np.iinfo(np.int16).max + 1) + chunk['round']
+            order = np.lexsort((keys, player_id))
+            is_first = np.r_[True, player_id[order][1:] != player_id[order][:-1]] if len(order) > 0 else np.array([], dtype=bool)
+            first = order[is_first]
+            earlier = keys[first] < first_keys[player_id[first]]
+            first_keys[player_id[first][earlier]] = keys[first][earlier]
+            first_positions[player_id[first][earlier]] = chunk['position'][first][earlier]
+
+        drafted = np.flatnonzero(counts)
+        average_rounds = round_sums[drafted] / counts[drafted]
+        # Ties go to the player picked first, as players were added to the original ranking in the order they were drafted
+        order = np.lexsort((first_keys[drafted], average_rounds))
+        drafted = drafted[order]
+        return pd.DataFrame({'player_id':drafted, 'Players':np.array(self.player_names, dtype=object)[drafted],
+                             'Positions':np.array(POSITIONS, dtype=object)[first_positions[drafted]],
+                             'Ave. Pick Number':average_rounds[order], 'Times Drafted':counts[drafted]})
+
+    def placement_distribution(self):
+        ''' Fraction of the drafts that picked each player finishing in each place (columns 1 to number_teams, the final
+        placement of the team that drafted him), for every drafted player, by player_id.'''
+        self.flush()
+        number_players = len(self.player_names)
+        number_places = self.number_teams + 1
+        counts = np.zeros(number_players * number_places, dtype=np.int64)
+        for chunk in self.chunks(['player_id','placement']):
+            counts += np.bincount(chunk['player_id'].astype(np.int64) * number_places + chunk['placement'], minlength = len(counts))
+        counts = counts.reshape(number_players, number_places)[:, 1:]
+        drafted = np.flatnonzero(counts.sum(axis=1))
+        distribution = pd.DataFrame(counts[drafted] / counts[drafted].sum(axis=1, keepdims=True), index = pd.Index(drafted, name = 'player_id'),
+                                    columns = np.arange(1, number_places))
+        distribution.insert(0, 'Players', np.array(self.player_names, dtype=object)[drafted])
+        return distribution
@@ -0,0 +1,36 @@
+import os
+import hashlib
+from collections import OrderedDict
+import pandas as pd
+
+# Parsed spreadsheets of this process by (hash of the file's contents, read options); a Simulation builds a Draft
+# per sim and draft position, and each would otherwise parse the same injury list (and rankings) again
+parsed_spreadsheets = OrderedDict()
+max_spreadsheets = 32
+
+def read_spreadsheet(path_file, **read_options):
+    ''' DataFrame of path_file (.xlsx with pd.read_excel, .csv with pd.read_csv), parsed once per process while the
+    file's contents are unchanged.  read_options go to the pandas reader.  Returns a copy, which callers may modify.'''
+    with open(path_file, 'rb') as infile:
+        file_hash = hashlib.sha1(infile.read()).hexdigest()
+    key = (file_hash, os.path.splitext(path_file)[1], repr(sorted(read_options.items())))
+
+    if key in parsed_spreadsheets:
+        parsed_spreadsheets.move_to_end(key)
+    else:
+        if os.path.splitext(path_file)[1] == '.csv':
+            parsed_spreadsheets[key] = pd.read_csv(path_file, **read_options)
+        else:
+            parsed_spreadsheets[key] = pd.read_excel(path_file, **read_options)
+        while len(parsed_spreadsheets) > max_spreadsheets:
+            parsed_spreadsheets.popitem(last = False)
+    return parsed_spreadsheets[key].copy()
+
+def clear_spreadsheets():
+    parsed_spreadsheets.clear()
+
+def remove_special_characters(names):
+    ''' Vectorized remove_special_characters of fangraphs_projection_2020: accents of ñ, í, é, á, ú and ó
+    dropped, and everything from ' Jr.' on cut, for a Series of names.'''
+    names = names.astype(str).str.translate(str.maketrans('ñíéáúó', 'nieauo'))
+    return names.str.split(' Jr.', n = 1, regex = False).str[0]
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# Picks of the original (baseline) code for the draft cases of benchmark_suite.py, written to benchmarks/baseline_picks.json so
+# that benchmark_suite.py --baseline can tell which cases the changes since then moved.  golden_picks.json only holds the picks
+# of the current code.  The baseline is a checkout of the first commit, e.g., git worktree add /tmp/baseline ddf1997, and runs
+# from there (it reads its projections and spreadsheets by relative path).  It must run under the pandas 1 it was written for:
+# putting back the DataFrame.append and Series.bool that pandas 2 and 3 removed is not enough, as the string dtype of pandas 3
+# changes what its str.contains name matching finds, and with it the rosters and placements.  Rosters are sorted by name, as
+# the baseline does not keep them in draft order.  Projections the baseline fails to build (e.g., Steamer 2020, where a name
+# matching several ranked players gives too many positions) are recorded with their error, and their cases are not compared.
+# Run from the top of the repo: python benchmarks/baseline_picks.py <baseline checkout> [live search depths, e.g. 1,2]
+
+import os
+import sys
+import json
+import warnings
+import subprocess
+
+path_benchmarks = os.path.dirname(os.path.abspath(__file__))
+file_baseline = os.path.join(path_benchmarks, 'baseline_picks.json')
+
+models = ['ZiPS', 'Steamer', 'TheBat']
+years = [2020, 2021]
+
+def roster_names(value):
+    # Names in a baseline roster, {slot:names}, where a slot filled again nests [earlier names, new names]
+    if isinstance(value, dict):
+        return [name for names in value.values() for name in roster_names(names)]
+    if isinstance(value, list):
+        return [name for names in value for name in roster_names(names)]
+    return [str(name) for name in value]
+
+if __name__ == '__main__':
+    path_baseline = os.path.abspath(sys.argv[1])
+    live_depths = [int(i) for i in sys.argv[2].split(',')] if len(sys.argv) > 2 else [1, 2]
+
+    os.chdir(path_baseline)
+    sys.path.insert(0, path_baseline)
+    warnings.filterwarnings('ignore')
+    import pandas as pd
+    if int(pd.__version__.split('.')[0]) > 1:
+        sys.exit('The baseline needs pandas 1 (found '+pd.__version__+')')
+    from GameDayFunctions.fangraphs_projection_2020 import Projection
+    from GameDayFunctions.draft_2020 import Draft
+
+    cases = {}
+    projections = {}
+    for year in years:
+        for model in models:
+            try:
+                projections[(model, year)] = Projection(model = model, year = year)
+            except ValueError as error:
+                cases['draft_naive/'+model+'_'+str(year)] = {'error':str(error)}
+                print('draft_naive/'+model+'_'+str(year), 'error:', error, flush = True)
+                continue
+            draft = Draft(projections[(model, year)], draft_position = 6)
+            draft.draft_all(naive_draft = True)
+            cases['draft_naive/'+model+'_'+str(year)] = {'placement':int(draft.roto_placement), 'roster':sorted(roster_names(draft.teams[draft.draft_position]['roster']))}
+            print('draft_naive/'+model+'_'+str(year), cases['draft_naive/'+model+'_'+str(year)]['placement'], flush = True)
+
+    draft = Draft(projections[('ZiPS', 2020)], draft_position = 3, number_teams = 6)
+    draft.draft_all(naive_draft = False, search_depth = 1)
+    cases['draft_search/ZiPS_2020_6_teams_depth_1'] = {'placement':int(draft.roto_placement), 'picks':[str(draft.drafted_team[iround][1]) for iround in sorted(draft.drafted_team)]}
+    print('draft_search/ZiPS_2020_6_teams_depth_1', cases['draft_search/ZiPS_2020_6_teams_depth_1']['placement'], flush = True)
+
+    for iround in range(1, 10):
+        for search_depth in live_depths:
+            draft = Draft(projections[('ZiPS', 2020)], draft_position = 6)
+            best_player, roto_stats = draft.draft_from_list_and_find_best_pick(search_depth = search_depth, draft_pick_file = 'MockDraftFP_Round_'+str(iround)+'.xlsx', silent = True)
+            name = 'live/MockDraftFP_Round_'+str(iround)+'_depth_'+str(search_depth)
+            cases[name] = {'best_pick':str(best_player), 'placement':int(roto_stats[4])}
+            print(name, cases[name]['best_pick'], flush = True)
+
+    revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output = True, text = True, cwd = path_baseline).stdout.strip()
+    with open(file_baseline, 'w') as outfile:
+        json.dump({'revision':revision, 'pandas':pd.__version__, 'cases':cases}, outfile, indent = 1)
+    print('Wrote '+file_baseline)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# Best pick of every draft position on one board: Draft.find_best_picks (shared board, candidates and rollout tails) against a
+# separate Draft per team, each replaying the board and calling find_best_pick, as 12 separate runs would.  The picks of both
+# must be the same; the speedup of find_best_picks is printed for each MockDraftFP_Round_*.xlsx pick list.
+# Run from the top of the repo: python benchmarks/benchmark_all_positions.py [rounds, e.g. 1,5,9] [search_depth]
+
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pandas as pd
+from GameDayFunctions.fangraphs_projection_2020 import Projection
+from GameDayFunctions.draft_2020 import Draft
+from GameDayFunctions.live_draft_2020 import LiveDraft, read_pick_list
+
+def separate_runs(projections, player_list, number_picks, search_depth):
+    # Best pick of each of the next number_picks teams, each from its own Draft (at its draft_position), given the earlier teams' best picks
+    best_picks = []
+    for ipick in range(number_picks):
+        # find_best_pick searches for the team at draft_position
+        draft = Draft(projections, draft_position = Draft(projections).turn(len(player_list) + ipick)[1] + 1)
+        live = LiveDraft(draft)
+        live.add_picks(player_list.PLAYER.tolist(), player_list.EligiblePosition.tolist())
+        for player_name, position in best_picks:
+            round_key, team_key = live.on_the_clock()
+            live.state = draft.draft_next_best(team_key, live.state, force_pick = draft.find_player(player_name, live.state) + 1, force_position = position)
+            live.number_picks += 1
+        round_key, team_key = live.on_the_clock()
+        best_pick, best_position, best_placement, best_score = draft.find_best_pick(team_key, live.state.copy(), round_key, search_depth = search_depth)
+        best_picks.append((draft.player_names[best_pick - 1], best_position))
+    return best_picks
+
+def shared_run(projections, player_list, number_picks, search_depth):
+    draft = Draft(projections)
+    live = LiveDraft(draft)
+    live.add_picks(player_list.PLAYER.tolist(), player_list.EligiblePosition.tolist())
+    best_picks = live.recommend_all(number_picks = number_picks, search_depth = search_depth, silent = True)
+    return list(zip(best_picks.PLAYER, best_picks.Position)), draft.rollout_cache.stats()
+
+if __name__ == '__main__':
+    rounds = [int(i) for i in sys.argv[1].split(',')] if len(sys.argv) > 1 else [1, 5, 9]
+    search_depth = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    projections = Projection(model = 'ZiPS', year = 2020)
+    number_picks = Draft(projections).number_teams
+    rows = []
+    for iround in rounds:
+        player_list = read_pick_list(os.path.join('Draft_Pick_Spreadsheets', 'MockDraftFP_Round_'+str(iround)+'.xlsx'))
+
+        start = time.perf_counter()
+        separate_picks = separate_runs(projections, player_list, number_picks, search_depth)
+        separate_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        shared_picks, cache_stats = shared_run(projections, player_list, number_picks, search_depth)
+        shared_seconds = time.perf_counter() - start
+
+        rows.append([iround, separate_seconds, shared_seconds, separate_seconds / shared_seconds, cache_stats['hits'], shared_picks == separate_picks])
+        print(rows[-1], flush = True)
+        if shared_picks != separate_picks:
+            print(pd.DataFrame({'Separate':separate_picks, 'Shared':shared_picks}).to_string())
+
+    results = pd.DataFrame(rows, columns = ['Round', 'Separate Runs (s)', 'find_best_picks (s)', 'Speedup', 'Shared Rollouts', 'Same Picks'])
+    print(results.to_string(float_format = lambda x: '%.2f' % x))
+    if not results['Same Picks'].all():
+        sys.exit(1)
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# Compare naive Draft.draft_all, one draft at a time, with BatchDraft: same rosters and totals, drafts per second.
+# Run from the top of the repo: python benchmarks/benchmark_batch_draft.py [number_leagues]
+
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from GameDayFunctions.fangraphs_projection_2020 import Projection
+from GameDayFunctions.draft_2020 import Draft
+from GameDayFunctions.batch_draft_2020 import BatchDraft
+
+number_leagues = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+projections = Projection(model = 'ZiPS', year = 2020)
+
+number_single = 10
+t0 = time.perf_counter()
+for i in range(number_single):
+    draft = Draft(projections)
+    draft.draft_all(naive_draft = True)
+t_single = (time.perf_counter() - t0) / number_single
+
+batch = BatchDraft(Draft(projections), number_leagues)
+t0 = time.perf_counter()
+batch.draft_all()
+t_batch = time.perf_counter() - t0
+assert (batch.roster_ids == draft.state.roster_ids).all() and (batch.batting_totals == draft.state.batting_totals).all() and (batch.pitching_totals == draft.state.pitching_totals).all(), 'batch drafts differ'
+
+shuffled = BatchDraft(Draft(projections), number_leagues, shuffle_picks = True, rng = np.random.default_rng(0))
+t0 = time.perf_counter()
+shuffled.draft_all()
+t_shuffled = time.perf_counter() - t0
+
+print('Draft.draft_all (naive):       %8.1f drafts/s' % (1 / t_single))
+print('BatchDraft (naive, %5d):     %8.1f drafts/s, same rosters and totals' % (number_leagues, number_leagues / t_batch))
+print('BatchDraft (shuffled, %5d):  %8.1f drafts/s' % (number_leagues, number_leagues / t_shuffled))
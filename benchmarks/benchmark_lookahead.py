@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# Placement gained by searching several picks ahead (Draft.find_best_pick_lookahead) over find_best_pick, per second of search.
+# From each MockDraftFP_Round_*.xlsx pick list, the rest of the draft is played out: team 6 picks with each policy, and the
+# other teams pick by sampled draft positions (Draft.sample_pick_values; the same samples for every policy).
+# Run from the top of the repo: python benchmarks/benchmark_lookahead.py [number_playouts] [rounds, e.g. 1,5,9]
+
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+import pandas as pd
+from GameDayFunctions.fangraphs_projection_2020 import Projection
+from GameDayFunctions.draft_2020 import Draft
+from GameDayFunctions.live_draft_2020 import LiveDraft, read_pick_list
+
+policies = {'find_best_pick':lambda draft, team_key, state, round_key: draft.find_best_pick(team_key, state, round_key)[:2],
+            'lookahead 2 plies':lambda draft, team_key, state, round_key: draft.find_best_pick_lookahead(team_key, state, round_key, plies = 2)[:2],
+            'lookahead 2 plies, 4 samples':lambda draft, team_key, state, round_key: draft.find_best_pick_lookahead(team_key, state, round_key, plies = 2, number_samples = 4)[:2]}
+
+def play_out(draft, live, policy, pick_values):
+    # Final placement of draft_position, and seconds spent choosing its picks
+    state = live.state.copy()
+    position_players = draft.position_players_by_value(pick_values)
+    position_pointers = np.zeros(len(position_players), dtype=int)
+    search_seconds = 0.
+    for pick_number in range(live.number_picks, draft.number_rounds * draft.number_teams):
+        round_key, team_key = live.on_the_clock(pick_number)
+        if team_key == draft.draft_position:
+            start = time.perf_counter()
+            best_pick, best_position = policy(draft, team_key, state, round_key)
+            search_seconds += time.perf_counter() - start
+            state = draft.draft_next_best(team_key, state, force_pick = best_pick, force_position = best_position)
+        else:
+            state = draft.draft_next_sampled(team_key, state, pick_values, position_players, position_pointers)
+    return draft.tabulate_roto(state)[4], search_seconds
+
+if __name__ == '__main__':
+    number_playouts = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    rounds = [int(i) for i in sys.argv[2].split(',')] if len(sys.argv) > 2 else [1, 5, 9]
+
+    projections = Projection(model = 'ZiPS', year = 2020)
+    rows = []
+    for iround in rounds:
+        draft = Draft(projections, draft_position = 6)
+        draft.rng = np.random.default_rng(iround)
+        live = LiveDraft(draft)
+        player_list = read_pick_list(os.path.join('Draft_Pick_Spreadsheets', 'MockDraftFP_Round_'+str(iround)+'.xlsx'))
+        live.add_picks(player_list.PLAYER.tolist(), player_list.EligiblePosition.tolist())
+        sampled_pick_values = draft.sample_pick_values(number_playouts)
+        for policy_name, policy in policies.items():
+            for iplayout in range(number_playouts):
+                placement, search_seconds = play_out(draft, live, policy, sampled_pick_values[iplayout])
+                rows.append([iround, policy_name, iplayout, placement, search_seconds])
+                print(rows[-1], flush = True)
+
+    results = pd.DataFrame(rows, columns = ['Round', 'Policy', 'Playout', 'Placement', 'Search Seconds'])
+    summary = results.groupby('Policy', sort = False).agg({'Placement':'mean', 'Search Seconds':'mean'})
+    summary['Places Gained'] = summary.loc['find_best_pick', 'Placement'] - summary['Placement']
+    summary['Places Gained per Extra Second'] = summary['Places Gained'] / (summary['Search Seconds'] - summary.loc['find_best_pick', 'Search Seconds'])
+    print(results.pivot_table(index = 'Round', columns = 'Policy', values = 'Placement', sort = False).to_string())
+    print(summary.to_string())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# Memory of a Projection, a Draft and a DraftState, full and compact (Projection(compact = True), Draft(compact = True)):
+# bytes per ranked player, bytes per draft state (every rollout copies or rolls back one), and the peak RSS of a process
+# that loads a projection and searches a pick, i.e., of one Simulation worker.  Also checks that the compact Draft
+# picks the same players as the full one on the MockDraftFP_Round_*.xlsx pick lists.
+# Run from the top of the repo: python benchmarks/benchmark_memory.py [rounds, e.g. 1,5,9]
+
+import os
+import sys
+import json
+import resource
+import subprocess
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pandas as pd
+from GameDayFunctions.fangraphs_projection_2020 import Projection
+from GameDayFunctions.draft_2020 import Draft
+
+def measure(compact, rounds):
+    # Bytes per player and per state, and the picks of each round, of one mode (run in its own process for its peak RSS)
+    projections = Projection(model = 'ZiPS', year = 2020, compact = compact)
+    draft = Draft(projections, draft_position = 6, compact = compact)
+    number_players = len(projections.all_rank)
+    projection_bytes = sum(projections.memory_bytes().values())
+    draft_bytes = draft.memory_bytes()
+    picks = {}
+    for iround in rounds:
+        draft = Draft(projections, draft_position = 6, compact = compact)
+        best_player, roto_stats = draft.draft_from_list_and_find_best_pick(draft_pick_file = 'MockDraftFP_Round_'+str(iround)+'.xlsx', silent = True)
+        picks[iround] = str(best_player)
+    return {'Projection bytes/player':projection_bytes / number_players,
+            'Draft bytes/player':(sum(draft_bytes.values()) - draft_bytes['state']) / number_players,
+            'DraftState bytes':draft_bytes['state'],
+            'Statline bytes/player':(draft.batting_lines.nbytes + draft.pitching_lines.nbytes) / number_players,
+            'Peak RSS (MB)':resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            'picks':picks}
+
+if __name__ == '__main__':
+    if (len(sys.argv) > 1) and (sys.argv[1] == '--child'):
+        print(json.dumps(measure(sys.argv[2] == 'compact', [int(i) for i in sys.argv[3].split(',')])))
+        sys.exit(0)
+    rounds = sys.argv[1] if len(sys.argv) > 1 else '1,5,9'
+
+    results = {}
+    for mode in ['full', 'compact']:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, rounds], capture_output = True, text = True, stdin = subprocess.DEVNULL).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+    picks = {mode:results[mode].pop('picks') for mode in results}
+
+    report = pd.DataFrame(results)
+    report['Compact/Full'] = report['compact'] / report['full']
+    print(report.to_string(float_format = lambda x: '%.2f' % x))
+    same_picks = picks['full'] == picks['compact']
+    print('Picks ' + ('are the same' if same_picks else 'differ') + ': ' + json.dumps(picks))
+    if not same_picks:
+        sys.exit(1)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# Compare find_best_pick run serially and with a process pool (Draft(n_workers = ...)): same picks, wall-clock time.
+# n_workers defaults to the number of CPUs, and at least 2; with more workers than CPUs, Draft.use_worker_pool runs the
+# pseudo-drafts serially, which is reported.
+# Run from the top of the repo: python benchmarks/benchmark_parallel_best_pick.py [n_workers] [search_depth]
+
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from GameDayFunctions.fangraphs_projection_2020 import Projection
+from GameDayFunctions.draft_2020 import Draft
+
+if __name__ == '__main__':
+    n_workers = int(sys.argv[1]) if len(sys.argv) > 1 else max(2, os.cpu_count() or 1)
+    search_depth = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    projections = Projection(model = 'ZiPS', year = 2020)
+
+    results = {}
+    for workers in [1, n_workers]:
+        draft = Draft(projections, draft_position = 6, n_workers = workers)
+        draft.worker_pool() if draft.use_worker_pool(2 * workers) else None # start the workers before timing
+
+        t0 = time.perf_counter()
+        live_pick = draft.draft_from_list_and_find_best_pick(search_depth = search_depth, draft_pick_file = 'MockDraftFP_Round_3.xlsx', silent = True)
+        t_live = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        draft.draft_all(search_depth = search_depth)
+        t_all = time.perf_counter() - t0
+        draft.close_pool()
+
+        results[workers] = (live_pick[0], live_pick[1][4], draft.drafted_team, t_live, t_all)
+        print('n_workers = %2d: draft_from_list_and_find_best_pick %6.2fs, draft_all %6.2fs' % (workers, t_live, t_all))
+
+    assert results[1][:3] == results[n_workers][:3], 'parallel picks differ from serial picks'
+    if n_workers > (os.cpu_count() or 1):
+        print('%d workers > %d CPUs: the pseudo-drafts ran serially (Draft.use_worker_pool)' % (n_workers, os.cpu_count() or 1))
+    print('Same picks; speedup %.1fx (live pick), %.1fx (draft_all) with %d workers' % (results[1][3] / results[n_workers][3], results[1][4] / results[n_workers][4], n_workers))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# Pondering (LiveDraft.ponder) while other teams are on the clock: how often the board at team 6's turn was searched ahead, and
+# how long recommend then takes, against a LiveDraft that does not ponder.  From each MockDraftFP_Round_*.xlsx pick list, the
+# draft is played out to team 6's next two turns: other teams pick by sampled draft positions (Draft.sample_pick_values, drawn
+# independently of the samples ponder predicts boards with), and ponder gets ponder_seconds after every pick of theirs.
+# Run from the top of the repo: python benchmarks/benchmark_ponder.py [number_playouts] [ponder_seconds] [rounds, e.g. 1,3,5]
+
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+import pandas as pd
+from GameDayFunctions.fangraphs_projection_2020 import Projection
+from GameDayFunctions.draft_2020 import Draft
+from GameDayFunctions.live_draft_2020 import LiveDraft, read_pick_list
+
+def play_out(projections, player_list, pick_values, ponder_seconds, number_turns = 2):
+    # Rows of [other teams' picks since the last turn, pondered, seconds of recommend with pondering, seconds without, same pick]
+    # for team 6's next number_turns turns
+    lives = []
+    for ilive in range(2):
+        live = LiveDraft(Draft(projections, draft_position = 6))
+        live.add_picks(player_list.PLAYER.tolist(), player_list.EligiblePosition.tolist())
+        lives.append(live)
+    live, baseline = lives
+    draft = live.draft
+    position_players = draft.position_players_by_value(pick_values)
+    position_pointers = np.zeros(len(position_players), dtype=int)
+
+    rows = []
+    number_other_picks = 0
+    while (len(rows) < number_turns) and (live.number_picks < draft.number_rounds * draft.number_teams):
+        round_key, team_key = live.on_the_clock()
+        if team_key == draft.draft_position:
+            pondered = (live.state.board_key(), 1, 'end') in live.pondered
+            start = time.perf_counter()
+            best_player = live.recommend(silent = True)[0]
+            ponder_seconds_taken = time.perf_counter() - start
+            start = time.perf_counter()
+            baseline_player = baseline.recommend(silent = True)[0]
+            rows.append([number_other_picks, pondered, ponder_seconds_taken, time.perf_counter() - start, best_player == baseline_player])
+            player_name = best_player
+            number_other_picks = 0
+        else:
+            state = draft.draft_next_sampled(team_key, live.state.copy(), pick_values, position_players, position_pointers)
+            player_name = draft.player_names[state.roster_ids[team_key, state.roster_size[team_key] - 1]]
+            number_other_picks += 1
+        for each_live in [live, baseline]:
+            each_live.add_picks([player_name])
+        if team_key != draft.draft_position:
+            live.ponder(time_budget = ponder_seconds)
+    return rows
+
+if __name__ == '__main__':
+    number_playouts = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    ponder_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 1.
+    rounds = [int(i) for i in sys.argv[3].split(',')] if len(sys.argv) > 3 else [1, 3, 5]
+
+    projections = Projection(model = 'ZiPS', year = 2020)
+    rng = np.random.default_rng(2020)
+    rows = []
+    for iround in rounds:
+        player_list = read_pick_list(os.path.join('Draft_Pick_Spreadsheets', 'MockDraftFP_Round_'+str(iround)+'.xlsx'))
+        draft = Draft(projections, draft_position = 6)
+        for iplayout in range(number_playouts):
+            pick_values = draft.player_ave_pick + draft.player_std_pick * rng.standard_normal(len(draft.player_names))
+            for row in play_out(projections, player_list, pick_values, ponder_seconds):
+                rows.append([iround, iplayout] + row)
+                print(rows[-1], flush = True)
+
+    results = pd.DataFrame(rows, columns = ['Round', 'Playout', 'Other Picks', 'Pondered', 'Recommend with Pondering (s)', 'Recommend (s)', 'Same Pick'])
+    print(results.groupby('Pondered')[['Recommend with Pondering (s)', 'Recommend (s)']].mean().to_string(float_format = lambda x: '%.3f' % x))
+    # Turns right after the pick list (no other team picked since, so there was no time to ponder) are counted apart
+    waited = results['Other Picks'] > 0
+    print('Board searched ahead at %d of %d turns after other teams picked (%d turns without); mean recommend %.3fs with pondering, %.3fs without; same picks: %s' %
+          (results.Pondered[waited].sum(), waited.sum(), (~waited).sum(), results['Recommend with Pondering (s)'][waited].mean(), results['Recommend (s)'][waited].mean(), results['Same Pick'].all()))
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# Compare Draft.tabulate_roto (pandas) with RotoScorer.standings (numpy) on the default 12-team league.
+# Run from the top of the repo: python benchmarks/benchmark_roto_scoring.py [number_rollouts]
+
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from GameDayFunctions.fangraphs_projection_2020 import Projection
+from GameDayFunctions.draft_2020 import Draft
+
+number_rollouts = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+
+projections = Projection(model = 'ZiPS', year = 2020)
+draft = Draft(projections, draft_position = 6)
+
+# A batch of finished, shuffled drafts to score
+np.random.seed(0)
+states = []
+for irollout in range(number_rollouts):
+    states.append(draft.draft_remaining(draft.state.copy(), 0, shuffle_picks = True))
+batting_totals = np.stack([s.batting_totals for s in states])
+pitching_totals = np.stack([s.pitching_totals for s in states])
+
+t0 = time.perf_counter()
+pandas_results = [draft.tabulate_roto(s) for s in states]
+t_pandas = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+single_results = [draft.roto_scorer.standings(s.batting_totals, s.pitching_totals) for s in states]
+t_single = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+batch_scores, batch_placements = draft.roto_scorer.standings(batting_totals, pitching_totals)
+t_batch = time.perf_counter() - t0
+
+# Same standings from all three
+for irollout in range(number_rollouts):
+    roto_standings = pandas_results[irollout][3]
+    assert np.allclose(roto_standings.sort_index().values, batch_scores[irollout])
+    assert np.allclose(single_results[irollout][0], batch_scores[irollout])
+    assert pandas_results[irollout][4] == batch_placements[irollout, draft.draft_position]
+
+print('%d rollouts, %d teams' % (number_rollouts, draft.number_teams))
+print('tabulate_roto            %10.3f ms/rollout' % (1e3 * t_pandas / number_rollouts))
+print('RotoScorer, one by one   %10.3f ms/rollout  (%.0fx)' % (1e3 * t_single / number_rollouts, t_pandas / t_single))
+print('RotoScorer, one batch    %10.3f ms/rollout  (%.0fx)' % (1e3 * t_batch / number_rollouts, t_pandas / t_batch))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# Latency of the draft server (GameDayFunctions.draft_server_2020): recording a pick while idle and while a best pick
+# search runs in the worker pool (it should not wait for the search), the search itself, and the projected standings.
+# The board is a MockDraftFP_Round_*.xlsx pick list.
+# Run from the top of the repo: python benchmarks/benchmark_server.py [time_budget] [round]
+
+import os
+import sys
+import json
+import time
+import threading
+import asyncio
+import urllib.request
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from GameDayFunctions.draft_server_2020 import DraftServer
+from GameDayFunctions.live_draft_2020 import read_pick_list
+
+def request(port, method, path, arguments = None):
+    # Seconds and JSON response of one request
+    data = json.dumps(arguments).encode() if arguments is not None else None
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(urllib.request.Request('http://127.0.0.1:'+str(port)+path, data = data, method = method)) as response:
+            return time.perf_counter() - start, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return time.perf_counter() - start, json.loads(error.read())
+
+if __name__ == '__main__':
+    time_budget = float(sys.argv[1]) if len(sys.argv) > 1 else 3.
+    iround = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    server = DraftServer(models = ['ZiPS'], n_workers = 1, port = 0)
+    started = threading.Event()
+    threading.Thread(target = lambda: asyncio.run(server.serve(started)), daemon = True).start()
+    started.wait()
+    port = server.port
+
+    seconds, summary = request(port, 'POST', '/drafts', {'draft_id':'mock', 'model':'ZiPS', 'draft_position':6})
+    print('Created draft in %.3fs' % seconds)
+    player_list = read_pick_list(os.path.join('Draft_Pick_Spreadsheets', 'MockDraftFP_Round_'+str(iround)+'.xlsx'))
+    players = player_list.PLAYER.tolist()
+    idle_seconds = []
+    for player in players[:-4]:
+        seconds, summary = request(port, 'POST', '/drafts/mock/picks', {'player':player})
+        idle_seconds.append(seconds)
+    print('Recorded %d picks while idle: %.1f ms median, %.1f ms max' % (len(idle_seconds), 1000 * np.median(idle_seconds), 1000 * np.max(idle_seconds)))
+
+    # Warm the worker (its Draft) with one search, then record the last picks while a time_budget search runs
+    seconds, recommendation = request(port, 'POST', '/drafts/mock/best_pick', {'search_depth':1})
+    print('First best pick (builds the worker Draft) in %.2fs: %s' % (seconds, json.dumps(recommendation)))
+    search = {}
+    search_thread = threading.Thread(target = lambda: search.update(zip(['seconds', 'recommendation'], request(port, 'POST', '/drafts/mock/best_pick', {'time_budget':time_budget}))))
+    search_thread.start()
+    time.sleep(0.5)
+    busy_seconds = []
+    for player in players[-4:]:
+        seconds, summary = request(port, 'POST', '/drafts/mock/picks', {'player':player})
+        busy_seconds.append(seconds)
+        time.sleep(0.2)
+    searching = search_thread.is_alive()
+    search_thread.join()
+    print('Recorded %d picks during the search (still running: %s): %.1f ms median, %.1f ms max' % (len(busy_seconds), searching, 1000 * np.median(busy_seconds), 1000 * np.max(busy_seconds)))
+    print('Best pick with time_budget = %.1fs answered in %.2fs: %s' % (time_budget, search['seconds'], json.dumps(search['recommendation'])))
+
+    seconds, recommendation = request(port, 'POST', '/drafts/mock/best_pick', {'search_depth':1})
+    print('Best pick for the board now in %.2fs: %s' % (seconds, json.dumps(recommendation)))
+    seconds, standings = request(port, 'GET', '/drafts/mock/standings')
+    print('Projected standings in %.2fs: team %d places %d' % (seconds, standings['standings'][0]['team'], standings['placement']))
+    server.close()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# Benchmark suite: Projection construction, Draft.draft_all (naive and search), draft_from_list_and_find_best_pick at
+# search_depth 1-4 on the MockDraftFP_Round_*.xlsx pick lists, and Simulation throughput, on the bundled projections.
+# Picks of every case are checked against benchmarks/golden_picks.json, so speedups that change behavior are caught.
+# Results are saved to benchmarks/results/ (one JSON per run) to compare runs.
+#
+# Run from the top of the repo:
+#   python benchmarks/benchmark_suite.py                    run everything, check golden picks, save results
+#   python benchmarks/benchmark_suite.py --quick            fewer cases (one projection, rounds 3 and 6, search_depth 1-2)
+#   python benchmarks/benchmark_suite.py --only live        cases whose name contains 'live'
+#   python benchmarks/benchmark_suite.py --compare benchmarks/results/<earlier run>.json
+#   python benchmarks/benchmark_suite.py --update-golden    accept the current picks as golden (after intended changes)
+#   python benchmarks/benchmark_suite.py --baseline         also list the draft cases whose picks differ from those of the
+#                                                           original code, benchmarks/baseline_picks.json (see baseline_picks.py)
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import warnings
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+import pandas as pd
+from GameDayFunctions.fangraphs_projection_2020 import Projection
+from GameDayFunctions.draft_2020 import Draft
+from GameDayFunctions.gameday_simulation_2020 import Simulation
+
+path_benchmarks = os.path.dirname(os.path.abspath(__file__))
+file_golden = os.path.join(path_benchmarks, 'golden_picks.json')
+file_baseline = os.path.join(path_benchmarks, 'baseline_picks.json')
+path_results = os.path.join(path_benchmarks, 'results')
+
+models = ['ZiPS', 'Steamer', 'TheBat']
+years = [2020, 2021]
+
+def roster_names(draft, team_key):
+    # Names on the roster of team_key, in the order drafted
+    return [str(draft.player_names[player_id]) for player_id in draft.state.roster_ids[team_key, :draft.state.roster_size[team_key]]]
+
+def case_projection(model, year):
+    def run():
+        projection = Projection(model = model, year = year, use_cache = False)
+        return {'ranked_players':len(projection.all_rank), 'matched_players':int((projection.player_stats_row >= 0).sum())}
+    return run
+
+def case_projection_cached(model, year):
+    Projection(model = model, year = year) # make sure the cache exists
+    def run():
+        projection = Projection(model = model, year = year)
+        return {'ranked_players':len(projection.all_rank), 'matched_players':int((projection.player_stats_row >= 0).sum())}
+    return run
+
+def case_draft_naive(projection, draft_position = 6):
+    def run():
+        draft = Draft(projection, draft_position = draft_position)
+        draft.draft_all(naive_draft = True)
+        return {'placement':int(draft.roto_placement), 'roster':roster_names(draft, draft.draft_position)}
+    return run
+
+def case_draft_search(projection, draft_position = 3, number_teams = 6, search_depth = 1):
+    def run():
+        draft = Draft(projection, draft_position = draft_position, number_teams = number_teams)
+        draft.draft_all(naive_draft = False, search_depth = search_depth)
+        return {'placement':int(draft.roto_placement), 'picks':[str(draft.drafted_team[iround][1]) for iround in sorted(draft.drafted_team)]}
+    return run
+
+def case_live(projection, draft_pick_file, search_depth, draft_position = 6):
+    # A new Draft every time, so nothing (e.g., rollouts) is reused from an earlier case
+    def run():
+        draft = Draft(projection, draft_position = draft_position)
+        best_player, roto_stats = draft.draft_from_list_and_find_best_pick(search_depth = search_depth, draft_pick_file = draft_pick_file, silent = True)
+        return {'best_pick':str(best_player), 'placement':int(roto_stats[4])}
+    return run
+
+def case_simulation(number_sims, number_teams, naive_draft, search_depth = 1):
+    def run():
+        with tempfile.TemporaryDirectory() as path_sims:
+            simulation = Simulation(number_sims = number_sims, number_teams = number_teams, naive_draft = naive_draft, search_depth = search_depth,
+                                    path_sims = path_sims + '/', silent = True)
+        return {'top_players':simulation.average_rankings.Players.head(24).tolist(), 'drafts':number_sims * number_teams}
+    return run
+
+def define_cases(quick = False):
+    # Name -> function running the case once and returning what it picked (compared with the golden picks)
+    cases = {}
+    for year in ([2020] if quick else years):
+        for model in (['ZiPS'] if quick else models):
+            cases['projection/'+model+'_'+str(year)] = case_projection(model, year)
+    cases['projection_cached/ZiPS_2020'] = case_projection_cached('ZiPS', 2020)
+
+    projection = Projection(model = 'ZiPS', year = 2020)
+    cases['draft_naive/ZiPS_2020'] = case_draft_naive(projection)
+    if not quick:
+        for year in years:
+            for model in models:
+                if (model, year) != ('ZiPS', 2020):
+                    cases['draft_naive/'+model+'_'+str(year)] = case_draft_naive(Projection(model = model, year = year))
+    cases['draft_search/ZiPS_2020_6_teams_depth_1'] = case_draft_search(projection)
+
+    for iround in ([3, 6] if quick else range(1, 10)):
+        for search_depth in ([1, 2] if quick else [1, 2, 3, 4]):
+            cases['live/MockDraftFP_Round_'+str(iround)+'_depth_'+str(search_depth)] = case_live(projection, 'MockDraftFP_Round_'+str(iround)+'.xlsx', search_depth)
+
+    cases['simulation_naive/12_teams_50_sims'] = case_simulation(50, 12, True)
+    cases['simulation_search/6_teams_1_sim'] = case_simulation(1, 6, False)
+    return cases
+
+def run_case(run, repeat):
+    # Best of repeat runs (seconds), and the picks of the last one
+    seconds = []
+    for irepeat in range(repeat):
+        start = time.perf_counter()
+        picks = run()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds), picks
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output = True, text = True, cwd = path_benchmarks).stdout.strip()
+    except OSError:
+        return ''
+
+def compare_baseline(picks_by_case, file_baseline):
+    # Cases whose picks differ from those of the original code; its rosters are compared as sets, as it does not keep the draft order
+    with open(file_baseline) as infile:
+        baseline = json.load(infile)
+    same, moved = [], []
+    for name, picks in picks_by_case.items():
+        if (name not in baseline['cases']) or ('error' in baseline['cases'][name]):
+            continue
+        if 'roster' in picks:
+            picks = dict(picks, roster = sorted(picks['roster']))
+        (same if picks == baseline['cases'][name] else moved).append(name)
+    print('\nCompared with the picks of ' + baseline['revision'] + ': ' + str(len(same)) + ' cases the same, ' + str(len(moved)) + ' moved' +
+          (': ' + ', '.join(moved) if len(moved) > 0 else ''))
+
+def compare_results(results, file_compare):
+    with open(file_compare) as infile:
+        earlier = json.load(infile)
+    rows = []
+    for name, case in results['cases'].items():
+        if name in earlier['cases']:
+            rows.append([name, earlier['cases'][name]['seconds'], case['seconds'], earlier['cases'][name]['seconds'] / case['seconds']])
+    comparison = pd.DataFrame(rows, columns = ['Case', 'Before (s)', 'Now (s)', 'Speedup']).set_index('Case')
+    print('\nCompared with ' + file_compare + ' (' + earlier['meta']['revision'] + ')')
+    print(comparison.to_string(float_format = lambda x: '%.3f' % x))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'GameDay benchmark suite')
+    parser.add_argument('--quick', action = 'store_true', help = 'fewer cases')
+    parser.add_argument('--only', default = None, help = 'only cases whose name contains this')
+    parser.add_argument('--repeat', type = int, default = 1, help = 'runs of each case; the fastest is kept')
+    parser.add_argument('--compare', default = None, help = 'results JSON of an earlier run')
+    parser.add_argument('--update-golden', action = 'store_true', help = 'save the current picks as golden_picks.json')
+    parser.add_argument('--no-save', action = 'store_true', help = 'do not write results')
+    parser.add_argument('--baseline', action = 'store_true', help = 'list the cases whose picks differ from baseline_picks.json')
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    golden = {}
+    if os.path.exists(file_golden):
+        with open(file_golden) as infile:
+            golden = json.load(infile)
+
+    cases = define_cases(quick = args.quick)
+    results = {'meta':{'revision':git_revision(), 'date':time.strftime('%Y-%m-%d %H:%M:%S'), 'python':platform.python_version(),
+                       'pandas':pd.__version__, 'numpy':np.__version__, 'machine':platform.machine(), 'cpus':os.cpu_count()},
+               'cases':{}}
+    mismatches = []
+    picks_by_case = {}
+    for name, run in cases.items():
+        if (args.only is not None) and (args.only not in name):
+            continue
+        seconds, picks = run_case(run, args.repeat)
+        picks = json.loads(json.dumps(picks))
+        picks_by_case[name] = picks
+        if args.update_golden:
+            golden[name] = picks
+            status = 'golden updated'
+        elif name not in golden:
+            status = 'no golden'
+        elif golden[name] == picks:
+            status = 'picks ok'
+        else:
+            status = 'PICKS CHANGED'
+            mismatches.append(name)
+        results['cases'][name] = {'seconds':seconds, 'status':status}
+        if 'drafts' in picks:
+            results['cases'][name]['drafts_per_second'] = picks['drafts'] / seconds
+        print('%-50s %9.3fs  %s' % (name, seconds, status), flush = True)
+
+    if args.update_golden:
+        with open(file_golden, 'w') as outfile:
+            json.dump(golden, outfile, indent = 1, sort_keys = True)
+    if not args.no_save:
+        os.makedirs(path_results, exist_ok = True)
+        file_results = os.path.join(path_results, time.strftime('%Y%m%d_%H%M%S') + '_' + results['meta']['revision'] + '.json')
+        with open(file_results, 'w') as outfile:
+            json.dump(results, outfile, indent = 1)
+        print('Results saved to ' + file_results)
+    if args.compare is not None:
+        compare_results(results, args.compare)
+    if args.baseline:
+        compare_baseline(picks_by_case, file_baseline)
+
+    if len(mismatches) > 0:
+        print('Picks changed in ' + str(len(mismatches)) + ' cases: ' + ', '.join(mismatches))
+        sys.exit(1)
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# Checks that Draft.filter_injured_list removes the players of Injured_List_Spreadsheets/Injuries2020.xlsx from the rankings of
+# each year, whatever their spelling there (accents, ' Jr.', the trailing spaces of the 2021 rankings): the players removed
+# must be those the original name by name prefix match removed.  Exits with 1 if not.
+# Run from the top of the repo: python benchmarks/check_injured_list.py [years, e.g. 2020,2021]
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from GameDayFunctions.fangraphs_projection_2020 import Projection
+from GameDayFunctions.draft_2020 import Draft, standardize_name
+from GameDayFunctions import spreadsheet_cache_2020
+
+if __name__ == '__main__':
+    years = [int(i) for i in sys.argv[1].split(',')] if len(sys.argv) > 1 else [2020, 2021]
+
+    injured_list = spreadsheet_cache_2020.read_spreadsheet(os.path.join('Injured_List_Spreadsheets', 'Injuries2020.xlsx'), skiprows = 0)
+    injured_names = [standardize_name(name) for name in injured_list.loc[injured_list.index.dropna().values, 'PLAYER']]
+    all_ok = True
+    for year in years:
+        projections = Projection(model = 'ZiPS', year = year)
+        ranked_names = projections.all_rank.PLAYER.str.strip()
+        expected = set(name for injured_name in injured_names for name in ranked_names[ranked_names.str.match(injured_name)])
+        draft = Draft(projections, filter_injured_players = True)
+        removed = set(ranked_names) - set(draft.remaining_ranked_players.PLAYER.str.strip())
+        ok = (removed == expected) and (len(removed) > 0)
+        all_ok = all_ok and ok
+        print('%d rankings: %d injured players removed (%s)%s' % (year, len(removed), ', '.join(sorted(removed)), '' if ok else ' -- expected '+', '.join(sorted(expected))))
+    if not all_ok:
+        sys.exit(1)
@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+# Where find_best_pick spends its time at each search_depth (DraftProfiler), to choose a search_depth that fits a pick clock.
+# Run from the top of the repo: python benchmarks/profile_find_best_pick.py [max_search_depth] [draft_position] [profile.json]
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from GameDayFunctions.fangraphs_projection_2020 import Projection
+from GameDayFunctions.draft_2020 import Draft
+from GameDayFunctions.profiler_2020 import DraftProfiler
+
+if __name__ == '__main__':
+    max_search_depth = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    draft_position = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+
+    projections = Projection(model = 'ZiPS', year = 2020)
+
+    for search_depth in range(1, max_search_depth + 1):
+        # A new Draft for each search_depth, so the rollout cache starts empty
+        draft = Draft(projections, draft_position = draft_position - 1)
+        with DraftProfiler(draft) as profiler:
+            draft.find_best_pick(draft.draft_position, draft.state.copy(), 0, search_depth = search_depth)
+        print('\nsearch_depth = ' + str(search_depth))
+        profiler.print_summary()
+        if len(sys.argv) > 3:
+            profiler.to_json(sys.argv[3].replace('.json', '_depth_' + str(search_depth) + '.json'))